@@ -0,0 +1 @@
+"""benchmarks – synthetic-data timing scripts; run with ``python -m benchmarks.<name>``."""
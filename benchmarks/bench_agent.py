@@ -0,0 +1,117 @@
+"""bench_agent.py – compare run_agent and the streaming arun_agent with a scripted model.
+
+Usage: python -m benchmarks.bench_agent [--latency 0.3] [--token-delay 0.02] [--backend csv] [--prompts 8]
+
+The scripted model asks for list_slots + lookup_section on every section and
+a validation in one turn, then answers.  No network access is needed; the
+routine is generated into a temporary directory.
+
+For one prompt the total time is the model's time either way (the tools
+are pure Python and take milliseconds); the async loop shows text as soon
+as the first token arrives.  The async loop saves wall time when several
+prompts are in flight: ``--prompts`` sessions answered one after another
+with run() are compared with the same sessions gathered with arun().
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from langchain_core.messages import AIMessage
+
+from routine_agent import agent
+from routine_agent.data_context import load_context
+from routine_agent.generator import generate_routine
+from routine_agent.routine_store import RoutineStore, save_routine
+
+from .fake_llm import ScriptedChatModel
+
+
+def _script(section_codes) -> list:
+    calls = []
+    for code in section_codes:
+        calls.append({"name": "list_slots", "args": {"section_code": code}, "id": f"ls-{code}"})
+        calls.append({"name": "lookup_section", "args": {"section_code": code}, "id": f"lk-{code}"})
+    calls.append({"name": "validate_routine_tool", "args": {}, "id": "val"})
+    answer = "All sections are scheduled and the routine has no teacher or room conflicts."
+    return [
+        AIMessage(content="Let me look at every section first.", tool_calls=calls),
+        AIMessage(content=answer),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds before the first token.")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="Seconds between streamed words.")
+    parser.add_argument("--backend", choices=("csv", "sqlite"), default="csv")
+    parser.add_argument("--prompts", type=int, default=8, help="Concurrent prompts for the second table.")
+    args = parser.parse_args()
+
+    context = load_context()
+    codes = context["sections"]["code"].tolist()
+    with tempfile.TemporaryDirectory() as tmp:
+        agent._ROUTINE_PATH = os.path.join(tmp, "routine_table.csv")
+        if args.backend == "sqlite":
+            from routine_agent import sqlite_store
+
+            sqlite_store.SQLITE_PATH = os.path.join(tmp, "routine.db")
+
+        def model() -> ScriptedChatModel:
+            save_routine(generate_routine(context), agent._ROUTINE_PATH)
+            return ScriptedChatModel(
+                responses=_script(codes), latency=args.latency, token_delay=args.token_delay
+            )
+
+        llm = model()
+        start = time.perf_counter()
+        sync_text, _ = agent.run_agent("Check every section.", context=context, backend=args.backend, llm=llm)
+        sync_total = time.perf_counter() - start
+
+        llm = model()
+        first: list = []
+        start = time.perf_counter()
+        async_text, _ = asyncio.run(
+            agent.arun_agent(
+                "Check every section.",
+                context=context,
+                backend=args.backend,
+                llm=llm,
+                on_text=lambda _: first or first.append(time.perf_counter() - start),
+            )
+        )
+        async_total = time.perf_counter() - start
+
+        # several prompts, each in its own session over a fork of one routine
+        base = RoutineStore(generate_routine(context))
+
+        def sessions() -> list:
+            return [
+                agent.AgentSession(context, llm=model(), base=base) for _ in range(args.prompts)
+            ]
+
+        batch = sessions()
+        start = time.perf_counter()
+        sequential = [s.run("Check every section.")[0] for s in batch]
+        sequential_total = time.perf_counter() - start
+
+        async def gather(batch: list) -> list:
+            return await asyncio.gather(*(s.arun("Check every section.") for s in batch))
+
+        batch = sessions()
+        start = time.perf_counter()
+        gathered = [text for text, _ in asyncio.run(gather(batch))]
+        gathered_total = time.perf_counter() - start
+
+    assert sync_text == async_text
+    assert sequential == gathered == [sync_text] * args.prompts
+    print(f"{'loop':>6} {'first text (s)':>15} {'total (s)':>10} {'tool calls':>11}")
+    print(f"{'sync':>6} {sync_total:15.3f} {sync_total:10.3f} {2 * len(codes) + 1:>11}")
+    print(f"{'async':>6} {first[0]:15.3f} {async_total:10.3f} {2 * len(codes) + 1:>11}")
+    print(f"\n{args.prompts} prompts: run() one after another {sequential_total:.3f} s, "
+          f"arun() gathered {gathered_total:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
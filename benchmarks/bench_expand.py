@@ -0,0 +1,61 @@
+"""bench_expand.py – stream a year of dated sessions versus building the whole table first.
+
+Usage: python -m benchmarks.bench_expand [--sections 50 300] [--days 365]
+"""
+import argparse
+import datetime as dt
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from routine_agent.config import RoutineRules
+from routine_agent.term_calendar import SESSION_COLUMNS, expand_routine, write_sessions
+
+from .synthetic import make_context, make_routine
+
+
+def _measure(fn) -> tuple:
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = fn()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, seconds, peak / 2 ** 20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, nargs="+", default=[50, 300])
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    rules = RoutineRules()
+    first = dt.date(2026, 1, 1)
+    last = first + dt.timedelta(days=args.days - 1)
+    print(f"{'sections':>9} {'mode':<15} {'sessions':>9} {'seconds':>8} {'peak MiB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sections:
+            ctx = make_context(n, rules)
+            df = make_routine(n, rules, conflict_rate=0.0, invalid_rate=0.0)
+            for fmt in ("csv", "jsonl"):
+                path = os.path.join(tmp, f"sessions.{fmt}")
+                count, seconds, peak = _measure(
+                    lambda: write_sessions(expand_routine(df, ctx, first, last, rules), path)
+                )
+                print(f"{n:>9} {'stream ' + fmt:<15} {count:>9} {seconds:8.2f} {peak:9.1f}")
+
+            def materialise() -> int:
+                table = pd.DataFrame(list(expand_routine(df, ctx, first, last, rules)), columns=SESSION_COLUMNS)
+                table.to_csv(os.path.join(tmp, "table.csv"), index=False)
+                return len(table)
+
+            count, seconds, peak = _measure(materialise)
+            print(f"{n:>9} {'DataFrame csv':<15} {count:>9} {seconds:8.2f} {peak:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""bench_generator.py – time the constraint-solver routine generator on synthetic schools.
+
+Usage: python -m benchmarks.bench_generator [--sizes 5 20 50 100]
+"""
+import argparse
+import time
+
+from routine_agent.config import RoutineRules
+from routine_agent.generator import generate_routine
+from routine_agent.validator import validate_routine
+
+from .synthetic import make_context
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 20, 50, 100])
+    parser.add_argument("--utilisation", type=float, default=0.8)
+    args = parser.parse_args()
+
+    rules = RoutineRules()
+    print(f"{'sections':>9} {'teachers':>9} {'slots':>7} {'seconds':>8} {'errors':>7}")
+    for n_sections in args.sizes:
+        ctx = make_context(n_sections, rules, args.utilisation)
+        start = time.perf_counter()
+        df = generate_routine(ctx, rules)
+        elapsed = time.perf_counter() - start
+        errors = validate_routine(df, rules)
+        print(f"{n_sections:>9} {len(ctx['teachers']):>9} {len(df):>7} {elapsed:8.2f} {len(errors):>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""bench_occupancy.py – availability queries: DataFrame scans versus OccupancyIndex bitmasks.
+
+Usage: python -m benchmarks.bench_occupancy [--sizes 100 1000 5000] [--queries 2000]
+(sizes are section counts; each section has days × periods rows).
+"""
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from routine_agent.config import RoutineRules
+from routine_agent.occupancy import OccupancyIndex
+
+from .synthetic import make_context, make_routine
+
+
+def _scan_is_free(df: pd.DataFrame, teacher_id: str, day: str, period: int) -> bool:
+    return not ((df["teacher_id"] == teacher_id) & (df["day"] == day) & (df["period"] == period)).any()
+
+
+def _scan_free_teachers(df: pd.DataFrame, teachers: pd.DataFrame, dept: str, day: str, period: int) -> list:
+    busy = set(df.loc[(df["day"] == day) & (df["period"] == period), "teacher_id"])
+    ids = teachers.loc[teachers["department"] == dept, "id"].astype(str)
+    return [t for t in ids if t not in busy]
+
+
+def _scan_day_loads(df: pd.DataFrame) -> pd.DataFrame:
+    return df.groupby(["teacher_id", "day"]).size().unstack(fill_value=0)
+
+
+def _time(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    rules = RoutineRules()
+    print(f"{'sections':>9} {'query':<14} {'scan us':>10} {'bitset us':>10} {'speedup':>8}")
+    for n_sections in args.sizes:
+        df = make_routine(n_sections, rules, invalid_rate=0.0)
+        ctx = make_context(n_sections, rules)
+        start = time.perf_counter()
+        occ = OccupancyIndex(rules, ctx)
+        occ.load(df)
+        build = time.perf_counter() - start
+
+        rng = random.Random(0)
+        cells = [(rng.choice(rules.days), rng.choice(rules.periods)) for _ in range(args.queries)]
+        tids = [str(rng.randrange(1, n_sections * len(rules.periods) + 1)) for _ in range(args.queries)]
+        it = iter(range(10 ** 9))
+
+        def pick():
+            i = next(it) % args.queries
+            return tids[i], cells[i]
+
+        def scan_free():
+            t, (d, p) = pick()
+            return _scan_is_free(df, t, d, p)
+
+        def bit_free():
+            t, (d, p) = pick()
+            return occ.is_free("teacher", t, d, p)
+
+        def scan_dept():
+            _, (d, p) = pick()
+            return _scan_free_teachers(df, ctx["teachers"], "Math", d, p)
+
+        def bit_dept():
+            _, (d, p) = pick()
+            return occ.free("teacher", d, p, "Math")
+
+        few = max(10, args.queries // 100)
+        rows = [
+            ("is_free", _time(scan_free, few), _time(bit_free, args.queries)),
+            ("free_in_dept", _time(scan_dept, few), _time(bit_dept, args.queries)),
+            ("day_loads", _time(lambda: _scan_day_loads(df), 3), _time(lambda: occ.day_loads("teacher"), 3)),
+        ]
+        for name, scan_s, bit_s in rows:
+            print(f"{n_sections:>9} {name:<14} {scan_s * 1e6:10.1f} {bit_s * 1e6:10.1f} {scan_s / bit_s:7.0f}x")
+        print(f"{n_sections:>9} {'(build)':<14} {'':>10} {build * 1e6:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""bench_optimize.py – delta scoring versus full rescoring of each candidate move.
+
+Usage: python -m benchmarks.bench_optimize [--sections 40 200] [--moves 20000] [--seconds 2] [--utilisation 0.6]
+
+Both loops try the same seeded swaps on a generated routine; the full loop
+rescores the whole routine after every feasible move.  Lower teacher
+utilisation leaves teachers free periods for the swaps to use.  Then the optimiser
+runs for the time budget and the score before and after is printed.
+"""
+import argparse
+import random
+import time
+
+from routine_agent.config import RoutineRules
+from routine_agent.generator import generate_routine
+from routine_agent.optimizer import SoftWeights, _State, optimize_routine
+from routine_agent.validator import validate_routine
+
+from .synthetic import make_context
+
+
+def _moves_per_second(df, rules: RoutineRules, moves: int, full: bool) -> float:
+    state, weights = _State(df, rules), SoftWeights()
+    rng = random.Random(0)
+    sections = list(state.order)
+    cells = len(rules.days) * len(rules.periods)
+    start = time.perf_counter()
+    for _ in range(moves):
+        sec = rng.choice(sections)
+        i, j = rng.sample(range(cells), 2)
+        if state.feasible(sec, i, j):
+            state.swap(sec, i, j, weights)
+            if full:
+                state.score(weights)
+    return moves / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, nargs="+", default=[40, 200])
+    parser.add_argument("--moves", type=int, default=20000)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--utilisation", type=float, default=0.6)
+    args = parser.parse_args()
+
+    rules = RoutineRules()
+    print(f"{'sections':>9} {'delta moves/s':>14} {'full moves/s':>13} {'before':>8} {'after':>8} {'errors':>7}")
+    for n in args.sections:
+        df = generate_routine(make_context(n, rules, args.utilisation), rules)
+        delta = _moves_per_second(df, rules, args.moves, full=False)
+        full = _moves_per_second(df, rules, max(args.moves // 20, 1), full=True)
+        result = optimize_routine(df, rules, seconds=args.seconds, seed=0)
+        errors = len(validate_routine(result.routine, rules))
+        print(f"{n:>9} {delta:>14.0f} {full:>13.0f} {result.before.total:>8g} {result.after.total:>8g} {errors:>7}")
+
+
+if __name__ == "__main__":
+    main()
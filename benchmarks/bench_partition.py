@@ -0,0 +1,47 @@
+"""bench_partition.py – one global solve versus partitioned generation in worker processes.
+
+Usage: python -m benchmarks.bench_partition [--sections 80 200] [--campuses 4] [--workers 1 4]
+(--workers defaults to 1 and the CPU count.)
+(each campus is its own shift with its own teachers, so it forms one partition).
+"""
+import argparse
+import os
+import time
+
+from routine_agent.config import RoutineRules
+from routine_agent.generator import generate_routine
+from routine_agent.markdown_renderer import iter_markdown
+from routine_agent.partition import generate_partitioned
+from routine_agent.validator import validate_routine
+
+from .synthetic import make_context
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, nargs="+", default=[80, 200])
+    parser.add_argument("--campuses", type=int, default=4)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, os.cpu_count() or 1}))
+    parser.add_argument("--utilisation", type=float, default=0.8)
+    args = parser.parse_args()
+
+    rules = RoutineRules()
+    print(f"{'sections':>9} {'mode':<14} {'parts':>6} {'seconds':>8} {'errors':>7}")
+    for n_sections in args.sections:
+        ctx = make_context(n_sections, rules, args.utilisation, campuses=args.campuses)
+        start = time.perf_counter()
+        df = generate_routine(ctx, rules)
+        errors = validate_routine(df, rules)
+        "".join(iter_markdown(df, rules, ctx))
+        elapsed = time.perf_counter() - start
+        print(f"{n_sections:>9} {'single':<14} {1:>6} {elapsed:8.2f} {len(errors):>7}")
+        for workers in args.workers:
+            start = time.perf_counter()
+            result = generate_partitioned(ctx, rules, max_workers=workers)
+            elapsed = time.perf_counter() - start
+            mode = f"workers={workers}"
+            print(f"{n_sections:>9} {mode:<14} {len(result.partitions):>6} {elapsed:8.2f} {len(result.errors):>7}")
+
+
+if __name__ == "__main__":
+    main()
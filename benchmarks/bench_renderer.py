@@ -0,0 +1,123 @@
+"""bench_renderer.py – compare the single-pass Markdown renderer with the per-cell original.
+
+Usage: python -m benchmarks.bench_renderer [--sizes 50 500]
+tests/test_markdown_renderer.py checks the output against a golden file.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from routine_agent.config import RoutineRules
+from routine_agent.markdown_renderer import render_markdown
+
+from .synthetic import make_context, make_routine
+
+
+# ---------------------------------------------------------------------------
+# Original implementation, kept verbatim as the baseline (context passed in)
+# ---------------------------------------------------------------------------
+
+
+def legacy_render_markdown(routine_df: pd.DataFrame, output_path: str, rules: RoutineRules, ctx: dict) -> str:
+    sections_df = ctx["sections"]
+    subjects_df = ctx["subjects"]
+    teachers_df = ctx["teachers"]
+    rooms_df = ctx["rooms"]
+
+    lines: list[str] = []
+
+    subj_name = dict(zip(subjects_df["id"].astype(str), subjects_df["name"]))
+    teacher_code = dict(zip(teachers_df["id"].astype(str), teachers_df["code"]))
+    room_no = dict(zip(rooms_df["id"].astype(str), rooms_df["room_no"].astype(str)))
+
+    days = rules.days
+
+    if not routine_df.empty:
+        section_codes = routine_df["section_code"].unique().tolist()
+    else:
+        section_codes = sections_df["code"].tolist() if "code" in sections_df.columns else []
+
+    for sec_code in section_codes:
+        sec_row = sections_df[sections_df["code"] == sec_code]
+        room_label = ""
+        grp_label = ""
+        if not sec_row.empty:
+            r = sec_row.iloc[0]
+            if "room_id" in r.index and not pd.isna(r.get("room_id", None)):
+                room_label = f" — Room {room_no.get(str(int(r['room_id'])), str(r.get('room_id', '')))}"
+            grp_label = str(r.get("grp_code", ""))
+
+        lines.append(f"# Class {sec_code}{room_label}\n")
+        if grp_label:
+            lines.append(f"**Group:** {grp_label}  ")
+        lines.append("")
+
+        header = "| Period | " + " | ".join(days) + " |"
+        separator = "|--------|" + "|".join(["------------------------"] * len(days)) + "|"
+        lines.append(header)
+        lines.append(separator)
+
+        sec_df = routine_df[routine_df["section_code"] == sec_code] if not routine_df.empty else pd.DataFrame()
+
+        for period in rules.periods:
+            row_cells = [str(period)]
+            for day in days:
+                slot = (
+                    sec_df[(sec_df["day"] == day) & (sec_df["period"] == period)]
+                    if not sec_df.empty
+                    else pd.DataFrame()
+                )
+                if slot.empty:
+                    row_cells.append("—")
+                else:
+                    s = slot.iloc[0]
+                    sub = subj_name.get(str(s.get("subject_id", "")), str(s.get("subject_id", "—")))
+                    tcode = teacher_code.get(str(s.get("teacher_id", "")), str(s.get("teacher_id", "")))
+                    cell = f"{sub} ({tcode})" if tcode else sub
+                    row_cells.append(cell)
+
+            lines.append("| " + " | ".join(row_cells) + " |")
+
+            if period == rules.break_after_period:
+                break_cells = [rules.break_label] + [f"{rules.break_duration_min} Min"] * len(days)
+                lines.append("| " + " | ".join(break_cells) + " |")
+
+        lines.append("")
+
+    content = "\n".join(lines)
+    with open(output_path, "w", encoding="utf-8") as fh:
+        fh.write(content)
+    return content
+
+
+# ---------------------------------------------------------------------------
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500])
+    args = parser.parse_args()
+
+    rules = RoutineRules()
+    print(f"{'sections':>9} {'rows':>7} {'legacy s':>9} {'new s':>7} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        old_path, new_path = os.path.join(tmp, "old.md"), os.path.join(tmp, "new.md")
+        for n_sections in args.sizes:
+            ctx = make_context(n_sections, rules)
+            df = make_routine(n_sections, rules, seed=n_sections)
+
+            start = time.perf_counter()
+            legacy_render_markdown(df, old_path, rules, ctx)
+            old_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            render_markdown(df, new_path, rules, ctx)
+            new_s = time.perf_counter() - start
+            print(f"{n_sections:>9} {len(df):>7} {old_s:9.3f} {new_s:7.3f} {old_s / new_s:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
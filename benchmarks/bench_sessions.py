@@ -0,0 +1,105 @@
+"""bench_sessions.py – many agent sessions at once over copy-on-write forks of one routine.
+
+Usage: python -m benchmarks.bench_sessions [--sessions 16] [--sections 200] [--latency 0.05]
+
+Every session gets its own scripted model that edits a different slot,
+lists its section and validates, then answers.  The sessions run in threads
+(run) and as asyncio tasks (arun).  Memory of forked sessions is compared
+with sessions that each load a full copy.  Isolation of the sessions and
+the shared base is checked by tests/test_sessions.py.
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.messages import AIMessage
+
+from routine_agent.agent import AgentSession
+from routine_agent.config import RoutineRules
+from routine_agent.routine_store import RoutineStore
+
+from .fake_llm import ScriptedChatModel
+from .synthetic import make_context, make_routine
+
+
+def _script(i: int, slot: dict, latency: float) -> ScriptedChatModel:
+    """Session i removes one base slot and adds a slot for a new section."""
+    edits = [
+        {"name": "remove_slot_tool", "id": f"rm-{i}",
+         "args": {"section_code": slot["section_code"], "day": slot["day"], "period": slot["period"]}},
+        {"name": "add_slot", "id": f"add-{i}",
+         "args": {"section_code": f"N{i}", "day": "Sun", "period": 1, "subject_id": "1",
+                  "teacher_id": f"T{i}", "room_id": f"R{i}"}},
+    ]
+    reads = [
+        {"name": "list_slots", "id": f"ls-{i}", "args": {"section_code": f"N{i}"}},
+        {"name": "validate_routine_tool", "id": f"val-{i}", "args": {}},
+    ]
+    responses = [
+        AIMessage(content="", tool_calls=edits),
+        AIMessage(content="", tool_calls=reads),
+        AIMessage(content=f"Session {i} done."),
+    ]
+    return ScriptedChatModel(responses=responses, latency=latency)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=16)
+    parser.add_argument("--sections", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per scripted model call.")
+    args = parser.parse_args()
+
+    rules = RoutineRules()
+    context = make_context(args.sections, rules)
+    df = make_routine(args.sections, rules, conflict_rate=0.0, invalid_rate=0.0)
+    base = RoutineStore(df)
+    slots = [base.to_dataframe().iloc[i * 7].to_dict() for i in range(args.sessions)]
+    for slot in slots:
+        slot["period"] = int(slot["period"])
+
+    def session(i: int) -> AgentSession:
+        return AgentSession(context, llm=_script(i, slots[i], args.latency), base=base)
+
+    sessions = [session(i) for i in range(args.sessions)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        list(pool.map(lambda s: s.run("Edit."), sessions))
+    threaded = time.perf_counter() - start
+    for s in sessions:
+        s.close()
+
+    async def run_all() -> list:
+        return await asyncio.gather(*(s.arun("Edit.") for s in sessions))
+
+    sessions = [session(i) for i in range(args.sessions)]
+    start = time.perf_counter()
+    asyncio.run(run_all())
+    gathered = time.perf_counter() - start
+    for s in sessions:
+        s.close()
+
+    sequential = 3 * args.latency * args.sessions
+    print(f"{args.sessions} sessions over {len(base)} slots; sequential model time {sequential:.2f} s")
+    print(f"{'mode':<9} {'seconds':>8}")
+    print(f"{'threads':<9} {threaded:8.2f}")
+    print(f"{'asyncio':<9} {gathered:8.2f}")
+
+    def footprint(make) -> float:
+        tracemalloc.start()
+        kept = [make(i) for i in range(args.sessions)]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        for s in kept:
+            s.close()
+        return size / 2 ** 20
+
+    forked = footprint(lambda i: session(i))
+    copied = footprint(lambda i: AgentSession(context, llm=_script(i, slots[i], 0), base=RoutineStore(df)))
+    print(f"memory for {args.sessions} sessions: forks {forked:.1f} MiB, full copies {copied:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""bench_store.py – compare the CSV/pandas routine path with the SQLite backend.
+
+Usage: python -m benchmarks.bench_store [--slots 10000 100000 1000000]
+
+For each size it times: loading the routine into a DataFrame (SQLite:
+opening the database plus to_dataframe()), a full conflict check, one
+teacher-cell lookup and one edit made durable (pandas: upsert_slot +
+save_routine; SQLite: a committed upsert).
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from routine_agent.config import RoutineRules
+from routine_agent.routine_store import load_routine, save_routine, upsert_slot
+from routine_agent.sqlite_store import SqliteRoutineStore
+from routine_agent.validator import validate_routine
+
+from .synthetic import make_routine
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--slots", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    rules = RoutineRules()
+    per_section = len(rules.days) * len(rules.periods)
+    print(
+        f"{'slots':>9} {'backend':>7} {'load':>8} {'validate':>9} {'lookup':>9} "
+        f"{'edit+save':>10} {'errors':>7}"
+    )
+    for n_slots in args.slots:
+        df = make_routine(max(1, n_slots // per_section), rules, seed=n_slots)
+        probe = df.iloc[len(df) // 2]
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, "routine_table.csv")
+            db_path = os.path.join(tmp, "routine.db")
+            save_routine(df, csv_path)
+            SqliteRoutineStore.from_dataframe(df, db_path).close()
+
+            t_load, loaded = _timed(lambda: load_routine(csv_path))
+            t_val, errors = _timed(lambda: validate_routine(loaded, rules))
+            t_look, _ = _timed(
+                lambda: loaded.loc[
+                    (loaded["day"] == probe["day"])
+                    & (loaded["period"] == probe["period"])
+                    & (loaded["teacher_id"] == str(probe["teacher_id"]))
+                ]
+            )
+
+            def pandas_edit():
+                edited = upsert_slot(
+                    loaded, probe["section_code"], probe["day"], probe["period"], "1", "1", "1", "1"
+                )
+                save_routine(edited, csv_path)
+
+            t_edit, _ = _timed(pandas_edit)
+            print(
+                f"{len(df):>9} {'csv':>7} {t_load:8.3f} {t_val:9.3f} {t_look:9.5f} "
+                f"{t_edit:10.3f} {len(errors):>7}"
+            )
+
+            def sqlite_load():
+                store = SqliteRoutineStore(db_path)
+                store.to_dataframe()
+                return store
+
+            t_load, store = _timed(sqlite_load)
+            t_val, errors = _timed(lambda: store.validate(rules))
+            t_look, _ = _timed(
+                lambda: store.teacher_slots(probe["day"], probe["period"], probe["teacher_id"])
+            )
+            t_edit, _ = _timed(
+                lambda: store.upsert_slot(
+                    probe["section_code"], probe["day"], probe["period"], 1, 1, 1, 1
+                )
+            )
+            store.close()
+            print(
+                f"{len(df):>9} {'sqlite':>7} {t_load:8.3f} {t_val:9.3f} {t_look:9.5f} "
+                f"{t_edit:10.3f} {len(errors):>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""bench_timing.py – shift log parsing and date → shift lookups: row-wise versus ShiftTimetable.
+
+Usage: python -m benchmarks.bench_timing [--logs 100 10000] [--lookups 20000]
+(logs are consecutive 30-day shift log ranges spread over 10 shifts).
+"""
+import argparse
+import datetime as dt
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from routine_agent.timing import ShiftTimetable, clock_minutes
+
+
+def _make_logs(n: int, shifts: int = 10) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    per_shift = -(-n // shifts)
+    shift = np.repeat(np.arange(1, shifts + 1), per_shift)[:n]
+    step = np.tile(np.arange(per_shift), shifts)[:n]
+    start = pd.Timestamp("2000-01-01") + pd.to_timedelta(step * 30, unit="D")
+    hours = rng.integers(7, 11, n)
+    return pd.DataFrame({
+        "id": np.arange(1, n + 1),
+        "shifts_id": shift,
+        "weekends": [["Fri", "Sat"]] * n,
+        "start": [f"{h:02d}:00:00" for h in hours],
+        "end": [f"{h + 5:02d}:30:00" for h in hours],
+        "applicable_from": start,
+        "applicable_to": start + pd.Timedelta(days=29),
+    })
+
+
+def _time_convert(t: str) -> float:
+    # the old main.py parser, applied row by row
+    t = t.split(":")
+    return float(t[0]) + (float(t[1]) + (float(t[2]) / 60)) / 60
+
+
+def _scan_resolve(logs: pd.DataFrame, shift: int, on: pd.Timestamp):
+    hit = logs[(logs["shifts_id"] == shift) & (logs["applicable_from"] <= on) & (logs["applicable_to"] >= on)]
+    return None if hit.empty else hit.index[-1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logs", type=int, nargs="+", default=[100, 10000])
+    parser.add_argument("--lookups", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'logs':>7} {'step':<14} {'row-wise ms':>12} {'vectorised ms':>14} {'speedup':>8}")
+    for n in args.logs:
+        logs = _make_logs(n)
+        start = time.perf_counter()
+        logs.apply(lambda r: _time_convert(r["end"]) - _time_convert(r["start"]), axis=1)
+        rowwise = time.perf_counter() - start
+        start = time.perf_counter()
+        (clock_minutes(logs["end"]) - clock_minutes(logs["start"])) / 60
+        vectorised = time.perf_counter() - start
+        print(f"{n:>7} {'duration':<14} {rowwise * 1e3:12.2f} {vectorised * 1e3:14.2f} {rowwise / vectorised:7.0f}x")
+
+        start = time.perf_counter()
+        table = ShiftTimetable(logs)
+        build = time.perf_counter() - start
+
+        rng = random.Random(0)
+        last = logs["applicable_to"].max().date()
+        span = (last - dt.date(2000, 1, 1)).days
+        queries = [(rng.randint(1, 10), dt.date(2000, 1, 1) + dt.timedelta(days=rng.randrange(span)))
+                   for _ in range(args.lookups)]
+        few = queries[: max(20, args.lookups // 100)]
+        start = time.perf_counter()
+        for shift, on in few:
+            _scan_resolve(logs, shift, pd.Timestamp(on))
+        scan = (time.perf_counter() - start) / len(few)
+        start = time.perf_counter()
+        for shift, on in queries:
+            table.resolve(shift, on)
+        bisected = (time.perf_counter() - start) / len(queries)
+        print(f"{n:>7} {'resolve (us)':<14} {scan * 1e6:12.1f} {bisected * 1e6:14.2f} {scan / bisected:7.0f}x")
+        print(f"{n:>7} {'(build ms)':<14} {'':>12} {build * 1e3:14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""bench_validator.py – compare the vectorised validator with the groupby/iterrows original.
+
+Usage: python -m benchmarks.bench_validator [--sizes 100 1000 10000]
+(sizes are section counts; each section has days × periods rows).
+tests/test_validator.py checks that both return the same messages.
+"""
+import argparse
+import time
+from typing import List
+
+import pandas as pd
+
+from routine_agent.config import RoutineRules
+from routine_agent.validator import validate_routine
+
+from .synthetic import make_routine
+
+
+# ---------------------------------------------------------------------------
+# Original implementation, kept verbatim as the baseline
+# ---------------------------------------------------------------------------
+
+
+def legacy_validate_routine(df: pd.DataFrame, rules: RoutineRules | None = None) -> List[str]:
+    if rules is None:
+        rules = RoutineRules()
+    errors: List[str] = []
+    errors.extend(_legacy_teacher_conflicts(df))
+    errors.extend(_legacy_room_conflicts(df))
+    errors.extend(_legacy_bounds_check(df, rules))
+    return errors
+
+
+def _legacy_teacher_conflicts(df: pd.DataFrame) -> List[str]:
+    errors: List[str] = []
+    if df.empty or "teacher_id" not in df.columns:
+        return errors
+    grp = df.groupby(["day", "period", "teacher_id"])
+    for (day, period, teacher_id), group in grp:
+        if len(group) > 1:
+            sections = group["section_code"].tolist()
+            errors.append(
+                f"Teacher conflict: teacher {teacher_id} assigned to multiple sections "
+                f"{sections} on {day} period {period}."
+            )
+    return errors
+
+
+def _legacy_room_conflicts(df: pd.DataFrame) -> List[str]:
+    errors: List[str] = []
+    if df.empty or "room_id" not in df.columns:
+        return errors
+    grp = df.groupby(["day", "period", "room_id"])
+    for (day, period, room_id), group in grp:
+        if len(group) > 1:
+            sections = group["section_code"].tolist()
+            errors.append(
+                f"Room conflict: room {room_id} used by multiple sections "
+                f"{sections} on {day} period {period}."
+            )
+    return errors
+
+
+def _legacy_bounds_check(df: pd.DataFrame, rules: RoutineRules) -> List[str]:
+    errors: List[str] = []
+    for _, row in df.iterrows():
+        if row["day"] not in rules.days:
+            errors.append(
+                f"Invalid day '{row['day']}' for section {row['section_code']}. "
+                f"Allowed: {rules.days}."
+            )
+        if int(row["period"]) not in rules.periods:
+            errors.append(
+                f"Invalid period {row['period']} for section {row['section_code']}. "
+                f"Allowed: {rules.periods}."
+            )
+    return errors
+
+
+# ---------------------------------------------------------------------------
+
+
+def _time(fn, *args) -> tuple[float, list]:
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000, 10000])
+    parser.add_argument("--skip-legacy-above", type=int, default=10000,
+                        help="Only time the new validator for larger section counts.")
+    args = parser.parse_args()
+
+    rules = RoutineRules()
+    print(f"{'sections':>9} {'rows':>9} {'errors':>7} {'legacy s':>9} {'new s':>8} {'rows/s new':>12} {'speedup':>8}")
+    for n_sections in args.sizes:
+        df = make_routine(n_sections, rules)
+        new_s, new = _time(validate_routine, df, rules)
+        if n_sections <= args.skip_legacy_above:
+            old_s, _ = _time(legacy_validate_routine, df, rules)
+            old_col, speedup = f"{old_s:9.3f}", f"{old_s / new_s:7.1f}x"
+        else:
+            old_col, speedup = f"{'-':>9}", f"{'-':>8}"
+        print(f"{n_sections:>9} {len(df):>9} {len(new):>7} {old_col} {new_s:8.3f} {len(df) / new_s:12,.0f} {speedup}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""fake_llm.py – scripted chat model for running the agent loop offline."""
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Iterator, List
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Return the scripted AIMessages in order, one per model call.
+
+    ``latency`` seconds are spent before the first token and ``token_delay``
+    between streamed words, to imitate a remote model.  bind_tools() is a
+    no-op, so the scripted tool calls go straight to the agent's tool map.
+    """
+
+    responses: List[AIMessage]
+    latency: float = 0.0
+    token_delay: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ScriptedChatModel":
+        return self
+
+    def _next(self) -> AIMessage:
+        message = self.responses[min(self.calls, len(self.responses) - 1)]
+        self.calls += 1
+        return message
+
+    def _chunks(self, message: AIMessage) -> List[AIMessageChunk]:
+        words = message.content.split(" ") if message.content else []
+        chunks = [
+            AIMessageChunk(content=w if i == len(words) - 1 else w + " ")
+            for i, w in enumerate(words)
+        ]
+        if message.tool_calls:
+            chunks.append(
+                AIMessageChunk(
+                    content="",
+                    tool_call_chunks=[
+                        {"name": tc["name"], "args": json.dumps(tc["args"]), "id": tc["id"], "index": i}
+                        for i, tc in enumerate(message.tool_calls)
+                    ],
+                )
+            )
+        return chunks
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message = self._next()
+        time.sleep(self.latency + self.token_delay * len(self._chunks(message)))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        for chunk in self._chunks(self._next()):
+            time.sleep(self.token_delay)
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _astream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        for chunk in self._chunks(self._next()):
+            await asyncio.sleep(self.token_delay)
+            yield ChatGenerationChunk(message=chunk)
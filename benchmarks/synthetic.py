@@ -0,0 +1,132 @@
+"""synthetic.py – generate synthetic routines of arbitrary size for benchmarks."""
+import numpy as np
+import pandas as pd
+
+from routine_agent.config import RoutineRules
+from routine_agent.routine_store import ROUTINE_COLUMNS
+
+
+def make_routine(
+    n_sections: int,
+    rules: RoutineRules | None = None,
+    conflict_rate: float = 0.01,
+    invalid_rate: float = 0.001,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """Return a full weekly routine for n_sections sections.
+
+    Each section gets its own teacher per period and its own room, then a
+    ``conflict_rate`` fraction of slots is reassigned to a random teacher
+    and room (creating clashes) and an ``invalid_rate`` fraction gets an
+    out-of-bounds day or period.
+    """
+    if rules is None:
+        rules = RoutineRules()
+    rng = np.random.default_rng(seed)
+    n_days, n_periods = len(rules.days), len(rules.periods)
+    per_section = n_days * n_periods
+    n = n_sections * per_section
+
+    section = np.repeat(np.arange(n_sections), per_section)
+    cell = np.tile(np.arange(per_section), n_sections)
+    day = np.asarray(rules.days, dtype=object)[cell // n_periods]
+    period = np.asarray(rules.periods)[cell % n_periods]
+    teacher = section * n_periods + cell % n_periods
+    room = section.copy()
+
+    clash = rng.random(n) < conflict_rate
+    teacher[clash] = rng.integers(0, teacher.max() + 1, clash.sum())
+    room[clash] = rng.integers(0, n_sections, clash.sum())
+
+    bad = np.flatnonzero(rng.random(n) < invalid_rate)
+    day[bad[::2]] = "Fri"
+    period[bad[1::2]] = len(rules.periods) + 1
+
+    df = pd.DataFrame(
+        {
+            "section_code": np.char.add("S", section.astype(str)),
+            "day": day,
+            "period": period,
+            "subject_id": (cell % n_periods + 1).astype(str),
+            "teacher_id": (teacher + 1).astype(str),
+            "room_id": (room + 1).astype(str),
+            "shift_log_id": "1",
+        }
+    )
+    return df[ROUTINE_COLUMNS]
+
+
+_GROUPS = {
+    "hsc-sci": [1, 2, 3, 4, 5, 6],
+    "hsc-commerces": [1, 2, 3, 4, 5, 7],
+    "hsc-arts": [1, 2, 3, 4, 5, 8],
+}
+_DEPARTMENTS = ["Bangla", "Bangla", "English", "English", "Math", "Math", "Accounting", "Geography"]
+
+
+def make_context(
+    n_sections: int,
+    rules: RoutineRules | None = None,
+    utilisation: float = 0.8,
+    campuses: int = 1,
+) -> dict:
+    """Return load_context()-shaped reference data for n_sections sections.
+
+    Subjects and groups mirror csv_files/; each department gets enough
+    teachers to run at roughly ``utilisation`` of a full week.  With
+    ``campuses`` > 1 the sections are split into that many blocks, each
+    with its own ``shifts_id`` and its own teachers.
+    """
+    if rules is None:
+        rules = RoutineRules()
+    cells = len(rules.days) * len(rules.periods)
+    grp_codes = list(_GROUPS)
+    section_grp = [grp_codes[i % len(grp_codes)] for i in range(n_sections)]
+    section_campus = [i * campuses // n_sections + 1 for i in range(n_sections)]
+
+    teachers = []
+    for campus in range(1, campuses + 1):
+        demand: dict = {}
+        for grp, c in zip(section_grp, section_campus):
+            if c != campus:
+                continue
+            subjects = _GROUPS[grp]
+            per_subject = cells / len(subjects)
+            for subj in subjects:
+                dept = _DEPARTMENTS[subj - 1]
+                demand[dept] = demand.get(dept, 0) + per_subject
+        for dept, periods in demand.items():
+            for _ in range(int(np.ceil(periods / (cells * utilisation)))):
+                tid = len(teachers) + 1
+                teachers.append(
+                    {"id": tid, "name": f"T{tid}", "code": f"T{tid:05d}", "department": dept, "shifts_id": campus}
+                )
+
+    return {
+        "sections": pd.DataFrame(
+            {
+                "id": range(1, n_sections + 1),
+                "code": [f"S{i}" for i in range(n_sections)],
+                "grp_code": section_grp,
+                "shifts_id": section_campus,
+            }
+        ),
+        "subject_groups": pd.DataFrame(
+            {"id": range(1, 4), "grp_code": grp_codes, "has_subjects": [str(v) for v in _GROUPS.values()]}
+        ),
+        "subjects": pd.DataFrame(
+            {
+                "id": range(1, len(_DEPARTMENTS) + 1),
+                "name": [f"Subject {i}" for i in range(1, len(_DEPARTMENTS) + 1)],
+                "department": _DEPARTMENTS,
+            }
+        ),
+        "teachers": pd.DataFrame(teachers),
+        "rooms": pd.DataFrame({"id": range(1, n_sections + 1), "room_no": range(101, n_sections + 101)}),
+        "shift_logs": pd.DataFrame(
+            {"id": list(range(1, campuses + 1)), "shifts_id": list(range(1, campuses + 1)),
+             "weekends": ['["Fri","Sat"]'] * campuses, "start": ["08:00:00"] * campuses,
+             "end": ["13:00:00"] * campuses, "applicable_from": ["2026-01-01"] * campuses,
+             "applicable_to": [None] * campuses}
+        ),
+    }
@@ -1,21 +1,24 @@
-import pandas as pd
-import ast
+from routine_agent.data_context import load_context
+
+# All tables come from the shared, cached loader (typed IDs, parsed JSON columns)
+ctx = load_context()
+
 # from classes.csv
-class_dt = pd.read_csv("csv_files/classes.csv")
+class_dt = ctx["classes"]
 class_dt = class_dt[["id", "name", "code"]]
 
 # final Data: class_dt.
 
 
 #from scetions.csv
-section_dt = pd.read_csv("csv_files/sections.csv")
+section_dt = ctx["sections"]
 section_dt = section_dt[["id","classes_id" ,"name", "code", "grp_code"]]
 
 # Final data section_dtc
 
 # From classroom.csv
-class_room_dt = pd.read_csv("csv_files/class_rooms.csv")
-class_room_dt = class_room_dt[["id", "room_no","number_of_row","number_of_column", "each_brench_capacity"]]
+class_room_dt = ctx["rooms"]
+class_room_dt = class_room_dt[["id", "room_no","number_of_row","number_of_column", "each_brench_capacity"]].copy()
 class_room_dt["total_capacity"] = class_room_dt["number_of_row"] * class_room_dt["number_of_column"] * class_room_dt["each_brench_capacity"]
 class_room_dt = class_room_dt.sort_values("room_no")
 
@@ -23,28 +26,27 @@ class_room_dt = class_room_dt.sort_values("room_no")
 
 
 #from shifts_management_logs.csv
-shift_dt = pd.read_csv("csv_files/shift_management_logs.csv")
-shift_dt = shift_dt[["id","weekends", "start", "end"]]
+shift_dt = ctx["shift_logs"]
+shift_dt = shift_dt[["id","weekends", "start", "end"]].copy()
 
 # Final shift_dt
 
 
 # from subjects.csv
-sub_dt = pd.read_csv("csv_files/subjects.csv")
+sub_dt = ctx["subjects"]
 sub_dt = sub_dt[["id", "name", "code", "department"]]
 # Final sub_dt
 
 
-# from subject_groups.csv
-sub_grp_dt = pd.read_csv("csv_files/subject_groups.csv")
+# from subject_groups.csv (has_subjects is already parsed into lists)
+sub_grp_dt = ctx["subject_groups"]
 sub_grp_dt = sub_grp_dt[["id", "name", "grp_code", "has_subjects"]]
 sub_grp_dt = sub_grp_dt.rename(columns={"id":"grp_id"})
-sub_grp_dt["has_subjects"] = sub_grp_dt["has_subjects"].apply(ast.literal_eval)
 # Final sub_grp_dt
 
 
 # From teachers.csv
-teacher_dt = pd.read_csv("csv_files/teachers.csv")
+teacher_dt = ctx["teachers"]
 teacher_dt = teacher_dt[["id","name","code", "department", "designation"]]
 
 # Final teacher_dt
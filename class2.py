@@ -1,16 +1,19 @@
-from main import teacher_dt, sec_sub_dt, sub_dt
+from class1 import ctx
+from main import sec_sub_dt
+from routine_agent.eligibility import EligibilityIndex
+
+# Subject → department → teacher maps, joined once
+eligibility = EligibilityIndex(ctx)
 
 
 def find_eligible(subject_ids):
-    dept_list = sub_dt[sub_dt["id"].isin(subject_ids)]["department"].unique()
-    eligible = teacher_dt[teacher_dt["department"].isin(dept_list)]
-    return list(eligible[["code"]])
+    ids = eligibility.teachers_for_subjects(subject_ids)
+    return [eligibility.teacher_code[t] for t in ids]
 
 
 sec_teacher_dt = sec_sub_dt[["code", "grp_code"]].copy()
-sec_teacher_dt["teachers"] = sec_sub_dt["has_subjects"].apply(find_eligible)
+sec_teacher_dt["teachers"] = sec_sub_dt["has_subjects"].map(find_eligible)
 
 
 if __name__ == "__main__":
     print(sec_teacher_dt)
-
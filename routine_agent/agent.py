@@ -1,31 +1,108 @@
 """agent.py – LangChain tool-calling agent wired to the Groq model openai/gpt-oss-120b."""
+import asyncio
 import json
 import os
-from typing import Any
+import time
+import weakref
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, List, Literal
 
 import pandas as pd
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage, message_chunk_to_message
 from langchain_core.tools import tool
-from langchain_groq import ChatGroq
+from pydantic import BaseModel
 
 from .config import RoutineRules
-from .routine_store import (
-    load_routine,
-    move_slot,
-    remove_slot,
-    save_routine,
-    swap_slots,
-    upsert_slot,
-)
-from .validator import validate_routine
+from .data_context import compact_context, load_context, section_context
+from .eligibility import EligibilityIndex
+from .generator import generate_routine
+from .history import HistoryManager
+from .llm_cache import CachingChatModel, ResponseCache, SessionRecorder
+from .incremental_validator import IncrementalValidator
+from .metrics import METRICS, model_usage
+from .occupancy import OccupancyIndex
+from .routine_store import ROUTINE_COLUMNS, BaseRoutineStore, SlotJournal, open_store
 from .markdown_renderer import render_markdown
 
 _ROUTINE_PATH = os.path.join(
     os.path.dirname(__file__), "..", "output", "routine_table.csv"
 )
 
-# Module-level mutable state shared by tools within a single agent run
-_state: dict[str, Any] = {"df": None, "rules": None}
+
+
+class RoutineContext:
+    """The routine store and derived indexes the tools of one session work on.
+
+    Tools find the context of the session that is running them through a
+    context variable (see bound()), so sessions in different threads or
+    asyncio tasks never see each other's routine.
+    """
+
+    def __init__(
+        self,
+        store: BaseRoutineStore,
+        context: dict,
+        rules: RoutineRules | None = None,
+    ) -> None:
+        self.store = store
+        self.context = context
+        self.rules = rules or RoutineRules()
+        self.validator = IncrementalValidator(store, self.rules)
+        self.occupancy = OccupancyIndex.from_store(store, self.rules, context)
+        self.eligibility = EligibilityIndex(context, self.rules)
+        self._locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        """Held while tools touch the store: mutating tools one at a time,
+        read-only tools as one concurrent group.
+
+        An asyncio.Lock belongs to one event loop, and a session may be run
+        by several asyncio.run() calls, so each running loop gets its own.
+        """
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = self._locks[loop] = asyncio.Lock()
+        return lock
+
+    def close(self) -> None:
+        """Detach the validator and occupancy index from the store."""
+        self.validator.close()
+        self.occupancy.close()
+
+    @contextmanager
+    def bound(self) -> Iterator["RoutineContext"]:
+        """Run the block's tool calls against this context."""
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+
+_current: ContextVar[RoutineContext | None] = ContextVar("routine_context", default=None)
+
+
+def _ctx() -> RoutineContext:
+    ctx = _current.get()
+    if ctx is None:
+        raise RuntimeError("Routine tools must run inside an AgentSession.")
+    return ctx
+
+
+def _conflict_delta(message: str) -> str:
+    """Append conflicts introduced or resolved by the last mutation."""
+    new, resolved = _ctx().validator.drain()
+    lines = [message]
+    lines += [f"New: {m}" for m in new]
+    lines += [f"Resolved: {m}" for m in resolved]
+    return "\n".join(lines)
 
 
 # ---------------------------------------------------------------------------
@@ -54,10 +131,8 @@ def add_slot(
         room_id: Room ID from class_rooms.csv.
         shift_log_id: Optional shift management log ID.
     """
-    df = _state["df"]
-    df = upsert_slot(df, section_code, day, int(period), subject_id, teacher_id, room_id, shift_log_id)
-    _state["df"] = df
-    return f"Slot added/updated: {section_code} {day} P{period}."
+    _ctx().store.upsert_slot(section_code, day, int(period), subject_id, teacher_id, room_id, shift_log_id)
+    return _conflict_delta(f"Slot added/updated: {section_code} {day} P{period}.")
 
 
 @tool
@@ -69,8 +144,9 @@ def remove_slot_tool(section_code: str, day: str, period: int) -> str:
         day: Day abbreviation.
         period: Period number (1-6).
     """
-    _state["df"] = remove_slot(_state["df"], section_code, day, int(period))
-    return f"Slot removed: {section_code} {day} P{period}."
+    if not _ctx().store.remove_slot(section_code, day, int(period)):
+        return f"No slot found at {section_code} {day} P{period}."
+    return _conflict_delta(f"Slot removed: {section_code} {day} P{period}.")
 
 
 @tool
@@ -90,8 +166,9 @@ def move_slot_tool(
         to_day: Destination day.
         to_period: Destination period.
     """
-    _state["df"] = move_slot(_state["df"], section_code, from_day, int(from_period), to_day, int(to_period))
-    return f"Slot moved: {section_code} {from_day} P{from_period} → {to_day} P{to_period}."
+    if not _ctx().store.move_slot(section_code, from_day, int(from_period), to_day, int(to_period)):
+        return f"No slot found at {section_code} {from_day} P{from_period}."
+    return _conflict_delta(f"Slot moved: {section_code} {from_day} P{from_period} → {to_day} P{to_period}.")
 
 
 @tool
@@ -113,12 +190,107 @@ def swap_slots_tool(
         day_b: Second slot day.
         period_b: Second slot period.
     """
-    _state["df"] = swap_slots(
-        _state["df"],
+    swapped = _ctx().store.swap_slots(
         section_code_a, day_a, int(period_a),
         section_code_b, day_b, int(period_b),
     )
-    return f"Slots swapped: ({section_code_a},{day_a},P{period_a}) ↔ ({section_code_b},{day_b},P{period_b})."
+    if not swapped:
+        return "Both slots must exist to swap them."
+    return _conflict_delta(
+        f"Slots swapped: ({section_code_a},{day_a},P{period_a}) ↔ ({section_code_b},{day_b},P{period_b})."
+    )
+
+
+class SlotOperation(BaseModel):
+    """One edit inside apply_slot_batch.
+
+    add: section_code/day/period plus subject_id, teacher_id, room_id (shift_log_id optional).
+    remove: section_code/day/period.
+    move: section_code/day/period to to_day/to_period.
+    swap: section_code/day/period with to_section_code/to_day/to_period.
+    """
+
+    op: Literal["add", "remove", "move", "swap"]
+    section_code: str
+    day: str
+    period: int
+    subject_id: str = ""
+    teacher_id: str = ""
+    room_id: str = ""
+    shift_log_id: str = ""
+    to_section_code: str = ""
+    to_day: str = ""
+    to_period: int = 0
+
+
+def _apply_operation(op: SlotOperation) -> None:
+    """Apply one SlotOperation to the store, raising ValueError if it cannot apply."""
+    ctx = _ctx()
+    rules, store = ctx.rules, ctx.store
+    positions = [(op.day, op.period)]
+    if op.op in ("move", "swap"):
+        positions.append((op.to_day, op.to_period))
+    for day, period in positions:
+        if day not in rules.days or period not in rules.periods:
+            raise ValueError(f"{day} P{period} is outside the routine grid.")
+
+    if op.op == "add":
+        store.upsert_slot(
+            op.section_code, op.day, op.period,
+            op.subject_id, op.teacher_id, op.room_id, op.shift_log_id,
+        )
+    elif op.op == "remove":
+        if not store.remove_slot(op.section_code, op.day, op.period):
+            raise ValueError(f"No slot at {op.section_code} {op.day} P{op.period}.")
+    elif op.op == "move":
+        if not store.move_slot(op.section_code, op.day, op.period, op.to_day, op.to_period):
+            raise ValueError(f"No slot at {op.section_code} {op.day} P{op.period}.")
+    else:
+        other = op.to_section_code or op.section_code
+        if not store.swap_slots(op.section_code, op.day, op.period, other, op.to_day, op.to_period):
+            raise ValueError("Both slots must exist to swap them.")
+
+
+@tool
+def apply_slot_batch(operations: List[SlotOperation]) -> str:
+    """Apply many add/remove/move/swap edits as one all-or-nothing transaction.
+
+    Prefer this over repeated add_slot/move_slot_tool calls. The routine is
+    validated once at the end; if any operation fails or the batch would
+    introduce a teacher/room conflict, every operation is rolled back.
+
+    Args:
+        operations: Ordered list of slot operations.
+    """
+    ctx = _ctx()
+    store, validator = ctx.store, ctx.validator
+    validator.drain()
+    store.begin()
+    try:
+        for i, op in enumerate(operations, 1):
+            try:
+                _apply_operation(op)
+            except Exception as exc:
+                store.rollback()
+                validator.drain()
+                return f"Batch rolled back: operation {i} ({op.op}) failed: {exc}"
+        new, resolved = validator.drain()
+    except BaseException:
+        # a failing rollback or validator must not leave the transaction open
+        if store.in_transaction:
+            store.rollback()
+        raise
+    if new:
+        store.rollback()
+        validator.drain()
+        return "Batch rolled back: it would introduce conflicts:\n" + "\n".join(new)
+    store.commit()
+
+    counts = Counter(op.op for op in operations)
+    summary = ", ".join(f"{n} {kind}" for kind, n in counts.items())
+    lines = [f"Batch applied: {len(operations)} operations ({summary}); routine has {len(store)} slots."]
+    lines += [f"Resolved: {m}" for m in resolved]
+    return "\n".join(lines)
 
 
 @tool
@@ -128,18 +300,120 @@ def list_slots(section_code: str = "") -> str:
     Args:
         section_code: Optional section code filter; empty string returns all slots.
     """
-    df = _state["df"]
-    if df.empty:
+    store = _ctx().store
+    if not len(store):
         return "Routine is currently empty."
     if section_code:
-        df = df[df["section_code"] == section_code]
+        df = pd.DataFrame(store.section_slots(section_code), columns=ROUTINE_COLUMNS)
+    else:
+        df = store.to_dataframe()
     return df.to_string(index=False)
 
 
+@tool
+def generate_routine_tool(section_codes: str = "", seed: int = 0) -> str:
+    """Fill complete weekly routines for sections with the local constraint solver.
+
+    Use this instead of many add_slot calls when whole sections need a
+    timetable. Existing slots of the chosen sections are replaced; slots of
+    other sections are kept and their teachers/rooms are respected.
+
+    Args:
+        section_codes: Comma-separated section codes, e.g. '11A,11B'; empty string means all sections.
+        seed: Seed for the search order (same seed gives the same routine).
+    """
+    ctx = _ctx()
+    store = ctx.store
+    codes = [c.strip() for c in section_codes.split(",") if c.strip()] or None
+    df = generate_routine(ctx.context, ctx.rules, codes, fixed=store, seed=int(seed))
+    with store.transaction():
+        for code in df["section_code"].unique():
+            for slot in store.section_slots(code):
+                store.remove_slot(slot["section_code"], slot["day"], slot["period"])
+        for row in df.itertuples(index=False):
+            store.upsert_slot(*row)
+    sections = ", ".join(df["section_code"].unique())
+    return _conflict_delta(f"Generated {len(df)} slots for sections: {sections}.")
+
+
+@tool
+def lookup_section(section_code: str) -> str:
+    """Look up one section's group, subjects and the teachers eligible for each subject.
+
+    Args:
+        section_code: Section code, e.g. '11A'.
+    """
+    return section_context(_ctx().context, section_code)
+
+
+@tool
+def find_free_options(
+    section_code: str,
+    day: str = "",
+    period: int = 0,
+    subject_id: str = "",
+    teacher_id: str = "",
+    room_id: str = "",
+) -> str:
+    """Find valid choices before scheduling instead of guessing and validating.
+
+    With day and period: whether the section is free there, plus the rooms
+    and the eligible teachers free at that cell. Teachers must work the
+    section's shift and teach one of its subjects (subject_id, when given).
+    Without them: the cells where the section and the given teacher_id and
+    room_id are all free.
+
+    Args:
+        section_code: Section code, e.g. '11A'.
+        day: Optional day abbreviation, e.g. 'Sun'.
+        period: Optional period number (1-6); 0 means any.
+        subject_id: Optional subject ID; limits teachers to those eligible for it.
+        teacher_id: Optional teacher that must be free (cell search only).
+        room_id: Optional room that must be free (cell search only).
+    """
+    ctx = _ctx()
+    occ = ctx.occupancy
+    if not day or not int(period):
+        cells = occ.free_cells(teacher_id, room_id, section_code)
+        if not cells:
+            return "No cell is free for all of them."
+        by_day: dict = {}
+        for d, p in cells:
+            by_day.setdefault(d, []).append(str(p))
+        return "Free cells: " + "; ".join(f"{d} P{','.join(ps)}" for d, ps in by_day.items())
+
+    try:
+        section_free = occ.is_free("section", section_code, day, int(period))
+    except ValueError as exc:
+        return str(exc)
+    department = None
+    if subject_id:
+        subjects = ctx.context["subjects"]
+        match = subjects[subjects["id"].astype(str) == str(subject_id)]
+        if match.empty:
+            return f"Unknown subject {subject_id}."
+        department = match.iloc[0]["department"]
+    teachers = occ.free("teacher", day, int(period), department)
+    eligibility = ctx.eligibility
+    if str(section_code) in eligibility.section_subjects:
+        allowed = set(
+            eligibility.eligible(section_code, subject_id) if subject_id
+            else eligibility.section_teachers(section_code)
+        )
+        teachers = [t for t in teachers if t in allowed]
+    rooms = occ.free("room", day, int(period))
+    lines = [
+        f"Section {section_code} {day} P{period}: {'free' if section_free else 'already has a slot'}.",
+        f"Free teachers{f' ({department})' if department else ''}: {', '.join(teachers) or 'none'}.",
+        f"Free rooms: {', '.join(rooms) or 'none'}.",
+    ]
+    return "\n".join(lines)
+
+
 @tool
 def validate_routine_tool() -> str:
     """Validate the current routine and return a list of conflicts or 'OK'."""
-    errors = validate_routine(_state["df"], _state["rules"])
+    errors = _ctx().validator.errors()
     if errors:
         return "\n".join(errors)
     return "Routine is valid (no conflicts)."
@@ -149,7 +423,19 @@ def validate_routine_tool() -> str:
 # Agent runner
 # ---------------------------------------------------------------------------
 
-_TOOLS = [add_slot, remove_slot_tool, move_slot_tool, swap_slots_tool, list_slots, validate_routine_tool]
+_TOOLS = [
+    add_slot,
+    remove_slot_tool,
+    move_slot_tool,
+    swap_slots_tool,
+    apply_slot_batch,
+    list_slots,
+    lookup_section,
+    find_free_options,
+    generate_routine_tool,
+    validate_routine_tool,
+]
+_TOOL_MAP = {t.name: t for t in _TOOLS}
 
 MAX_AGENT_ITERATIONS = 20
 
@@ -160,77 +446,289 @@ Available days: Sun, Mon, Tue, Wed, Thu
 Available periods: 1, 2, 3, 4, 5 (break after period 3), 6
 
 Always validate the routine after making changes.
-When the user asks to schedule classes, use add_slot for each slot.
+When the user asks for complete timetables for whole sections, call generate_routine_tool once.
+When the user asks to schedule or change several classes, send them together in one apply_slot_batch call.
+Before picking a teacher, room or cell, call find_free_options to see which ones are free.
 When finished, call validate_routine_tool to confirm there are no conflicts."""
 
 
-def run_agent(prompt: str, context: dict | None = None) -> str:
+# Tools that only read the routine; consecutive calls to these run concurrently
+READ_ONLY_TOOLS = frozenset({"list_slots", "lookup_section", "find_free_options", "validate_routine_tool"})
+
+
+def _initial_messages(prompt: str, context: dict) -> list:
+    system_content = (
+        f"{_SYSTEM_PROMPT}\n\n## Reference Data\n{compact_context(context)}\n"
+        "Use lookup_section for a section's subjects and eligible teachers."
+    )
+    return [
+        SystemMessage(content=system_content),
+        HumanMessage(content=prompt),
+    ]
+
+
+def _chat_model(
+    llm: BaseChatModel | None = None,
+    cache: ResponseCache | None = None,
+    recorder: SessionRecorder | None = None,
+):
+    """Bind the tools to llm, or to a ChatGroq client when llm is None.
+
+    With a cache or recorder the bound model is wrapped in CachingChatModel.
+    """
+    if llm is None:
+        groq_api_key = os.environ.get("GROQ_API_KEY")
+        if not groq_api_key:
+            raise EnvironmentError("GROQ_API_KEY environment variable is not set.")
+        # Imported here so offline runs with a fake or replay model need no Groq client
+        from langchain_groq import ChatGroq
+
+        llm = ChatGroq(
+            model="openai/gpt-oss-120b",
+            api_key=groq_api_key,
+        )
+    bound = llm.bind_tools(_TOOLS)
+    if cache is None and recorder is None:
+        return bound
+    model_name = getattr(llm, "model_name", None) or llm._llm_type
+    return CachingChatModel(bound, model_name, _TOOLS, cache, recorder)
+
+
+def _tool_message(tc: dict, result: Any) -> ToolMessage:
+    return ToolMessage(content=str(result), tool_call_id=tc["id"], name=tc["name"])
+
+
+def _run_tool(tc: dict) -> ToolMessage:
+    t = _TOOL_MAP.get(tc["name"])
+    if t is None:
+        return _tool_message(tc, f"Unknown tool: {tc['name']}")
+    start = time.perf_counter()
+    error = False
+    try:
+        result = t.invoke(tc["args"])
+    except Exception as exc:
+        result, error = f"Tool error: {exc}", True
+    METRICS.record("tool", tc["name"], time.perf_counter() - start, error=error)
+    return _tool_message(tc, result)
+
+
+async def _arun_tool(tc: dict) -> ToolMessage:
+    t = _TOOL_MAP.get(tc["name"])
+    if t is None:
+        return _tool_message(tc, f"Unknown tool: {tc['name']}")
+    start = time.perf_counter()
+    error = False
+    try:
+        result = await t.ainvoke(tc["args"])
+    except Exception as exc:
+        result, error = f"Tool error: {exc}", True
+    METRICS.record("tool", tc["name"], time.perf_counter() - start, error=error)
+    return _tool_message(tc, result)
+
+
+def _record_model_call(call: str, iteration: int, seconds: float, response) -> None:
+    if METRICS.enabled:
+        METRICS.record(
+            "model", call, seconds, iteration=iteration,
+            tool_calls=len(response.tool_calls), **model_usage(response),
+        )
+
+
+async def _arun_tool_calls(lock: asyncio.Lock, tool_calls: List[dict]) -> List[ToolMessage]:
+    """Run tool calls in order, overlapping runs of consecutive read-only calls."""
+    results: List[ToolMessage] = []
+    reads: List[dict] = []
+
+    async def flush_reads() -> None:
+        if reads:
+            async with lock:
+                results.extend(await asyncio.gather(*(_arun_tool(tc) for tc in reads)))
+            reads.clear()
+
+    for tc in tool_calls:
+        if tc["name"] in READ_ONLY_TOOLS:
+            reads.append(tc)
+            continue
+        await flush_reads()
+        async with lock:
+            results.append(await _arun_tool(tc))
+    await flush_reads()
+    return results
+
+
+class AgentSession:
+    """Routine state, reference data and model client kept warm across prompts.
+
+    Each prompt starts a fresh conversation against the same RoutineStore,
+    so batch and server modes pay for loading and client setup once.  The
+    tools are bound to the session's own RoutineContext, so sessions can run
+    concurrently in threads or asyncio tasks.
+
+    With ``base`` the session edits a copy-on-write fork of that store
+    instead of opening the routine: many sessions can share one loaded
+    routine, each keeping only its own changes.  Forked sessions are not
+    journaled; save to_dataframe() to keep their edits.
+    """
+
+    def __init__(
+        self,
+        context: dict | None = None,
+        backend: str = "csv",
+        llm: BaseChatModel | None = None,
+        history: HistoryManager | None = None,
+        cache: ResponseCache | None = None,
+        recorder: SessionRecorder | None = None,
+        base: BaseRoutineStore | None = None,
+    ) -> None:
+        self.backend = backend
+        self.history = history or HistoryManager()
+        self._llm = _chat_model(llm, cache, recorder)
+        if base is not None:
+            self.store = base.fork()
+        else:
+            self.store = open_store(backend, _ROUTINE_PATH if backend == "csv" else None)
+        self.routine = RoutineContext(self.store, context if context is not None else load_context())
+        # Every store change is appended to output/routine_table.csv.journal, so
+        # an interrupted run is recovered by the next load_routine().  The
+        # SQLite backend commits each change itself.
+        journaled = backend == "csv" and base is None
+        self._journal = SlotJournal(self.store, _ROUTINE_PATH) if journaled else None
+
+    def __enter__(self) -> "AgentSession":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if self.routine is not None:
+            self.routine.close()
+            self.routine = None
+
+    def to_dataframe(self) -> pd.DataFrame:
+        return self.store.to_dataframe()
+
+    def errors(self) -> List[str]:
+        """Current validation errors of the session's routine."""
+        return self.routine.validator.errors()
+
+    def run(self, prompt: str) -> tuple[str, pd.DataFrame]:
+        """Answer one prompt; returns (final_text, routine DataFrame)."""
+        messages = _initial_messages(prompt, self.routine.context)
+        final_text = ""
+        with self.routine.bound():
+            try:
+                # Agentic loop: run until no more tool calls
+                for iteration in range(MAX_AGENT_ITERATIONS):  # max iterations safety guard
+                    start = time.perf_counter()
+                    response = self._llm.invoke(self.history.compact(messages))
+                    _record_model_call("invoke", iteration, time.perf_counter() - start, response)
+                    messages.append(response)
+
+                    if not response.tool_calls:
+                        final_text = response.content
+                        break
+
+                    # Execute tool calls and append results
+                    messages.extend(_run_tool(tc) for tc in response.tool_calls)
+            finally:
+                self.history.end_conversation()
+        return final_text, self.to_dataframe()
+
+    async def arun(
+        self, prompt: str, on_text: Callable[[str], None] | None = None
+    ) -> tuple[str, pd.DataFrame]:
+        """Async run(): streams model output and overlaps read-only tools."""
+        messages = _initial_messages(prompt, self.routine.context)
+        final_text = ""
+        with self.routine.bound():
+            try:
+                for iteration in range(MAX_AGENT_ITERATIONS):
+                    start = time.perf_counter()
+                    response = None
+                    async for chunk in self._llm.astream(self.history.compact(messages)):
+                        if on_text is not None and isinstance(chunk.content, str) and chunk.content:
+                            on_text(chunk.content)
+                        response = chunk if response is None else response + chunk
+                    if response is None:
+                        break
+                    response = message_chunk_to_message(response)
+                    _record_model_call("astream", iteration, time.perf_counter() - start, response)
+                    messages.append(response)
+
+                    if not response.tool_calls:
+                        final_text = response.content
+                        break
+
+                    messages.extend(await _arun_tool_calls(self.routine.lock, response.tool_calls))
+            finally:
+                self.history.end_conversation()
+        return final_text, self.to_dataframe()
+
+
+def run_agent(
+    prompt: str,
+    context: dict | None = None,
+    backend: str = "csv",
+    llm: BaseChatModel | None = None,
+    history: HistoryManager | None = None,
+    cache: ResponseCache | None = None,
+    recorder: SessionRecorder | None = None,
+) -> tuple[str, pd.DataFrame]:
     """Run the LangChain + Groq agent with the given user prompt.
 
-    Modifies the shared _state in-place; caller should save/render afterwards.
+    Mutates the session's RoutineStore; caller should save/render the
+    returned DataFrame afterwards.
 
     Args:
         prompt: Natural-language instruction from the user.
         context: Optional dict of DataFrames from load_context().
+        backend: Routine storage backend, ``csv`` or ``sqlite``.
+        llm: Chat model to use instead of ChatGroq (e.g. a fake model offline).
+        history: Trims old tool output to a token budget before each model call.
+        cache: Reuse model responses for identical requests.
+        recorder: Record every model response for later replay.
 
     Returns:
-        The final assistant response text.
+        The final assistant response text and the edited routine as a
+        DataFrame with ROUTINE_COLUMNS.
     """
-    groq_api_key = os.environ.get("GROQ_API_KEY")
-    if not groq_api_key:
-        raise EnvironmentError("GROQ_API_KEY environment variable is not set.")
-
-    # Initialise shared state
-    _state["df"] = load_routine(_ROUTINE_PATH)
-    _state["rules"] = RoutineRules()
-
-    # Build context summary for the system message
-    ctx_summary = ""
-    if context:
-        for name, df in context.items():
-            if isinstance(df, pd.DataFrame) and not df.empty:
-                ctx_summary += f"\n### {name}\n{df.to_string(index=False)}\n"
-
-    system_content = _SYSTEM_PROMPT
-    if ctx_summary:
-        system_content += f"\n\n## Reference Data\n{ctx_summary}"
-
-    llm = ChatGroq(
-        model="openai/gpt-oss-120b",
-        api_key=groq_api_key,
-    )
-    llm_with_tools = llm.bind_tools(_TOOLS)
+    with AgentSession(context, backend, llm, history, cache, recorder) as session:
+        return session.run(prompt)
+
+
+async def arun_agent(
+    prompt: str,
+    context: dict | None = None,
+    backend: str = "csv",
+    llm: BaseChatModel | None = None,
+    on_text: Callable[[str], None] | None = None,
+    history: HistoryManager | None = None,
+    cache: ResponseCache | None = None,
+    recorder: SessionRecorder | None = None,
+) -> tuple[str, pd.DataFrame]:
+    """Async run_agent: streams model output and overlaps read-only tools.
+
+    Each model turn is consumed with ``astream``; text chunks are passed to
+    on_text as they arrive.  Consecutive read-only tool calls (READ_ONLY_TOOLS)
+    run concurrently, mutating tools run one at a time under the session lock.
 
-    messages = [
-        SystemMessage(content=system_content),
-        HumanMessage(content=prompt),
-    ]
+    Args:
+        prompt: Natural-language instruction from the user.
+        context: Optional dict of DataFrames from load_context().
+        backend: Routine storage backend, ``csv`` or ``sqlite``.
+        llm: Chat model to use instead of ChatGroq (e.g. a fake model offline).
+        on_text: Callback for streamed assistant text.
+        history: Trims old tool output to a token budget before each model call.
+        cache: Reuse model responses for identical requests.
+        recorder: Record every model response for later replay.
 
-    tool_map = {t.name: t for t in _TOOLS}
-
-    # Agentic loop: run until no more tool calls
-    final_text = ""
-    for _ in range(MAX_AGENT_ITERATIONS):  # max iterations safety guard
-        response = llm_with_tools.invoke(messages)
-        messages.append(response)
-
-        if not response.tool_calls:
-            final_text = response.content
-            break
-
-        # Execute tool calls and append results
-        for tc in response.tool_calls:
-            t = tool_map.get(tc["name"])
-            if t is None:
-                result = f"Unknown tool: {tc['name']}"
-            else:
-                try:
-                    result = t.invoke(tc["args"])
-                except Exception as exc:
-                    result = f"Tool error: {exc}"
-            from langchain_core.messages import ToolMessage
-            messages.append(
-                ToolMessage(content=str(result), tool_call_id=tc["id"])
-            )
-
-    return final_text, _state["df"]
+    Returns:
+        The final assistant response text and the edited routine as a
+        DataFrame with ROUTINE_COLUMNS.
+    """
+    with AgentSession(context, backend, llm, history, cache, recorder) as session:
+        return await session.arun(prompt, on_text)
@@ -9,3 +9,5 @@ class RoutineRules(BaseModel):
     break_after_period: int = 3
     break_label: str = "Break"
     break_duration_min: int = 30
+    # Days off for sections whose shift has no management log
+    weekends: List[str] = ["Fri", "Sat"]
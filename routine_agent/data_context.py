@@ -1,31 +1,276 @@
-"""data_context.py – load all reference data from csv_files/ using pandas."""
+"""data_context.py – load all reference data from csv_files/ using pandas.
+
+load_context() keeps a process-wide cache of the parsed tables.  Each CSV is
+re-read only when its mtime or size changes, so every consumer (agent,
+renderer, generator, class1/class2 scripts) can call it freely.  The returned
+DataFrames are shared between callers and must be treated as read-only.
+"""
+import json
+import math
 import os
+import pickle
+from typing import Dict, Tuple
+
 import pandas as pd
 
+from .metrics import timed
+
 _BASE = os.path.join(os.path.dirname(__file__), "..", "csv_files")
 
+# Optional binary snapshot of the parsed tables for fast cold starts
+SNAPSHOT_PATH = os.path.join(_BASE, ".context_snapshot.pkl")
+
+_FILES = {
+    "classes": "classes.csv",
+    "sections": "sections.csv",
+    "teachers": "teachers.csv",
+    "subjects": "subjects.csv",
+    "rooms": "class_rooms.csv",
+    "shifts": "shifts.csv",
+    "shift_logs": "shift_management_logs.csv",
+    "subject_groups": "subject_groups.csv",
+    "time_tables": "time_tables.csv",
+}
+
+# Typed columns, applied wherever the column exists
+_INT_COLUMNS = [
+    "id", "classes_id", "teachers_id", "shifts_id", "status", "total_students",
+    "floor", "type", "number_of_row", "number_of_column", "each_brench_capacity",
+    "extra_seat_capacity", "changed_by", "salary_structure_id", "subjects_id",
+    "class_room_id", "sections_id",
+]
+_STR_COLUMNS = ["code", "room_no", "grp_code", "department"]
+_DATE_COLUMNS = {"shift_logs": ["applicable_from", "applicable_to"]}
+_JSON_COLUMNS = {
+    "subject_groups": ["has_subjects"],
+    "shift_logs": ["weekends"],
+    "subjects": ["has_type"],
+    "teachers": ["contact"],
+}
+
+Signature = Tuple[int, int]  # (mtime_ns, size)
+_cache: Dict[str, Tuple[Signature, pd.DataFrame]] = {}
+
 
 def _path(name: str) -> str:
     return os.path.join(_BASE, name)
 
 
-def load_context() -> dict:
-    """Return a dict of DataFrames keyed by logical name."""
-    ctx: dict = {}
+def _signature(path: str) -> Signature:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _parse_json(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return json.loads(value)
 
-    ctx["classes"] = pd.read_csv(_path("classes.csv"))
-    ctx["sections"] = pd.read_csv(_path("sections.csv"))
-    ctx["teachers"] = pd.read_csv(_path("teachers.csv"))
-    ctx["subjects"] = pd.read_csv(_path("subjects.csv"))
-    ctx["rooms"] = pd.read_csv(_path("class_rooms.csv"))
-    ctx["shifts"] = pd.read_csv(_path("shifts.csv"))
-    ctx["shift_logs"] = pd.read_csv(_path("shift_management_logs.csv"))
-    ctx["subject_groups"] = pd.read_csv(_path("subject_groups.csv"))
-    ctx["time_tables"] = pd.read_csv(_path("time_tables.csv"))
 
+def _read_table(name: str, path: str) -> pd.DataFrame:
+    """Read one CSV with normalised column names, typed IDs and parsed JSON."""
+    df = pd.read_csv(path)
     # Normalise column names to lowercase strip
-    for key, df in ctx.items():
-        df.columns = [c.strip().lower() for c in df.columns]
-        ctx[key] = df
+    df.columns = [c.strip().lower() for c in df.columns]
+    for col in _INT_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")
+    for col in _STR_COLUMNS:
+        if col in df.columns:
+            # missing values become "" (as norm_id returns), not the string "nan"
+            df[col] = df[col].fillna("").astype(str)
+    for col in _DATE_COLUMNS.get(name, []):
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    for col in _JSON_COLUMNS.get(name, []):
+        if col in df.columns:
+            df[col] = df[col].map(_parse_json).astype(object)
+    return df
+
+
+@timed("load")
+def load_context(use_cache: bool = True, snapshot: bool = False) -> dict:
+    """Return a dict of DataFrames keyed by logical name.
+
+    Args:
+        use_cache: Reuse tables parsed earlier in this process when the
+            file's mtime and size are unchanged.
+        snapshot: Also read/write a pickle snapshot at SNAPSHOT_PATH so a
+            fresh process can skip CSV parsing for unchanged files.
+    """
+    if not use_cache:
+        return {name: _read_table(name, _path(f)) for name, f in _FILES.items()}
 
+    if snapshot and not _cache:
+        _load_snapshot()
+
+    ctx: dict = {}
+    changed = False
+    for name, filename in _FILES.items():
+        path = os.path.abspath(_path(filename))
+        sig = _signature(path)
+        cached = _cache.get(path)
+        if cached is None or cached[0] != sig:
+            _cache[path] = (sig, _read_table(name, path))
+            changed = True
+        ctx[name] = _cache[path][1]
+
+    if snapshot and changed:
+        _save_snapshot()
     return ctx
+
+
+def clear_cache() -> None:
+    """Forget all cached tables (the snapshot file is left alone)."""
+    _cache.clear()
+
+
+def _load_snapshot() -> None:
+    try:
+        with open(SNAPSHOT_PATH, "rb") as fh:
+            _cache.update(pickle.load(fh))
+    except (OSError, pickle.UnpicklingError, EOFError):
+        pass
+
+
+def _save_snapshot() -> None:
+    tmp = SNAPSHOT_PATH + ".tmp"
+    with open(tmp, "wb") as fh:
+        pickle.dump(dict(_cache), fh, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, SNAPSHOT_PATH)
+
+
+# ---------------------------------------------------------------------------
+# Compact prompt context
+# ---------------------------------------------------------------------------
+
+# Tables larger than this are left out of the system prompt; the agent
+# fetches the rows it needs with the lookup_section tool instead.
+COMPACT_MAX_ROWS = 40
+
+
+def as_list(value) -> list:
+    """Parse a JSON list cell such as '[1,2,3]' (already-parsed lists pass through)."""
+    if isinstance(value, list):
+        return value
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return []
+    return json.loads(value)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def full_context_dump(ctx: dict) -> str:
+    """Every reference table rendered with to_string (the original prompt format)."""
+    out = ""
+    for name, df in ctx.items():
+        if isinstance(df, pd.DataFrame) and not df.empty:
+            out += f"\n### {name}\n{df.to_string(index=False)}\n"
+    return out
+
+
+def _id_line(label: str, pairs) -> str:
+    return f"{label}: " + "; ".join(f"{k}={v}" for k, v in pairs)
+
+
+def compact_context(ctx: dict, max_rows: int = COMPACT_MAX_ROWS) -> str:
+    """Scheduler-relevant reference data in a dense ID-keyed format.
+
+    Only the columns needed to place slots are kept (IDs, names/codes,
+    departments, subject groups, section groups and shift times).  Teacher
+    and section tables with more than ``max_rows`` rows are replaced by a
+    count and a pointer to the lookup_section tool.
+    """
+    lines = ["Format: table(key=fields): key=value; ..."]
+
+    subjects = ctx["subjects"]
+    lines.append(_id_line(
+        "subjects(id=name|department)",
+        zip(subjects["id"], subjects["name"] + "|" + subjects["department"]),
+    ))
+
+    groups = ctx["subject_groups"]
+    lines.append(_id_line(
+        "groups(grp_code=subject ids)",
+        ((g, ",".join(str(s) for s in as_list(h))) for g, h in zip(groups["grp_code"], groups["has_subjects"])),
+    ))
+
+    rooms = ctx["rooms"]
+    lines.append(_id_line("rooms(id=room_no)", zip(rooms["id"], rooms["room_no"])))
+
+    logs = ctx.get("shift_logs")
+    if logs is not None and not logs.empty:
+        lines.append(_id_line(
+            "shift_logs(id=shift|start-end|from..to)",
+            (
+                (r.id, f"{r.shifts_id}|{str(r.start)[:5]}-{str(r.end)[:5]}|"
+                       f"{_blank(r.applicable_from)}..{_blank(r.applicable_to)}")
+                for r in logs.itertuples(index=False)
+            ),
+        ))
+
+    teachers = ctx["teachers"]
+    if len(teachers) <= max_rows:
+        lines.append(_id_line(
+            "teachers(id=code|department)",
+            zip(teachers["id"], teachers["code"] + "|" + teachers["department"]),
+        ))
+    else:
+        lines.append(f"teachers: {len(teachers)} rows; call lookup_section for a section's eligible teachers")
+
+    sections = ctx["sections"]
+    if len(sections) <= max_rows:
+        lines.append(_id_line(
+            "sections(code=grp_code|shift)",
+            zip(sections["code"], sections["grp_code"].astype(str) + "|" + sections["shifts_id"].astype(str)),
+        ))
+    else:
+        lines.append(f"sections: {len(sections)} rows; call lookup_section with a section code")
+    return "\n".join(lines)
+
+
+def section_context(ctx: dict, section_code: str) -> str:
+    """Compact reference data for one section: its subjects and eligible teachers."""
+    sections = ctx["sections"]
+    row = sections[sections["code"].astype(str) == str(section_code)]
+    if row.empty:
+        return f"Unknown section {section_code}."
+    sec = row.iloc[0]
+    groups = ctx["subject_groups"]
+    grp = groups[groups["grp_code"] == sec["grp_code"]]
+    subject_ids = [str(s) for s in as_list(grp.iloc[0]["has_subjects"])] if not grp.empty else []
+
+    subjects = ctx["subjects"]
+    subjects = subjects[subjects["id"].astype(str).isin(subject_ids)]
+    teachers = ctx["teachers"]
+    lines = [f"section {sec['code']}: grp_code={sec['grp_code']}|shift={sec.get('shifts_id', '')}"]
+    for subj in subjects.itertuples(index=False):
+        eligible = teachers[teachers["department"] == subj.department]
+        lines.append(
+            f"subject {subj.id}={subj.name}: teachers "
+            + ",".join(f"{t.id}={t.code}" for t in eligible.itertuples(index=False))
+        )
+    return "\n".join(lines)
+
+
+def context_size_report(ctx: dict, max_rows: int = COMPACT_MAX_ROWS) -> dict:
+    """Characters and estimated tokens of the full dump versus compact_context."""
+    full = full_context_dump(ctx)
+    compact = compact_context(ctx, max_rows)
+    return {
+        "full_chars": len(full),
+        "full_tokens": estimate_tokens(full),
+        "compact_chars": len(compact),
+        "compact_tokens": estimate_tokens(compact),
+    }
+
+
+def _blank(value) -> str:
+    if value is None or pd.isna(value):
+        return ""
+    if hasattr(value, "strftime"):
+        return value.strftime("%Y-%m-%d")
+    return str(value)
@@ -0,0 +1,142 @@
+"""eligibility.py – which teachers may teach each section's subjects, and how much."""
+from typing import Dict, FrozenSet, List, Tuple
+
+import pandas as pd
+
+from .config import RoutineRules
+from .data_context import as_list
+from .routine_store import norm_id
+
+
+class EligibilityIndex:
+    """Section → subjects → department → teachers, joined once from load_context().
+
+    A teacher is eligible for a (section, subject) when the subject belongs
+    to the section's group (``subject_groups.has_subjects``), the teacher
+    is in the subject's department and, when both have a ``shifts_id``,
+    works the section's shift.  Every lookup is a dict access.
+
+    ``max_periods`` is each teacher's weekly capacity (default: the number
+    of day × period cells); workload() compares it with a routine.
+    """
+
+    def __init__(
+        self,
+        context: dict,
+        rules: RoutineRules | None = None,
+        max_periods: int | None = None,
+    ) -> None:
+        rules = rules or RoutineRules()
+        self.cells_per_week = len(rules.days) * len(rules.periods)
+        self.max_periods = max_periods if max_periods is not None else self.cells_per_week
+
+        self.subject_department: Dict[str, str] = {
+            norm_id(sid): dept
+            for sid, dept in zip(context["subjects"]["id"], context["subjects"]["department"])
+            if not pd.isna(dept)
+        }
+        teachers = context["teachers"]
+        self.teacher_department: Dict[str, str] = {}
+        self.teacher_code: Dict[str, str] = {}
+        self.teacher_shift: Dict[str, str] = {}
+        self.department_teachers: Dict[str, List[str]] = {}
+        for row in teachers.itertuples(index=False):
+            tid = norm_id(row.id)
+            self.teacher_code[tid] = str(row.code) if hasattr(row, "code") else tid
+            self.teacher_shift[tid] = norm_id(getattr(row, "shifts_id", None))
+            if pd.isna(row.department):
+                continue
+            self.teacher_department[tid] = row.department
+            self.department_teachers.setdefault(row.department, []).append(tid)
+
+        group_subjects = {
+            str(row.grp_code): [norm_id(s) for s in as_list(row.has_subjects)]
+            for row in context["subject_groups"].itertuples(index=False)
+        }
+        sections = context["sections"]
+        self.section_subjects: Dict[str, List[str]] = {
+            str(code): group_subjects.get(str(grp), [])
+            for code, grp in zip(sections["code"], sections["grp_code"])
+        }
+        shifts = sections["shifts_id"] if "shifts_id" in sections.columns else [None] * len(sections)
+        self.section_shift: Dict[str, str] = {
+            str(code): norm_id(shift) for code, shift in zip(sections["code"], shifts)
+        }
+
+        # One tuple/frozenset per (department, shift) pool, shared by every
+        # (section, subject) drawing on it
+        self._pools: Dict[Tuple[str, str], Tuple[str, ...]] = {}
+        self._pool_sets: Dict[Tuple[str, str], FrozenSet[str]] = {}
+        self._pool_of: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        for section, subjects in self.section_subjects.items():
+            for subject in subjects:
+                key = (self.subject_department.get(subject), self.section_shift[section])
+                if key not in self._pools:
+                    dept, shift = key
+                    self._pools[key] = tuple(
+                        t for t in self.department_teachers.get(dept, ())
+                        if not shift or self.teacher_shift[t] in ("", shift)
+                    )
+                    self._pool_sets[key] = frozenset(self._pools[key])
+                self._pool_of[(section, subject)] = key
+
+    # -- lookups ------------------------------------------------------------
+
+    def eligible(self, section_code, subject_id) -> Tuple[str, ...]:
+        """Teacher IDs who may teach subject_id in section_code (empty if none)."""
+        key = self._pool_of.get((str(section_code), norm_id(subject_id)))
+        return self._pools[key] if key is not None else ()
+
+    def is_eligible(self, section_code, subject_id, teacher_id) -> bool:
+        key = self._pool_of.get((str(section_code), norm_id(subject_id)))
+        return key is not None and norm_id(teacher_id) in self._pool_sets[key]
+
+    def pool(self, section_code, subject_id) -> Tuple[str, str] | None:
+        """The (department, shift) teacher pool a (section, subject) draws on."""
+        return self._pool_of.get((str(section_code), norm_id(subject_id)))
+
+    def section_teachers(self, section_code) -> List[str]:
+        """Every teacher eligible for at least one of the section's subjects."""
+        seen: Dict[str, None] = {}
+        for subject in self.section_subjects.get(str(section_code), ()):
+            seen.update(dict.fromkeys(self.eligible(section_code, subject)))
+        return list(seen)
+
+    def teachers_for_subjects(self, subject_ids) -> List[str]:
+        """Teachers of the departments of any of subject_ids."""
+        depts = dict.fromkeys(self.subject_department.get(norm_id(s)) for s in subject_ids)
+        return [t for d in depts if d is not None for t in self.department_teachers.get(d, ())]
+
+    # -- workload -----------------------------------------------------------
+
+    def workload(self, routine_df: pd.DataFrame) -> pd.DataFrame:
+        """Periods per teacher in the routine against max_periods.
+
+        One row per known or scheduled teacher with columns teacher_id,
+        department, periods, capacity and remaining (negative when over).
+        """
+        counts = routine_df["teacher_id"].map(norm_id)
+        counts = counts[counts != ""].value_counts()
+        ids = list(dict.fromkeys([*self.teacher_department, *counts.index]))
+        df = pd.DataFrame({"teacher_id": ids})
+        df["department"] = df["teacher_id"].map(self.teacher_department)
+        df["periods"] = df["teacher_id"].map(counts).fillna(0).astype("int64")
+        df["capacity"] = self.max_periods
+        df["remaining"] = df["capacity"] - df["periods"]
+        return df
+
+    def department_demand(self) -> pd.DataFrame:
+        """Weekly periods each department must cover versus its teachers' capacity."""
+        cells = self.cells_per_week
+        demand: Dict[str, float] = {}
+        for subjects in self.section_subjects.values():
+            for subject in subjects:
+                dept = self.subject_department.get(subject)
+                if dept is not None:
+                    demand[dept] = demand.get(dept, 0.0) + cells / len(subjects)
+        rows = [
+            {"department": d, "demand": round(n), "teachers": len(self.department_teachers.get(d, ())),
+             "capacity": len(self.department_teachers.get(d, ())) * self.max_periods}
+            for d, n in demand.items()
+        ]
+        return pd.DataFrame(rows, columns=["department", "demand", "teachers", "capacity"])
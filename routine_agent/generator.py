@@ -0,0 +1,485 @@
+"""generator.py – deterministic constraint-solver routine generator (no LLM).
+
+Builds a full weekly routine from the reference data returned by
+load_context():
+
+* each section's subjects come from ``subject_groups.has_subjects`` via the
+  section's ``grp_code``;
+* each (section, subject) is taught by one teacher of the subject's
+  department, chosen by load balancing;
+* each section keeps one room (``sections.room_id`` when present, otherwise
+  rooms are handed out in ``class_rooms.csv`` order);
+* every day × period cell of RoutineRules is filled, with the weekly periods
+  spread evenly across subjects and days.
+
+Cells are filled by backtracking search with forward checking (teacher
+clashes, per-subject quotas and per-day caps are pruned from the domains of
+unassigned cells) and MRV variable ordering.
+"""
+import math
+import random
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from .config import RoutineRules
+from .eligibility import EligibilityIndex
+from .metrics import timed
+from .routine_store import ROUTINE_COLUMNS, BaseRoutineStore, norm_id
+
+Cell = Tuple[str, int, int]  # (section_code, day index, period index)
+
+MAX_BACKTRACKS = 500
+MAX_RESTARTS = 20
+
+
+@timed("generate")
+def generate_routine(
+    context: dict,
+    rules: RoutineRules | None = None,
+    section_codes: List[str] | None = None,
+    fixed: BaseRoutineStore | None = None,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """Generate a conflict-free weekly routine.
+
+    Args:
+        context: Dict of DataFrames from load_context().
+        rules: Day/period grid; defaults to RoutineRules().
+        section_codes: Sections to schedule; defaults to every section.
+        fixed: Existing slots of other sections whose teachers and rooms
+            must be respected (slots of ``section_codes`` are ignored).
+        seed: Seed for the section order used on restarts.
+
+    Returns:
+        A DataFrame with ROUTINE_COLUMNS, ordered by section, day, period.
+
+    Raises:
+        ValueError: If the reference data makes a full routine impossible.
+        RuntimeError: If the search gives up after MAX_RESTARTS restarts.
+    """
+    if rules is None:
+        rules = RoutineRules()
+    problem = _Problem.from_context(context, rules, section_codes, fixed)
+    rng = random.Random(seed)
+    order = list(problem.sections)
+    for _ in range(MAX_RESTARTS):
+        solver = _Solver(problem, order)
+        assignment = solver.solve()
+        if assignment is not None:
+            return problem.to_dataframe(assignment)
+        rng.shuffle(order)
+    raise RuntimeError(
+        f"Routine search gave up after {MAX_RESTARTS} restarts "
+        f"({MAX_BACKTRACKS} backtracks each)."
+    )
+
+
+def section_rooms(
+    context: dict,
+    sections: pd.DataFrame,
+    explicit: Dict[str, str] | None = None,
+    taken: set | None = None,
+) -> Dict[str, str]:
+    """One room per section: ``sections.room_id`` or ``explicit`` when set,
+    otherwise the next room by ID not in ``taken``.
+
+    Raises:
+        ValueError: If rooms run out or two sections end up sharing one.
+    """
+    rooms = [str(r) for r in context["rooms"].sort_values("id")["id"]]
+    explicit = dict(explicit or {})
+    if "room_id" in sections.columns:
+        explicit.update(
+            (str(code), norm_id(room))
+            for code, room in zip(sections["code"], sections["room_id"])
+            if norm_id(room)
+        )
+    used = set(explicit.values()) | set(taken or ())
+    free = [r for r in rooms if r not in used]
+    assigned: Dict[str, str] = {}
+    for sec in sections["code"].astype(str):
+        if sec in explicit:
+            assigned[sec] = explicit[sec]
+        elif free:
+            assigned[sec] = free.pop(0)
+        else:
+            raise ValueError(f"No free room left for section {sec}.")
+    shared = pd.Series(assigned, dtype=object).duplicated(keep=False)
+    if shared.any():
+        raise ValueError(
+            f"Sections {sorted(shared[shared].index)} share a room; "
+            "a full routine needs one room per section."
+        )
+    return assigned
+
+
+class _Problem:
+    """Static part of the search: sections, subjects, teachers, quotas."""
+
+    def __init__(self, rules: RoutineRules) -> None:
+        self.rules = rules
+        self.sections: List[str] = []
+        self.subjects: Dict[str, List[str]] = {}  # section -> subject ids
+        self.teacher: Dict[Tuple[str, str], str] = {}  # (section, subject) -> teacher id
+        self.quota: Dict[Tuple[str, str], int] = {}
+        self.day_cap: Dict[Tuple[str, str], int] = {}
+        self.room: Dict[str, str] = {}
+        self.shift_log: Dict[str, str] = {}
+        self.busy: set = set()  # (teacher or 'room:'+id, day idx, period idx) taken by fixed slots
+        self.fixed_rooms: set = set()  # rooms used by fixed slots of other sections
+        self.previous_room: Dict[str, str] = {}  # room each section already uses in `fixed`
+
+    @classmethod
+    def from_context(
+        cls,
+        context: dict,
+        rules: RoutineRules,
+        section_codes: List[str] | None,
+        fixed: BaseRoutineStore | None,
+    ) -> "_Problem":
+        problem = cls(rules)
+        sections = context["sections"]
+        if section_codes:
+            unknown = set(section_codes) - set(sections["code"].astype(str))
+            if unknown:
+                raise ValueError(f"Unknown section codes: {sorted(unknown)}.")
+            sections = sections[sections["code"].astype(str).isin(section_codes)]
+        problem.sections = sections["code"].astype(str).tolist()
+
+        eligibility = EligibilityIndex(context, rules)
+        for row in sections.itertuples(index=False):
+            code = str(row.code)
+            subjects = eligibility.section_subjects.get(code, [])
+            if not subjects:
+                raise ValueError(f"Section {code} has no subjects for group '{row.grp_code}'.")
+            problem.subjects[code] = subjects
+
+        problem._assign_quotas()
+        problem._mark_fixed(fixed)
+        problem._assign_rooms(context, sections)
+        problem._assign_shift_logs(context, sections)
+        problem._assign_teachers(eligibility)
+        return problem
+
+    @property
+    def cells_per_week(self) -> int:
+        return len(self.rules.days) * len(self.rules.periods)
+
+    def _assign_quotas(self) -> None:
+        n_days = len(self.rules.days)
+        for sec, subjects in self.subjects.items():
+            base, extra = divmod(self.cells_per_week, len(subjects))
+            for i, subj in enumerate(subjects):
+                quota = base + (1 if i < extra else 0)
+                self.quota[(sec, subj)] = quota
+                self.day_cap[(sec, subj)] = max(1, math.ceil(quota / n_days))
+
+    def _assign_rooms(self, context: dict, sections: pd.DataFrame) -> None:
+        self.room = section_rooms(context, sections, self.previous_room, self.fixed_rooms)
+
+    def _assign_shift_logs(self, context: dict, sections: pd.DataFrame) -> None:
+        logs = context.get("shift_logs")
+        latest: Dict[str, str] = {}
+        if logs is not None and not logs.empty:
+            logs = logs.sort_values(["applicable_from", "id"])
+            latest = dict(zip(logs["shifts_id"].map(norm_id), logs["id"].map(norm_id)))
+        shift_col = sections["shifts_id"] if "shifts_id" in sections.columns else [None] * len(sections)
+        for code, shift in zip(sections["code"].astype(str), shift_col):
+            self.shift_log[code] = latest.get(norm_id(shift), "")
+
+    def _mark_fixed(self, fixed: BaseRoutineStore | None) -> None:
+        if fixed is None:
+            return
+        day_idx = {d: i for i, d in enumerate(self.rules.days)}
+        period_idx = {p: i for i, p in enumerate(self.rules.periods)}
+        ours = set(self.sections)
+        for slot in fixed:
+            if slot["section_code"] in ours:
+                if slot["room_id"]:
+                    self.previous_room.setdefault(slot["section_code"], slot["room_id"])
+                continue
+            if slot["room_id"]:
+                self.fixed_rooms.add(slot["room_id"])
+            d, p = day_idx.get(slot["day"]), period_idx.get(slot["period"])
+            if d is None or p is None:
+                continue
+            if slot["teacher_id"]:
+                self.busy.add((slot["teacher_id"], d, p))
+            if slot["room_id"]:
+                self.busy.add(("room:" + slot["room_id"], d, p))
+
+    def _assign_teachers(self, eligibility: EligibilityIndex) -> None:
+        """Give each (section, subject) the least-loaded eligible teacher."""
+        capacity = eligibility.max_periods
+        subject_dept = eligibility.subject_department
+        load = {t: 0 for ts in eligibility.department_teachers.values() for t in ts}
+        for teacher, _, _ in self.busy:
+            if teacher in load:
+                load[teacher] += 1
+
+        def eligible(pair):
+            return eligibility.eligible(*pair)
+
+        # Hardest demands first: largest quota, then fewest candidate teachers
+        pairs = sorted(self.quota, key=lambda pr: (-self.quota[pr], len(eligible(pr))))
+        for pair in pairs:
+            candidates = eligible(pair)
+            if not candidates:
+                raise ValueError(
+                    f"No teacher in department '{subject_dept.get(pair[1])}' "
+                    f"for subject {pair[1]} of section {pair[0]}."
+                )
+            best = min(candidates, key=lambda t: (load[t], t))
+            if load[best] + self.quota[pair] > capacity:
+                raise ValueError(
+                    f"Department '{subject_dept.get(pair[1])}' has no teacher with "
+                    f"capacity for subject {pair[1]} of section {pair[0]}."
+                )
+            self.teacher[pair] = best
+            load[best] += self.quota[pair]
+
+    def to_dataframe(self, assignment: Dict[Cell, str]) -> pd.DataFrame:
+        position = {sec: i for i, sec in enumerate(self.sections)}
+        rows = []
+        for (sec, d, p), subj in sorted(
+            assignment.items(), key=lambda kv: (position[kv[0][0]], kv[0][1], kv[0][2])
+        ):
+            rows.append(
+                {
+                    "section_code": sec,
+                    "day": self.rules.days[d],
+                    "period": self.rules.periods[p],
+                    "subject_id": subj,
+                    "teacher_id": self.teacher[(sec, subj)],
+                    "room_id": self.room[sec],
+                    "shift_log_id": self.shift_log[sec],
+                }
+            )
+        return pd.DataFrame(rows, columns=ROUTINE_COLUMNS)
+
+
+class _Solver:
+    """Backtracking search with forward checking over (section, day, period) cells."""
+
+    def __init__(self, problem: _Problem, section_order: List[str]) -> None:
+        self.p = problem
+        n_days, n_periods = len(problem.rules.days), len(problem.rules.periods)
+        # Time-major cell order: a (day, period) is filled across all sections
+        # before moving on, which keeps teacher clashes visible early.
+        self.cells: List[Cell] = [
+            (sec, d, p) for d in range(n_days) for p in range(n_periods) for sec in section_order
+        ]
+        self.rank = {c: i for i, c in enumerate(self.cells)}
+        self.domain: Dict[Cell, set] = {}
+        self.unassigned: set = set()
+        self.assigned: Dict[Cell, str] = {}
+        self.remaining = dict(problem.quota)
+        self.support: Dict[Tuple[str, str], int] = {pair: 0 for pair in problem.quota}
+        self.day_support: Dict[Tuple[str, int, str], int] = {}
+        self.n_days = n_days
+        self.n_periods = n_periods
+        self.day_used: Dict[Tuple[str, int, str], int] = {}
+        self.teacher_day_cap: Dict[str, int] = {}  # Σ per-day caps of the teacher's pairs
+        self.teacher_day_used: Dict[Tuple[str, int], int] = {}
+        self.teacher_users: Dict[str, List[Tuple[str, str]]] = {}
+        self.section_cells: Dict[str, List[Cell]] = {sec: [] for sec in section_order}
+        self.trail: list = []
+
+        for pair, teacher in problem.teacher.items():
+            self.teacher_users.setdefault(teacher, []).append(pair)
+            self.teacher_day_cap[teacher] = self.teacher_day_cap.get(teacher, 0) + problem.day_cap[pair]
+
+        for cell in self.cells:
+            sec, d, p = cell
+            self.section_cells[sec].append(cell)
+            if ("room:" + problem.room[sec], d, p) in problem.busy:
+                dom = set()
+            else:
+                dom = {
+                    subj for subj in problem.subjects[sec]
+                    if (problem.teacher[(sec, subj)], d, p) not in problem.busy
+                }
+            self.domain[cell] = dom
+            self.unassigned.add(cell)
+            for subj in dom:
+                self.support[(sec, subj)] += 1
+                self.day_support[(sec, d, subj)] = self.day_support.get((sec, d, subj), 0) + 1
+
+    # -- search -------------------------------------------------------------
+
+    def solve(self) -> Dict[Cell, str] | None:
+        if not self._initially_consistent():
+            raise ValueError(
+                "No complete routine exists: some subject cannot get its weekly "
+                "periods with the teachers and rooms available."
+            )
+        frames: List[list] = []  # [cell, values left to try, trail mark of current try]
+        cell = self._select()
+        if cell is None:
+            return dict(self.assigned)
+        frames.append([cell, self._order_values(cell), None])
+        backtracks = 0
+        while frames:
+            frame = frames[-1]
+            if frame[2] is not None:
+                self._undo(frame[2])
+                frame[2] = None
+            if not frame[1]:
+                frames.pop()
+                backtracks += 1
+                if backtracks > MAX_BACKTRACKS:
+                    return None
+                continue
+            subj = frame[1].pop(0)
+            frame[2] = len(self.trail)
+            if not self._assign(frame[0], subj):
+                continue
+            nxt = self._select()
+            if nxt is None:
+                return dict(self.assigned)
+            frames.append([nxt, self._order_values(nxt), None])
+        return None
+
+    def _initially_consistent(self) -> bool:
+        if any(not self.domain[c] for c in self.cells):
+            return False
+        return all(self._feasible(sec, subj) for sec, subj in self.remaining)
+
+    def _select(self) -> Cell | None:
+        """Minimum remaining values, ties broken by time-major cell order."""
+        if not self.unassigned:
+            return None
+        return min(self.unassigned, key=lambda c: (len(self.domain[c]), self.rank[c]))
+
+    def _order_values(self, cell: Cell) -> List[str]:
+        """Most urgent subject first.
+
+        Urgency is the teacher's pressure on this day (lessons the teacher may
+        still owe today per period left), then the subject's remaining quota
+        per usable cell.
+        """
+        sec, d, _ = cell
+
+        def urgency(subj):
+            pair = (sec, subj)
+            teacher = self.p.teacher[pair]
+            owed = self.teacher_day_cap[teacher] - self.teacher_day_used.get((teacher, d), 0)
+            periods_left = self.n_periods - self.teacher_day_used.get((teacher, d), 0)
+            return (
+                -owed / max(periods_left, 1),
+                -self.remaining[pair] / max(self.support[pair], 1),
+                subj,
+            )
+
+        return sorted(self.domain[cell], key=urgency)
+
+    # -- propagation --------------------------------------------------------
+
+    def _assign(self, cell: Cell, subj: str) -> bool:
+        sec, d, p = cell
+        pair = (sec, subj)
+        teacher = self.p.teacher[pair]
+        self.trail.append(("assign", cell, subj))
+        self.assigned[cell] = subj
+        self.unassigned.discard(cell)
+        for value in self.domain[cell]:
+            self.support[(sec, value)] -= 1
+            self.day_support[(sec, d, value)] -= 1
+        self.remaining[pair] -= 1
+        self.teacher_day_used[(teacher, d)] = self.teacher_day_used.get((teacher, d), 0) + 1
+        day_key = (sec, d, subj)
+        self.day_used[day_key] = self.day_used.get(day_key, 0) + 1
+
+        for value in self.domain[cell]:
+            if not self._feasible(sec, value):
+                return False
+
+        if self.remaining[pair] == 0 or self.day_used[day_key] >= self.p.day_cap[pair]:
+            for other in self.section_cells[sec]:
+                if other in self.unassigned and (self.remaining[pair] == 0 or other[1] == d):
+                    if not self._remove(other, subj):
+                        return False
+
+        for other_sec, other_subj in self.teacher_users[teacher]:
+            if other_sec == sec:
+                continue
+            other = (other_sec, d, p)
+            if other in self.unassigned and not self._remove(other, other_subj):
+                return False
+
+        for value in self.p.subjects[sec]:
+            if not self._teacher_day_ok(self.p.teacher[(sec, value)], d):
+                return False
+        return True
+
+    def _remove(self, cell: Cell, subj: str) -> bool:
+        dom = self.domain[cell]
+        if subj not in dom:
+            return True
+        dom.discard(subj)
+        self.trail.append(("remove", cell, subj))
+        self.support[(cell[0], subj)] -= 1
+        self.day_support[(cell[0], cell[1], subj)] -= 1
+        return bool(dom) and self._feasible(cell[0], subj)
+
+    def _teacher_day_ok(self, teacher: str, d: int) -> bool:
+        """Are there enough open periods today for the lessons the teacher must give today?"""
+        forced = 0
+        for sec, subj in self.teacher_users[teacher]:
+            pair = (sec, subj)
+            needed = self.remaining[pair]
+            if needed <= 0:
+                continue
+            cap = self.p.day_cap[pair]
+            elsewhere = 0
+            for other_day in range(self.n_days):
+                if other_day != d:
+                    elsewhere += min(
+                        cap - self.day_used.get((sec, other_day, subj), 0),
+                        self.day_support.get((sec, other_day, subj), 0),
+                    )
+            forced += max(0, needed - elsewhere)
+        if not forced:
+            return True
+        open_periods = 0
+        for p in range(self.n_periods):
+            for sec, subj in self.teacher_users[teacher]:
+                cell = (sec, d, p)
+                if cell in self.unassigned and subj in self.domain[cell]:
+                    open_periods += 1
+                    break
+        return forced <= open_periods
+
+    def _feasible(self, sec: str, subj: str) -> bool:
+        """Can the subject's remaining quota still fit, given per-day caps?"""
+        pair = (sec, subj)
+        needed = self.remaining[pair]
+        if needed <= 0:
+            return True
+        cap = self.p.day_cap[pair]
+        room = 0
+        for d in range(self.n_days):
+            room += min(cap - self.day_used.get((sec, d, subj), 0), self.day_support.get((sec, d, subj), 0))
+            if room >= needed:
+                return True
+        return False
+
+    def _undo(self, mark: int) -> None:
+        while len(self.trail) > mark:
+            kind, cell, subj = self.trail.pop()
+            sec = cell[0]
+            if kind == "remove":
+                self.domain[cell].add(subj)
+                self.support[(sec, subj)] += 1
+                self.day_support[(sec, cell[1], subj)] += 1
+                continue
+            pair = (sec, subj)
+            del self.assigned[cell]
+            self.unassigned.add(cell)
+            for value in self.domain[cell]:
+                self.support[(sec, value)] += 1
+                self.day_support[(sec, cell[1], value)] += 1
+            self.remaining[pair] += 1
+            self.teacher_day_used[(self.p.teacher[pair], cell[1])] -= 1
+            self.day_used[(sec, cell[1], subj)] -= 1
@@ -0,0 +1,167 @@
+"""history.py – keep the agent's message history within a token budget."""
+import json
+from typing import Dict, List, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+
+from .data_context import estimate_tokens
+
+HISTORY_TOKEN_BUDGET = 8000
+# Tools whose output is a snapshot of the routine; stale copies are useless
+LISTING_TOOLS = frozenset({"list_slots"})
+
+
+def message_tokens(message: BaseMessage) -> int:
+    """Estimated tokens of a message's content plus any tool-call arguments."""
+    text = message.content if isinstance(message.content, str) else json.dumps(message.content)
+    if isinstance(message, AIMessage) and message.tool_calls:
+        text += json.dumps([tc["args"] for tc in message.tool_calls], default=str)
+    return estimate_tokens(text)
+
+
+class HistoryManager:
+    """Shrink the messages sent to the model on each agent iteration.
+
+    The system prompt, the user's request and the last ``keep_turns`` model
+    turns (an AIMessage and its ToolMessages) are always sent unchanged.
+    Older turns are reduced in three steps, stopping as soon as the request
+    fits ``token_budget``:
+
+    1. outputs of LISTING_TOOLS are replaced by a note to call the tool
+       again, and other tool outputs are cut to ``max_tool_chars``;
+    2. old tool outputs are cut to their first line;
+    3. the oldest turns are dropped and replaced by a one-line note.
+
+    The full history is left untouched; compact() returns the list to send.
+    ``saved_tokens`` accumulates the estimated tokens not sent.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = HISTORY_TOKEN_BUDGET,
+        keep_turns: int = 1,
+        max_tool_chars: int = 1500,
+    ) -> None:
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+        self.max_tool_chars = max_tool_chars
+        self.requests = 0
+        self.full_tokens = 0
+        self.sent_tokens = 0
+        # keyed by id(); the message is kept alive so the id is never reused
+        self._tokens: Dict[int, Tuple[BaseMessage, int]] = {}
+        self._replaced: Dict[Tuple[int, str], Tuple[BaseMessage, BaseMessage]] = {}
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.full_tokens - self.sent_tokens
+
+    def report(self) -> str:
+        return (
+            f"History: {self.requests} model requests, {self.sent_tokens} tokens sent "
+            f"(~{self.saved_tokens} saved of {self.full_tokens})."
+        )
+
+    def end_conversation(self) -> None:
+        """Forget cached per-message data; the token totals are kept."""
+        self._tokens.clear()
+        self._replaced.clear()
+
+    def compact(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        """Return the messages to send for the next model call."""
+        full = sum(self._count(m) for m in messages)
+        out = list(messages)
+        head, turns = self._split(out)
+        old = turns[: max(0, len(turns) - self.keep_turns)]
+
+        if full > self.token_budget:
+            for turn in old:
+                self._shrink(turn, "trim")
+        if self._total(head, turns) > self.token_budget:
+            for turn in old:
+                self._shrink(turn, "first_line")
+        dropped = 0
+        while old and self._total(head, turns) > self.token_budget:
+            old.pop(0)
+            turns.pop(0)
+            dropped += 1
+
+        sent = list(head)
+        if dropped:
+            sent.append(
+                AIMessage(content=f"[{dropped} earlier tool round(s) omitted to fit the token budget.]")
+            )
+        for turn in turns:
+            sent.extend(turn)
+
+        self.requests += 1
+        self.full_tokens += full
+        self.sent_tokens += sum(self._count(m) for m in sent)
+        return sent
+
+    # -- helpers ------------------------------------------------------------
+
+    def _count(self, message: BaseMessage) -> int:
+        key = id(message)
+        if key not in self._tokens:
+            self._tokens[key] = (message, message_tokens(message))
+        return self._tokens[key][1]
+
+    def _total(self, head: List[BaseMessage], turns: List[List[BaseMessage]]) -> int:
+        return sum(self._count(m) for m in head) + sum(self._count(m) for t in turns for m in t)
+
+    @staticmethod
+    def _split(messages: List[BaseMessage]):
+        """Leading non-AI messages, then one list per AIMessage and its tool results."""
+        i = 0
+        while i < len(messages) and not isinstance(messages[i], AIMessage):
+            i += 1
+        turns: List[List[BaseMessage]] = []
+        for m in messages[i:]:
+            if isinstance(m, AIMessage) or not turns:
+                turns.append([m])
+            else:
+                turns[-1].append(m)
+        return messages[:i], turns
+
+    def _shrink(self, turn: List[BaseMessage], step: str) -> None:
+        """Replace the turn's tool results with their reduced form for step."""
+        names = {}
+        if isinstance(turn[0], AIMessage):
+            names = {tc["id"]: tc["name"] for tc in turn[0].tool_calls}
+        for j, m in enumerate(turn):
+            if not isinstance(m, ToolMessage):
+                continue
+            key = (id(m), step)
+            if key not in self._replaced:
+                if step == "trim":
+                    new = self._trim(m, m.name or names.get(m.tool_call_id, ""))
+                else:
+                    new = self._first_line(m)
+                self._replaced[key] = (m, new)
+            turn[j] = self._replaced[key][1]
+
+    def _trim(self, message: ToolMessage, name: str) -> ToolMessage:
+        content = str(message.content)
+        if name in LISTING_TOOLS:
+            lines = content.count("\n") + 1
+            if lines <= 1:
+                return message
+            text = (
+                f"[Earlier {name} output ({lines} lines) removed; the routine may have "
+                f"changed since. Call {name} again for the current state.]"
+            )
+        elif len(content) > self.max_tool_chars:
+            cut = len(content) - self.max_tool_chars
+            text = f"{content[: self.max_tool_chars]}\n[… {cut} characters truncated]"
+        else:
+            return message
+        return message.model_copy(update={"content": text})
+
+    @staticmethod
+    def _first_line(message: ToolMessage) -> ToolMessage:
+        content = str(message.content)
+        first, sep, _ = content.partition("\n")
+        if not sep:
+            return message
+        return message.model_copy(update={"content": f"{first} [rest omitted]"})
@@ -0,0 +1,147 @@
+"""incremental_validator.py – live teacher/room conflict tracking over a RoutineStore."""
+from typing import Dict, List, Set, Tuple
+
+from .config import RoutineRules
+from .routine_store import BaseRoutineStore, SlotKey
+from .validator import validate_routine
+
+# (kind, day, period, resource_id) with kind in {"teacher", "room"}
+Conflict = Tuple[str, str, int, str]
+
+
+class IncrementalValidator:
+    """Keep conflict sets in sync with a RoutineStore as it is mutated.
+
+    Every store change re-checks only the (day, period) cells the old and new
+    slot occupied, so each mutation costs O(1).  New and resolved conflicts
+    accumulate until drain() is called.  full_recheck() runs the batch
+    validate_routine over the exported DataFrame for verification.
+    """
+
+    def __init__(self, store: BaseRoutineStore, rules: RoutineRules | None = None) -> None:
+        self._store = store
+        self._rules = rules or RoutineRules()
+        self._days = set(self._rules.days)
+        self._periods = set(self._rules.periods)
+        self._conflicts: Set[Conflict] = set()
+        self._bounds: Dict[SlotKey, List[str]] = {}
+        self._new: List[Conflict] = []
+        self._resolved: List[Conflict] = []
+
+        for slot in store:
+            key = (slot["section_code"], slot["day"], slot["period"])
+            self._recheck_slot(key, None, slot)
+        self._new.clear()
+        store.subscribe(self._on_change)
+
+    def close(self) -> None:
+        """Stop listening to the store."""
+        self._store.unsubscribe(self._on_change)
+
+    # -- results ------------------------------------------------------------
+
+    @property
+    def conflicts(self) -> Set[Conflict]:
+        """Current teacher/room conflicts as (kind, day, period, resource_id)."""
+        return set(self._conflicts)
+
+    def is_valid(self) -> bool:
+        return not self._conflicts and not self._bounds
+
+    def errors(self) -> List[str]:
+        """All current errors, in the same wording as validate_routine."""
+        # teacher conflicts first, like validate_routine
+        errors = [self.describe(c) for c in sorted(self._conflicts, key=lambda c: (c[0] != "teacher", c))]
+        for key in self._store.sort_keys(self._bounds):
+            errors.extend(self._bounds[key])
+        return errors
+
+    def drain(self) -> Tuple[List[str], List[str]]:
+        """Return (new, resolved) conflict messages since the last drain."""
+        new = [self.describe(c) for c in dict.fromkeys(self._new) if c in self._conflicts]
+        resolved = [
+            _describe_resolved(c) for c in dict.fromkeys(self._resolved) if c not in self._conflicts
+        ]
+        self._new.clear()
+        self._resolved.clear()
+        return new, resolved
+
+    def describe(self, conflict: Conflict) -> str:
+        kind, day, period, resource = conflict
+        keys = self._cell_keys(kind, day, period, resource)
+        sections = [k[0] for k in self._store.sort_keys(keys)]
+        if kind == "teacher":
+            return (
+                f"Teacher conflict: teacher {resource} assigned to multiple sections "
+                f"{sections} on {day} period {period}."
+            )
+        return (
+            f"Room conflict: room {resource} used by multiple sections "
+            f"{sections} on {day} period {period}."
+        )
+
+    def full_recheck(self) -> List[str]:
+        """Run the batch validator over the whole routine."""
+        return validate_routine(self._store.to_dataframe(), self._rules)
+
+    def verify(self) -> bool:
+        """True if the incremental state matches a full recheck."""
+        return sorted(self.errors()) == sorted(self.full_recheck())
+
+    # -- store listener -----------------------------------------------------
+
+    def _on_change(self, key: SlotKey, old: dict | None, new: dict | None) -> None:
+        self._recheck_slot(key, old, new)
+
+    def _recheck_slot(self, key: SlotKey, old: dict | None, new: dict | None) -> None:
+        _, day, period = key
+        cells = set()
+        for slot in (old, new):
+            if slot is None:
+                continue
+            if slot["teacher_id"]:
+                cells.add(("teacher", day, period, slot["teacher_id"]))
+            if slot["room_id"]:
+                cells.add(("room", day, period, slot["room_id"]))
+        for cell in cells:
+            self._recheck_cell(cell)
+
+        self._bounds.pop(key, None)
+        if new is not None:
+            errors = self._bounds_errors(new)
+            if errors:
+                self._bounds[key] = errors
+
+    def _recheck_cell(self, cell: Conflict) -> None:
+        clashing = len(self._cell_keys(*cell)) > 1
+        if clashing and cell not in self._conflicts:
+            self._conflicts.add(cell)
+            self._new.append(cell)
+        elif not clashing and cell in self._conflicts:
+            self._conflicts.discard(cell)
+            self._resolved.append(cell)
+
+    def _cell_keys(self, kind: str, day: str, period: int, resource: str) -> Set[SlotKey]:
+        if kind == "teacher":
+            return self._store.teacher_slots(day, period, resource)
+        return self._store.room_slots(day, period, resource)
+
+    def _bounds_errors(self, slot: dict) -> List[str]:
+        errors: List[str] = []
+        if slot["day"] not in self._days:
+            errors.append(
+                f"Invalid day '{slot['day']}' for section {slot['section_code']}. "
+                f"Allowed: {self._rules.days}."
+            )
+        if slot["period"] not in self._periods:
+            errors.append(
+                f"Invalid period {slot['period']} for section {slot['section_code']}. "
+                f"Allowed: {self._rules.periods}."
+            )
+        return errors
+
+
+def _describe_resolved(conflict: Conflict) -> str:
+    kind, day, period, resource = conflict
+    noun = "Teacher" if kind == "teacher" else "Room"
+    return f"{noun} conflict resolved: {kind} {resource} on {day} period {period}."
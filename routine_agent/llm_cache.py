@@ -0,0 +1,221 @@
+"""llm_cache.py – on-disk LLM response cache and session record/replay."""
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Any, AsyncIterator, List, Sequence
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    message_chunk_to_message,
+    messages_from_dict,
+    messages_to_dict,
+)
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+LLM_CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", "output", ".llm_cache")
+LLM_CACHE_MAX_ENTRIES = 1000
+
+
+def _message_key(message: BaseMessage) -> dict:
+    """The parts of a message that affect the model's answer (no run ids)."""
+    key = {"type": message.type, "content": message.content}
+    if isinstance(message, AIMessage) and message.tool_calls:
+        key["tool_calls"] = [[tc["name"], tc["args"], tc["id"]] for tc in message.tool_calls]
+    if getattr(message, "tool_call_id", None):
+        key["tool_call_id"] = message.tool_call_id
+    return key
+
+
+def cache_key(model_name: str, messages: Sequence[BaseMessage], tools: Sequence[Any]) -> str:
+    """sha256 over the model name, the messages (incl. system prompt) and the tool schemas."""
+    payload = {
+        "model": model_name,
+        "messages": [_message_key(m) for m in messages],
+        "tools": [convert_to_openai_tool(t) for t in tools],
+    }
+    blob = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _dump(message: AIMessage) -> str:
+    return json.dumps(messages_to_dict([message])[0])
+
+
+def _load(line: str) -> AIMessage:
+    return messages_from_dict([json.loads(line)])[0]
+
+
+class ResponseCache:
+    """AIMessages stored as ``<key>.json`` files, evicted least-recently-used.
+
+    A hit refreshes the file's mtime, so recency survives restarts.
+    """
+
+    def __init__(self, directory: str = LLM_CACHE_DIR, max_entries: int = LLM_CACHE_MAX_ENTRIES) -> None:
+        self.directory = directory
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        for name in os.listdir(directory):
+            if name.endswith(".json"):
+                path = os.path.join(directory, name)
+                entries.append((os.stat(path).st_mtime_ns, name[:-5]))
+        self._lru: "OrderedDict[str, None]" = OrderedDict((k, None) for _, k in sorted(entries))
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key: str) -> AIMessage | None:
+        if key not in self._lru:
+            self.misses += 1
+            return None
+        try:
+            with open(self._path(key), encoding="utf-8") as fh:
+                message = _load(fh.read())
+        except (OSError, ValueError):
+            del self._lru[key]
+            self.misses += 1
+            return None
+        os.utime(self._path(key))
+        self._lru.move_to_end(key)
+        self.hits += 1
+        return message
+
+    def put(self, key: str, message: AIMessage) -> None:
+        tmp = self._path(key) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(_dump(message))
+        os.replace(tmp, self._path(key))
+        self._lru[key] = None
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            old, _ = self._lru.popitem(last=False)
+            try:
+                os.remove(self._path(old))
+            except OSError:
+                pass
+
+
+class SessionRecorder:
+    """Append every model response of a session to a JSON-lines file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        open(path, "w", encoding="utf-8").close()
+
+    def append(self, message: AIMessage) -> None:
+        with open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(_dump(message) + "\n")
+
+
+def load_session(path: str) -> List[AIMessage]:
+    """Model responses recorded by SessionRecorder, in order."""
+    with open(path, encoding="utf-8") as fh:
+        return [_load(line) for line in fh if line.strip()]
+
+
+class ReplayChatModel(BaseChatModel):
+    """Chat model that answers with a recorded session's responses in order.
+
+    Pass it as ``llm=`` to run_agent/arun_agent: the recorded tool calls are
+    executed again through the agent's tool map, without network access.
+    """
+
+    responses: List[AIMessage]
+    calls: int = 0
+
+    @classmethod
+    def from_file(cls, path: str) -> "ReplayChatModel":
+        return cls(responses=load_session(path))
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ReplayChatModel":
+        return self
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.calls >= len(self.responses):
+            raise RuntimeError(f"Recorded session has only {len(self.responses)} responses.")
+        message = self.responses[self.calls]
+        self.calls += 1
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class CachingChatModel:
+    """Wrap a tool-bound chat model with a ResponseCache and/or SessionRecorder.
+
+    Supports the invoke() and astream() calls the agent loop makes; a cache
+    hit is returned (or streamed as one chunk) without calling the model.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        model_name: str,
+        tools: Sequence[Any],
+        cache: ResponseCache | None = None,
+        recorder: SessionRecorder | None = None,
+    ) -> None:
+        self._model = model
+        self._model_name = model_name
+        self._tools = list(tools)
+        self._cache = cache
+        self._recorder = recorder
+
+    def _key(self, messages: Sequence[BaseMessage]) -> str | None:
+        if self._cache is None:
+            return None
+        return cache_key(self._model_name, messages, self._tools)
+
+    def _lookup(self, key: str | None) -> AIMessage | None:
+        return self._cache.get(key) if key is not None else None
+
+    def _store(self, key: str | None, message: AIMessage) -> None:
+        if key is not None:
+            self._cache.put(key, message)
+        if self._recorder is not None:
+            self._recorder.append(message)
+
+    def invoke(self, messages: Sequence[BaseMessage], **kwargs: Any) -> AIMessage:
+        key = self._key(messages)
+        message = self._lookup(key)
+        if message is None:
+            message = self._model.invoke(messages, **kwargs)
+            self._store(key, message)
+        elif self._recorder is not None:
+            self._recorder.append(message)
+        return message
+
+    async def astream(self, messages: Sequence[BaseMessage], **kwargs: Any) -> AsyncIterator[AIMessageChunk]:
+        key = self._key(messages)
+        message = self._lookup(key)
+        if message is not None:
+            if self._recorder is not None:
+                self._recorder.append(message)
+            yield AIMessageChunk(
+                content=message.content,
+                tool_call_chunks=[
+                    {"name": tc["name"], "args": json.dumps(tc["args"]), "id": tc["id"], "index": i}
+                    for i, tc in enumerate(message.tool_calls)
+                ],
+            )
+            return
+        gathered = None
+        async for chunk in self._model.astream(messages, **kwargs):
+            gathered = chunk if gathered is None else gathered + chunk
+            yield chunk
+        if gathered is not None:
+            self._store(key, message_chunk_to_message(gathered))
@@ -1,99 +1,567 @@
-"""markdown_renderer.py – generate output/class_routine_generated.md from routine_table.csv."""
+"""markdown_renderer.py – generate output/class_routine_generated.md from routine_table.csv.
+
+The routine is grouped once into a RoutineIndex; the per-section view and the
+per-teacher / per-room views are all rendered from that index.
+"""
+import hashlib
+import json
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, NamedTuple, Tuple
+
 import pandas as pd
 from .config import RoutineRules
 from .data_context import load_context
+from .metrics import timed
+from .timing import PeriodClock
+
+_OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "..", "output")
+_OUTPUT_PATH = os.path.join(_OUTPUT_DIR, "class_routine_generated.md")
+
+VIEWS = ("section", "teacher", "room")
+_VIEW_FILES = {
+    "section": "class_routine_generated.md",
+    "teacher": "teacher_routine_generated.md",
+    "room": "room_routine_generated.md",
+}
+_VIEW_DIRS = {"section": "sections", "teacher": "teachers", "room": "rooms"}
+
+Cell = Tuple[str, int]  # (day, period)
+# (section_code, subject_id, teacher_id, room_id)
+Slot = Tuple[object, object, object, object]
+
+
+class RoutineIndex(NamedTuple):
+    """The routine grouped by section, teacher and room in one pass.
+
+    ``sections`` keeps the first slot per cell (as the original per-cell
+    ``.iloc[0]`` lookup did); ``teachers`` and ``rooms`` keep every slot so
+    clashes stay visible.
+    """
+
+    sections: Dict[object, Dict[Cell, Slot]]
+    teachers: Dict[str, Dict[Cell, List[Slot]]]
+    rooms: Dict[str, Dict[Cell, List[Slot]]]
+
+
+def build_routine_index(routine_df: pd.DataFrame, views: Tuple[str, ...] = VIEWS) -> RoutineIndex:
+    """Group the routine by section, teacher and room in a single pass.
+
+    Maps for views not listed in ``views`` are left empty.
+    """
+    index = RoutineIndex({}, {}, {})
+    if routine_df.empty:
+        return index
+    by_teacher, by_room = "teacher" in views, "room" in views
+    columns = [
+        routine_df[c].to_numpy()
+        for c in ("section_code", "day", "period", "subject_id", "teacher_id", "room_id")
+    ]
+    for sec, day, period, subject_id, teacher_id, room_id in zip(*columns):
+        cell = (day, int(period))
+        slot = (sec, subject_id, teacher_id, room_id)
+        index.sections.setdefault(sec, {}).setdefault(cell, slot)
+        if by_teacher and not _missing(teacher_id):
+            index.teachers.setdefault(str(teacher_id), {}).setdefault(cell, []).append(slot)
+        if by_room and not _missing(room_id):
+            index.rooms.setdefault(str(room_id), {}).setdefault(cell, []).append(slot)
+    return index
+
+
+def _missing(value) -> bool:
+    return value is None or value == "" or (not isinstance(value, str) and pd.isna(value))
+
+
+class _Lookups:
+    """ID → label dicts built once from the reference data (plus optional period times)."""
+
+    def __init__(self, ctx: dict, clock: PeriodClock | None = None) -> None:
+        self.clock = clock
+        subjects_df, teachers_df, rooms_df = ctx["subjects"], ctx["teachers"], ctx["rooms"]
+        self.subj_name = dict(zip(subjects_df["id"].astype(str), subjects_df["name"]))
+        self.teacher_code = dict(zip(teachers_df["id"].astype(str), teachers_df["code"]))
+        self.teacher_row = {str(r["id"]): r for r in teachers_df.to_dict("records")}
+        self.room_no = dict(zip(rooms_df["id"].astype(str), rooms_df["room_no"].astype(str)))
+        self.section_meta: dict = {}
+        for r in ctx["sections"].to_dict("records"):
+            self.section_meta.setdefault(r.get("code"), r)
+
+    def subject(self, subject_id) -> str:
+        return self.subj_name.get(str(subject_id), str(subject_id))
+
+    def teacher(self, teacher_id) -> str:
+        return self.teacher_code.get(str(teacher_id), str(teacher_id))
+
+    def room(self, room_id) -> str:
+        return self.room_no.get(str(room_id), str(room_id))
+
+    def time(self, section_code, period: int) -> str:
+        """Wall-clock label of a section's period ('' without a clock)."""
+        return self.clock.label(section_code, period) if self.clock is not None else ""
+
+
+def _table_lines(
+    cells: dict,
+    rules: RoutineRules,
+    fmt: Callable[[object, int], str],
+    period_label: Callable[[int], str] | None = None,
+) -> List[str]:
+    """Period × day table rows; ``fmt(value, period)`` turns a cell value into its text."""
+    days = rules.days
+    lines = [
+        "| Period | " + " | ".join(days) + " |",
+        "|--------|" + "|".join(["------------------------"] * len(days)) + "|",
+    ]
+    for period in rules.periods:
+        label = period_label(period) if period_label is not None else ""
+        row_cells = [f"{period} ({label})" if label else str(period)]
+        for day in days:
+            value = cells.get((day, period))
+            row_cells.append("—" if value is None else fmt(value, period))
+        lines.append("| " + " | ".join(row_cells) + " |")
+
+        # Insert break row after break_after_period
+        if period == rules.break_after_period:
+            break_cells = [rules.break_label] + [f"{rules.break_duration_min} Min"] * len(days)
+            lines.append("| " + " | ".join(break_cells) + " |")
+    lines.append("")
+    return lines
+
+
+# ---------------------------------------------------------------------------
+# Per-entity renderers: each returns one entity's block as a list of lines
+# ---------------------------------------------------------------------------
+
+
+def _section_block(sec_code, cells: dict, lk: _Lookups, rules: RoutineRules) -> List[str]:
+    r = lk.section_meta.get(sec_code)
+    room_label = ""
+    grp_label = ""
+    if r is not None:
+        if "room_id" in r and not pd.isna(r.get("room_id", None)):
+            room_label = f" — Room {lk.room_no.get(str(int(r['room_id'])), str(r.get('room_id', '')))}"
+        grp_label = str(r.get("grp_code", ""))
 
-_OUTPUT_PATH = os.path.join(
-    os.path.dirname(__file__), "..", "output", "class_routine_generated.md"
-)
+    lines = [f"# Class {sec_code}{room_label}\n"]
+    if grp_label:
+        lines.append(f"**Group:** {grp_label}  ")
+    lines.append("")
 
+    def fmt(slot: Slot, period: int) -> str:
+        sub = lk.subject(slot[1])
+        tcode = lk.teacher(slot[2])
+        return f"{sub} ({tcode})" if tcode else sub
 
+    return lines + _table_lines(cells, rules, fmt, lambda period: lk.time(sec_code, period))
+
+
+def _teacher_block(teacher_id: str, cells: dict, lk: _Lookups, rules: RoutineRules) -> List[str]:
+    row = lk.teacher_row.get(teacher_id, {})
+    name = f" — {row['name']}" if row.get("name") else ""
+    lines = [f"# Teacher {lk.teacher(teacher_id)}{name}\n"]
+    if row.get("department"):
+        lines.append(f"**Department:** {row['department']}  ")
+    lines.append(f"**Periods per week:** {sum(len(v) for v in cells.values())}  ")
+    lines.append("")
+
+    def fmt(slots: List[Slot], period: int) -> str:
+        return " / ".join(
+            f"{lk.subject(s[1])} ({s[0]}, Room {lk.room(s[3])}{_time_suffix(lk, s[0], period)})" for s in slots
+        )
+
+    return lines + _table_lines(cells, rules, fmt)
+
+
+def _room_block(room_id: str, cells: dict, lk: _Lookups, rules: RoutineRules) -> List[str]:
+    lines = [f"# Room {lk.room(room_id)}\n"]
+    lines.append(f"**Periods in use per week:** {len(cells)}  ")
+    lines.append("")
+
+    def fmt(slots: List[Slot], period: int) -> str:
+        return " / ".join(
+            f"{s[0]}: {lk.subject(s[1])} ({lk.teacher(s[2])}{_time_suffix(lk, s[0], period)})" for s in slots
+        )
+
+    return lines + _table_lines(cells, rules, fmt)
+
+
+def _time_suffix(lk: _Lookups, section_code, period: int) -> str:
+    # Sections of different shifts share a teacher/room table, so times go in the cell
+    label = lk.time(section_code, period)
+    return f", {label}" if label else ""
+
+
+_BLOCKS = {"section": _section_block, "teacher": _teacher_block, "room": _room_block}
+
+
+def _entities(view: str, index: RoutineIndex, ctx: dict) -> list:
+    """(entity key, cells) pairs for a view, in output order."""
+    if view == "section":
+        if index.sections:
+            return list(index.sections.items())
+        sections_df = ctx["sections"]
+        codes = sections_df["code"].tolist() if "code" in sections_df.columns else []
+        return [(code, {}) for code in codes]
+    mapping = index.teachers if view == "teacher" else index.rooms
+    return sorted(mapping.items(), key=lambda kv: _id_sort_key(kv[0]))
+
+
+def _id_sort_key(value: str):
+    return (0, int(value), "") if value.isdigit() else (1, 0, value)
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+
+def iter_markdown(
+    routine_df: pd.DataFrame,
+    rules: RoutineRules | None = None,
+    context: dict | None = None,
+    view: str = "section",
+    index: RoutineIndex | None = None,
+    clock: PeriodClock | None = None,
+) -> Iterator[str]:
+    """Yield one view of the Markdown document entity by entity.
+
+    Concatenating the chunks gives the full document.  Pass a prebuilt
+    ``index`` to render several views from one grouping pass, and a
+    PeriodClock (ShiftTimetable.clock()) to show each period's times.
+    """
+    if rules is None:
+        rules = RoutineRules()
+    ctx = context if context is not None else load_context()
+    if index is None:
+        index = build_routine_index(routine_df)
+    lk = _Lookups(ctx, clock)
+    block = _BLOCKS[view]
+    for i, (key, cells) in enumerate(_entities(view, index, ctx)):
+        # Blocks are joined by a newline, exactly as one "\n".join over all lines
+        yield ("\n" if i else "") + "\n".join(block(key, cells, lk, rules))
+
+
+@timed("render")
 def render_markdown(
     routine_df: pd.DataFrame,
     output_path: str = _OUTPUT_PATH,
     rules: RoutineRules | None = None,
+    context: dict | None = None,
+    clock: PeriodClock | None = None,
 ) -> str:
     """Generate a Markdown timetable for every section and write to output_path.
 
-    Returns the rendered Markdown string.
+    ``context`` is the dict from load_context(); the cached one is used if
+    omitted.  Returns the rendered Markdown; use write_markdown_file to
+    stream a large routine to disk without holding the whole text.
     """
+    content = "".join(iter_markdown(routine_df, rules, context, clock=clock))
+    _write_chunks(output_path, [content])
+    return content
+
+
+@timed("render")
+def write_markdown_file(
+    routine_df: pd.DataFrame,
+    output_path: str = _OUTPUT_PATH,
+    rules: RoutineRules | None = None,
+    context: dict | None = None,
+    clock: PeriodClock | None = None,
+) -> str:
+    """Write the same document as render_markdown, one section at a time.
+
+    Each section's table is written as soon as it is rendered, so memory
+    stays flat however many sections there are.  Returns output_path.
+    """
+    _write_chunks(output_path, iter_markdown(routine_df, rules, context, clock=clock))
+    return output_path
+
+
+def write_markdown(text: str, output_path: str = _OUTPUT_PATH) -> str:
+    """Write an already rendered section document (e.g. from generate_partitioned)."""
+    _write_chunks(output_path, [text])
+    return output_path
+
+
+@timed("render")
+def render_views(
+    routine_df: pd.DataFrame,
+    views: Tuple[str, ...] = VIEWS,
+    output_dir: str = _OUTPUT_DIR,
+    rules: RoutineRules | None = None,
+    context: dict | None = None,
+    split: bool = False,
+    max_workers: int | None = None,
+    incremental: bool = False,
+    clock: PeriodClock | None = None,
+) -> Dict[str, List[str]]:
+    """Render section, teacher and/or room timetables from one grouped index.
+
+    Without ``split`` each view goes to one file in output_dir
+    (class_/teacher_/room_routine_generated.md).  With ``split`` every
+    entity gets its own file under output_dir/sections|teachers|rooms/, and
+    the files are written in parallel by a thread pool of ``max_workers``.
+    With ``incremental`` the section view is updated through
+    render_markdown_incremental, re-rendering only changed sections.  A
+    PeriodClock adds the periods' wall-clock times.
+
+    Returns the written paths per view.
+    """
+    unknown = set(views) - set(VIEWS)
+    if unknown:
+        raise ValueError(f"Unknown views {sorted(unknown)}; choose from {list(VIEWS)}.")
     if rules is None:
         rules = RoutineRules()
+    ctx = context if context is not None else load_context()
+    index = build_routine_index(routine_df, views)
 
-    ctx = load_context()
-    sections_df = ctx["sections"]
-    subjects_df = ctx["subjects"]
-    teachers_df = ctx["teachers"]
-    rooms_df = ctx["rooms"]
+    written: Dict[str, List[str]] = {}
+    if incremental and "section" in views:
+        section_path = os.path.join(output_dir, _VIEW_FILES["section"])
+        render_markdown_incremental(routine_df, section_path, rules, ctx, split, index, clock)
+        if split:
+            folder = os.path.join(output_dir, _VIEW_DIRS["section"])
+            written["section"] = [
+                os.path.join(folder, f"{_safe_name(code)}.md") for code, _ in _entities("section", index, ctx)
+            ]
+        else:
+            written["section"] = [section_path]
+        views = tuple(v for v in views if v != "section")
 
-    lines: list[str] = []
+    if not split:
+        for view in views:
+            path = os.path.join(output_dir, _VIEW_FILES[view])
+            _write_chunks(path, iter_markdown(routine_df, rules, ctx, view, index, clock))
+            written[view] = [path]
+        return written
 
-    # Build lookup dicts for fast access
-    subj_name = dict(zip(subjects_df["id"].astype(str), subjects_df["name"]))
-    teacher_code = dict(zip(teachers_df["id"].astype(str), teachers_df["code"]))
-    room_no = dict(zip(rooms_df["id"].astype(str), rooms_df["room_no"].astype(str)))
+    lk = _Lookups(ctx, clock)
+    jobs = []
+    for view in views:
+        folder = os.path.join(output_dir, _VIEW_DIRS[view])
+        os.makedirs(folder, exist_ok=True)
+        written[view] = []
+        for key, cells in _entities(view, index, ctx):
+            path = os.path.join(folder, f"{_entity_file_name(view, key, lk)}.md")
+            written[view].append(path)
+            jobs.append((path, _BLOCKS[view], key, cells))
+        _prune_stale(folder, written[view])
+
+    def write(job) -> None:
+        path, block, key, cells = job
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write("\n".join(block(key, cells, lk, rules)))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        list(pool.map(write, jobs))
+    return written
+
+
+# ---------------------------------------------------------------------------
+# Incremental section rendering
+# ---------------------------------------------------------------------------
+
+MANIFEST_SUFFIX = ".manifest.json"
+_SPLIT_MANIFEST = ".manifest.json"
+
+
+def _digest(value) -> str:
+    return hashlib.sha1(repr(value).encode("utf-8")).hexdigest()
+
+
+_HASH_COLUMNS = ["section_code", "day", "period", "subject_id", "teacher_id"]
+
+
+def _section_hashes(routine_df: pd.DataFrame) -> Dict[str, str]:
+    """Order-independent content hash of each section's routine rows.
+
+    Row hashes are computed vectorised and summed per section together with
+    the row count, so the cost is one array pass rather than per-row Python.
+    """
+    if routine_df.empty:
+        return {}
+    rows = routine_df[_HASH_COLUMNS].astype(str)
+    grouped = pd.Series(
+        pd.util.hash_pandas_object(rows, index=False).to_numpy(),
+        index=rows["section_code"].to_numpy(),
+    ).groupby(level=0, sort=False).agg(["sum", "size"])
+    return {
+        str(code): f"{h:016x}-{n}"
+        for code, h, n in zip(grouped.index, grouped["sum"], grouped["size"])
+    }
+
+
+def _render_fingerprint(lk: _Lookups, rules: RoutineRules) -> str:
+    """Hash of everything besides the routine rows that affects section output."""
+    meta = sorted(
+        (str(code), str(r.get("grp_code", "")), str(r.get("room_id", "")))
+        for code, r in lk.section_meta.items()
+    )
+    parts = (
+        rules.model_dump_json(),
+        sorted(lk.subj_name.items()),
+        sorted(lk.teacher_code.items()),
+        sorted(lk.room_no.items()),
+        meta,
+    )
+    if lk.clock is not None:
+        parts += (lk.clock.fingerprint(),)
+    return _digest(parts)
 
-    days = rules.days
 
-    # Determine section codes from routine or from sections table
-    if not routine_df.empty:
-        section_codes = routine_df["section_code"].unique().tolist()
-    else:
-        section_codes = sections_df["code"].tolist() if "code" in sections_df.columns else []
-
-    for sec_code in section_codes:
-        # Metadata
-        sec_row = sections_df[sections_df["code"] == sec_code]
-        room_label = ""
-        grp_label = ""
-        if not sec_row.empty:
-            r = sec_row.iloc[0]
-            if "room_id" in r.index and not pd.isna(r.get("room_id", None)):
-                room_label = f" — Room {room_no.get(str(int(r['room_id'])), str(r.get('room_id', '')))}"
-            grp_label = str(r.get("grp_code", ""))
-
-        lines.append(f"# Class {sec_code}{room_label}\n")
-        if grp_label:
-            lines.append(f"**Group:** {grp_label}  ")
-        lines.append("")
-
-        # Table header
-        header = "| Period | " + " | ".join(days) + " |"
-        separator = "|--------|" + "|".join(["------------------------"] * len(days)) + "|"
-        lines.append(header)
-        lines.append(separator)
-
-        sec_df = routine_df[routine_df["section_code"] == sec_code] if not routine_df.empty else pd.DataFrame()
-
-        for period in rules.periods:
-            row_cells = [str(period)]
-            for day in days:
-                slot = (
-                    sec_df[(sec_df["day"] == day) & (sec_df["period"] == period)]
-                    if not sec_df.empty
-                    else pd.DataFrame()
-                )
-                if slot.empty:
-                    row_cells.append("—")
-                else:
-                    s = slot.iloc[0]
-                    sub = subj_name.get(str(s.get("subject_id", "")), str(s.get("subject_id", "—")))
-                    tcode = teacher_code.get(str(s.get("teacher_id", "")), str(s.get("teacher_id", "")))
-                    cell = f"{sub} ({tcode})" if tcode else sub
-                    row_cells.append(cell)
-
-            lines.append("| " + " | ".join(row_cells) + " |")
-
-            # Insert break row after break_after_period
-            if period == rules.break_after_period:
-                break_cells = [rules.break_label] + [f"{rules.break_duration_min} Min"] * len(days)
-                lines.append("| " + " | ".join(break_cells) + " |")
-
-        lines.append("")
-
-    content = "\n".join(lines)
+def _read_manifest(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(path: str, manifest: dict) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(json.dumps(manifest, separators=(",", ":")))
+    os.replace(tmp, path)
+
+
+@timed("render")
+def render_markdown_incremental(
+    routine_df: pd.DataFrame,
+    output_path: str = _OUTPUT_PATH,
+    rules: RoutineRules | None = None,
+    context: dict | None = None,
+    split: bool = False,
+    index: RoutineIndex | None = None,
+    clock: PeriodClock | None = None,
+) -> Dict[str, int]:
+    """Re-render only the sections whose routine rows changed since the last run.
+
+    A sidecar manifest records a content hash per section (next to
+    output_path, or inside the per-section folder with ``split``).  Sections
+    whose hash is unchanged are copied from the existing document (or their
+    file is left alone); the rest are rendered.  Any change to the rules or
+    reference labels, or a document edited outside the renderer, triggers a
+    full render.  The output is identical to render_markdown's.
+
+    Returns counts of ``rendered``, ``reused`` and ``removed`` sections.
+    """
+    if rules is None:
+        rules = RoutineRules()
+    ctx = context if context is not None else load_context()
+    if index is None:
+        index = build_routine_index(routine_df, ("section",))
+    lk = _Lookups(ctx, clock)
+    fingerprint = _render_fingerprint(lk, rules)
+    entities = _entities("section", index, ctx)
+    by_section = _section_hashes(routine_df)
+    hashes = [by_section.get(str(code), "empty") for code, _ in entities]
+    if split:
+        return _render_split_incremental(output_path, entities, hashes, fingerprint, lk, rules)
+
+    manifest_path = output_path + MANIFEST_SUFFIX
+    manifest = _read_manifest(manifest_path)
+    old: Dict[str, dict] = {}
+    old_doc = b""
+    if manifest.get("fingerprint") == fingerprint and os.path.exists(output_path):
+        st = os.stat(output_path)
+        if [st.st_size, st.st_mtime_ns] == manifest.get("doc"):
+            with open(output_path, "rb") as fh:
+                old_doc = fh.read()
+            old = {e["code"]: e for e in manifest.get("sections", [])}
+
+    stats = {"rendered": 0, "reused": 0, "removed": len(set(old) - {str(k) for k, _ in entities})}
+    records = []
+    offset = 0
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as fh:
-        fh.write(content)
-    return content
+    tmp = output_path + ".tmp"
+    with open(tmp, "wb") as fh:
+        for i, ((code, cells), digest) in enumerate(zip(entities, hashes)):
+            prev = old.get(str(code))
+            if prev is not None and prev["hash"] == digest:
+                body = old_doc[prev["offset"]:prev["offset"] + prev["length"]]
+                stats["reused"] += 1
+            else:
+                body = "\n".join(_section_block(code, cells, lk, rules)).encode("utf-8")
+                stats["rendered"] += 1
+            if i:
+                fh.write(b"\n")
+                offset += 1
+            fh.write(body)
+            records.append({"code": str(code), "hash": digest, "offset": offset, "length": len(body)})
+            offset += len(body)
+    os.replace(tmp, output_path)
+
+    st = os.stat(output_path)
+    _write_manifest(manifest_path, {
+        "fingerprint": fingerprint,
+        "doc": [st.st_size, st.st_mtime_ns],
+        "sections": records,
+    })
+    return stats
+
+
+def _render_split_incremental(
+    output_path: str,
+    entities: list,
+    hashes: List[str],
+    fingerprint: str,
+    lk: _Lookups,
+    rules: RoutineRules,
+) -> Dict[str, int]:
+    folder = os.path.join(os.path.dirname(output_path), _VIEW_DIRS["section"])
+    os.makedirs(folder, exist_ok=True)
+    manifest_path = os.path.join(folder, _SPLIT_MANIFEST)
+    manifest = _read_manifest(manifest_path)
+    old = manifest.get("sections", {}) if manifest.get("fingerprint") == fingerprint else {}
+
+    stats = {"rendered": 0, "reused": 0, "removed": 0}
+    current = {}
+    for (code, cells), digest in zip(entities, hashes):
+        path = os.path.join(folder, f"{_safe_name(code)}.md")
+        current[str(code)] = digest
+        if old.get(str(code)) == digest and os.path.exists(path):
+            stats["reused"] += 1
+            continue
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write("\n".join(_section_block(code, cells, lk, rules)))
+        stats["rendered"] += 1
+    for code in set(manifest.get("sections", {})) - set(current):
+        path = os.path.join(folder, f"{_safe_name(code)}.md")
+        if os.path.exists(path):
+            os.remove(path)
+            stats["removed"] += 1
+
+    _write_manifest(manifest_path, {"fingerprint": fingerprint, "sections": current})
+    return stats
+
+
+def _safe_name(label) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", str(label)) or "_"
+
+
+def _entity_file_name(view: str, key, lk: _Lookups) -> str:
+    """File stem of one entity's split file.
+
+    Teacher codes and room numbers need not be unique, so the ID is kept
+    next to the label: ``T00001-17.md``.  Section codes are the key itself.
+    """
+    if view == "section":
+        return _safe_name(key)
+    label = lk.teacher(key) if view == "teacher" else lk.room(key)
+    return _safe_name(f"{label}-{key}" if label != str(key) else label)
+
+
+def _prune_stale(folder: str, keep: List[str]) -> None:
+    """Delete .md files in folder that the current render did not write."""
+    keep_names = {os.path.basename(path) for path in keep}
+    for name in os.listdir(folder):
+        if name.endswith(".md") and name not in keep_names:
+            os.remove(os.path.join(folder, name))
+
+
+def _write_chunks(path: str, chunks) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        for chunk in chunks:
+            fh.write(chunk)
@@ -0,0 +1,115 @@
+"""metrics.py – opt-in timings for model calls, tools, validation, rendering and loading."""
+import functools
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, TextIO, Tuple
+
+
+class Metrics:
+    """Aggregated timings per (kind, name), optionally streamed as JSON lines.
+
+    Disabled by default: record() and the timed() wrappers then return after
+    a single attribute check.  Each event is one JSON object with ``kind``,
+    ``name``, ``seconds``, a wall-clock ``ts`` and any extra fields (model
+    token counts, tool errors).  Only the aggregates are kept in memory.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._totals: Dict[Tuple[str, str], List[float]] = {}
+        self._tokens: Dict[str, int] = {"input_tokens": 0, "output_tokens": 0}
+        self._sink: TextIO | None = None
+
+    def enable(self, jsonl_path: str | None = None) -> None:
+        """Start recording; events are also appended to jsonl_path if given."""
+        self.enabled = True
+        if jsonl_path:
+            self._sink = open(jsonl_path, "a", encoding="utf-8")
+
+    def disable(self) -> None:
+        self.enabled = False
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._totals.clear()
+            self._tokens = {"input_tokens": 0, "output_tokens": 0}
+
+    def record(self, kind: str, name: str, seconds: float, **fields: Any) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            # [count, total seconds, max seconds]
+            agg = self._totals.setdefault((kind, name), [0, 0.0, 0.0])
+            agg[0] += 1
+            agg[1] += seconds
+            agg[2] = max(agg[2], seconds)
+            for key in self._tokens:
+                self._tokens[key] += fields.get(key) or 0
+            if self._sink is not None:
+                event = {"ts": round(time.time(), 3), "kind": kind, "name": name,
+                         "seconds": round(seconds, 6), **fields}
+                self._sink.write(json.dumps(event, default=str) + "\n")
+                self._sink.flush()
+
+    def summary(self) -> List[dict]:
+        """One row per (kind, name): count, total_s, mean_ms, max_ms."""
+        with self._lock:
+            items = sorted(self._totals.items(), key=lambda kv: (kv[0][0], -kv[1][1]))
+        return [
+            {"kind": kind, "name": name, "count": n, "total_s": total,
+             "mean_ms": total / n * 1000, "max_ms": peak * 1000}
+            for (kind, name), (n, total, peak) in items
+        ]
+
+    def report(self) -> str:
+        """The summary as a fixed-width table, plus model token totals."""
+        rows = self.summary()
+        if not rows:
+            return "Metrics: nothing recorded."
+        width = max(len(r["name"]) for r in rows)
+        lines = [f"{'kind':<8} {'name':<{width}} {'count':>6} {'total s':>9} {'mean ms':>9} {'max ms':>9}"]
+        for r in rows:
+            lines.append(
+                f"{r['kind']:<8} {r['name']:<{width}} {r['count']:>6} {r['total_s']:>9.3f} "
+                f"{r['mean_ms']:>9.1f} {r['max_ms']:>9.1f}"
+            )
+        if self._tokens["input_tokens"] or self._tokens["output_tokens"]:
+            lines.append(
+                f"Model tokens: {self._tokens['input_tokens']} in, {self._tokens['output_tokens']} out."
+            )
+        return "\n".join(lines)
+
+
+METRICS = Metrics()
+
+
+def timed(kind: str, name: str | None = None) -> Callable:
+    """Decorator recording each call's duration in METRICS when it is enabled."""
+
+    def decorate(fn: Callable) -> Callable:
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not METRICS.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                METRICS.record(kind, label, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorate
+
+
+def model_usage(message: Any) -> dict:
+    """input/output token counts reported by the provider, if any."""
+    usage = getattr(message, "usage_metadata", None) or {}
+    return {"input_tokens": usage.get("input_tokens"), "output_tokens": usage.get("output_tokens")}
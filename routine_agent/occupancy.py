@@ -0,0 +1,188 @@
+"""occupancy.py – per-teacher/room/section bitmasks over the day × period grid."""
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .config import RoutineRules
+from .routine_store import BaseRoutineStore, SlotKey, norm_id
+
+KINDS = ("teacher", "room", "section")
+_COLUMNS = {"teacher": "teacher_id", "room": "room_id", "section": "section_code"}
+
+
+class OccupancyIndex:
+    """Busy cells of every teacher, room and section as one uint64 each.
+
+    Bit ``d * len(periods) + p`` is set when the entity has a slot on
+    ``rules.days[d]`` period ``rules.periods[p]``.  Masks live in one NumPy
+    array per kind, indexed by a dense row number per ID, so "who is free at
+    this cell" and per-day load counts are single array operations.
+
+    Built from a store with from_store(), the index subscribes to it and
+    updates only the touched bits on each change.  Teachers, rooms and
+    sections of ``context`` are registered up front (teachers with their
+    department); IDs first seen in the routine are added as they appear.
+    """
+
+    def __init__(self, rules: RoutineRules | None = None, context: dict | None = None) -> None:
+        self.rules = rules or RoutineRules()
+        self.days = list(self.rules.days)
+        self.periods = list(self.rules.periods)
+        self.n_cells = len(self.days) * len(self.periods)
+        if self.n_cells > 64:
+            raise ValueError(f"The grid has {self.n_cells} cells; OccupancyIndex supports at most 64.")
+        self.full_mask = (1 << self.n_cells) - 1
+        self._day_idx = {d: i for i, d in enumerate(self.days)}
+        self._period_idx = {p: i for i, p in enumerate(self.periods)}
+        self._rows: Dict[str, Dict[str, int]] = {k: {} for k in KINDS}
+        self._labels: Dict[str, List[str]] = {k: [] for k in KINDS}
+        self._masks: Dict[str, np.ndarray] = {k: np.zeros(16, dtype=np.uint64) for k in KINDS}
+        self._departments: List[str] = []
+        # object arrays of labels/departments for vectorised filters; rebuilt after new IDs
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._store: BaseRoutineStore | None = None
+        if context is not None:
+            self._register_context(context)
+
+    @classmethod
+    def from_store(
+        cls,
+        store: BaseRoutineStore,
+        rules: RoutineRules | None = None,
+        context: dict | None = None,
+    ) -> "OccupancyIndex":
+        """Index the store's current slots and follow its later changes."""
+        index = cls(rules, context)
+        index.load(store.to_dataframe())
+        index._store = store
+        store.subscribe(index._on_change)
+        return index
+
+    def close(self) -> None:
+        """Stop listening to the store."""
+        if self._store is not None:
+            self._store.unsubscribe(self._on_change)
+            self._store = None
+
+    def load(self, df: pd.DataFrame) -> None:
+        """Set the bits of every in-grid slot of a routine DataFrame."""
+        if df.empty:
+            return
+        day = df["day"].map(self._day_idx)
+        period = df["period"].map(self._period_idx)
+        inside = day.notna() & period.notna()
+        cells = (day[inside] * len(self.periods) + period[inside]).to_numpy(dtype=np.uint64)
+        bits = np.left_shift(np.uint64(1), cells)
+        for kind, column in _COLUMNS.items():
+            codes, uniques = pd.factorize(df.loc[inside, column].map(norm_id))
+            rows = np.array([self._row(kind, u) if u else -1 for u in uniques], dtype=np.int64)[codes]
+            present = rows >= 0
+            np.bitwise_or.at(self._masks[kind], rows[present], bits[present])
+
+    # -- queries ------------------------------------------------------------
+
+    def ids(self, kind: str) -> List[str]:
+        return list(self._labels[kind])
+
+    def mask(self, kind: str, entity_id) -> int:
+        """Busy bitmask of one entity (0 for an unknown ID)."""
+        row = self._rows[kind].get(norm_id(entity_id))
+        return 0 if row is None else int(self._masks[kind][row])
+
+    def bit(self, day: str, period: int) -> int:
+        """The bit of a (day, period) cell; ValueError outside the grid."""
+        if day not in self._day_idx or int(period) not in self._period_idx:
+            raise ValueError(f"{day} P{period} is outside the routine grid.")
+        return 1 << (self._day_idx[day] * len(self.periods) + self._period_idx[int(period)])
+
+    def is_free(self, kind: str, entity_id, day: str, period: int) -> bool:
+        return not self.mask(kind, entity_id) & self.bit(day, period)
+
+    def cells(self, mask: int) -> List[Tuple[str, int]]:
+        """The (day, period) cells whose bits are set in mask, in grid order."""
+        n = len(self.periods)
+        return [(self.days[c // n], self.periods[c % n]) for c in range(self.n_cells) if mask >> c & 1]
+
+    def free_cells(self, teacher_id="", room_id="", section_code="") -> List[Tuple[str, int]]:
+        """Cells where every given teacher, room and section is free."""
+        busy = 0
+        for kind, entity_id in (("teacher", teacher_id), ("room", room_id), ("section", section_code)):
+            if norm_id(entity_id):
+                busy |= self.mask(kind, entity_id)
+        return self.cells(self.full_mask & ~busy)
+
+    def free(self, kind: str, day: str, period: int, department: str | None = None) -> List[str]:
+        """IDs of kind free at (day, period); teachers can be limited to a department."""
+        n = len(self._labels[kind])
+        keep = (self._masks[kind][:n] & np.uint64(self.bit(day, period))) == 0
+        if department is not None and kind == "teacher":
+            keep &= self._array("departments", self._departments) == department
+        return self._array(kind, self._labels[kind])[keep].tolist()
+
+    def day_loads(self, kind: str) -> pd.DataFrame:
+        """Busy periods per day: one row per ID of kind, one column per day."""
+        n = len(self._labels[kind])
+        shifts = np.arange(self.n_cells, dtype=np.uint64)
+        bits = (self._masks[kind][:n, None] >> shifts) & np.uint64(1)
+        loads = bits.reshape(n, len(self.days), len(self.periods)).sum(axis=2)
+        return pd.DataFrame(loads, index=pd.Index(self._labels[kind], name=f"{kind}_id"), columns=self.days)
+
+    def department(self, teacher_id) -> str | None:
+        row = self._rows["teacher"].get(norm_id(teacher_id))
+        return None if row is None else self._departments[row]
+
+    # -- maintenance --------------------------------------------------------
+
+    def _array(self, name: str, values: list) -> np.ndarray:
+        arr = self._arrays.get(name)
+        if arr is None or len(arr) != len(values):
+            arr = self._arrays[name] = np.asarray(values, dtype=object)
+        return arr
+
+    def _register_context(self, context: dict) -> None:
+        teachers = context.get("teachers")
+        if teachers is not None:
+            for tid, dept in zip(teachers["id"], teachers["department"]):
+                self._departments[self._row("teacher", tid)] = None if pd.isna(dept) else str(dept)
+        rooms = context.get("rooms")
+        if rooms is not None:
+            for rid in rooms["id"]:
+                self._row("room", rid)
+        sections = context.get("sections")
+        if sections is not None:
+            for code in sections["code"]:
+                self._row("section", code)
+
+    def _row(self, kind: str, entity_id) -> int:
+        """Row of an ID, adding it (and growing the array) on first sight."""
+        key = norm_id(entity_id)
+        row = self._rows[kind].get(key)
+        if row is None:
+            row = self._rows[kind][key] = len(self._labels[kind])
+            self._labels[kind].append(key)
+            if kind == "teacher":
+                self._departments.append(None)
+            masks = self._masks[kind]
+            if row >= len(masks):
+                self._masks[kind] = np.concatenate([masks, np.zeros(len(masks), dtype=np.uint64)])
+        return row
+
+    def _on_change(self, key: SlotKey, old: dict | None, new: dict | None) -> None:
+        section, day, period = key
+        if day not in self._day_idx or period not in self._period_idx:
+            return
+        bit = self.bit(day, period)
+        self._set("section", section, bit, new is not None)
+        for kind, lookup in (("teacher", self._store.teacher_slots), ("room", self._store.room_slots)):
+            column = _COLUMNS[kind]
+            for entity_id in {s[column] for s in (old, new) if s is not None and s[column]}:
+                # another section may still hold the cell (a conflict), so ask the store
+                self._set(kind, entity_id, bit, bool(lookup(day, period, entity_id)))
+
+    def _set(self, kind: str, entity_id, bit: int, busy: bool) -> None:
+        row = self._row(kind, entity_id)
+        if busy:
+            self._masks[kind][row] |= np.uint64(bit)
+        else:
+            self._masks[kind][row] &= np.uint64(self.full_mask & ~bit)
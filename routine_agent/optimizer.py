@@ -0,0 +1,291 @@
+"""optimizer.py – improve a routine on soft constraints by simulated annealing.
+
+validate_routine checks the hard rules; this module scores how pleasant a
+routine is and searches for a better one.  The soft constraints are:
+
+* idle gaps – free periods between a teacher's first and last lesson of a day;
+* repeated subjects – a section having the same subject more than once a day;
+* load spread – a teacher's busiest day minus their quietest day;
+* room changes – consecutive lessons of a section held in different rooms.
+
+A move exchanges the lessons in two cells of one section (swap_slots), or
+moves a lesson to an empty cell of the section (move_slot).  It is only
+tried when the teachers and rooms it moves are free at their new cells, so
+the optimiser never adds a teacher or room conflict, and subjects, teachers
+and rooms stay with their section.  Each move is scored by recomputing only
+the entries it touches: the two days of the section and, for each teacher
+involved, those two days and the daily spread.
+"""
+import math
+import random
+import time
+from typing import Dict, List, NamedTuple, Tuple
+
+import pandas as pd
+
+from .config import RoutineRules
+from .metrics import timed
+from .routine_store import ROUTINE_COLUMNS, norm_id
+
+Lesson = Tuple[str, str, str, str]  # (subject_id, teacher_id, room_id, shift_log_id)
+
+
+class SoftWeights(NamedTuple):
+    idle_gaps: float = 1.0
+    repeated_subjects: float = 3.0
+    load_spread: float = 1.0
+    room_changes: float = 2.0
+
+
+class SoftScore(NamedTuple):
+    idle_gaps: int
+    repeated_subjects: int
+    load_spread: int
+    room_changes: int
+    total: float  # weighted sum; lower is better
+
+
+class OptimizeResult(NamedTuple):
+    routine: pd.DataFrame
+    before: SoftScore
+    after: SoftScore
+    iterations: int
+    accepted: int
+    seconds: float
+
+
+def score_routine(
+    df: pd.DataFrame,
+    rules: RoutineRules | None = None,
+    weights: SoftWeights | None = None,
+) -> SoftScore:
+    """Soft-constraint score of a routine (see the module docstring)."""
+    return _State(df, rules or RoutineRules()).score(weights or SoftWeights())
+
+
+@timed("optimize")
+def optimize_routine(
+    df: pd.DataFrame,
+    rules: RoutineRules | None = None,
+    weights: SoftWeights | None = None,
+    seconds: float = 5.0,
+    iterations: int | None = None,
+    seed: int = 0,
+    start_temperature: float = 2.0,
+    end_temperature: float = 0.05,
+) -> OptimizeResult:
+    """Lower the soft-constraint score of a routine by simulated annealing.
+
+    Args:
+        df: Routine with ROUTINE_COLUMNS; it is not modified.
+        rules: Day/period grid; defaults to RoutineRules().
+        weights: Weight of each soft constraint in the total.
+        seconds: Time budget.
+        iterations: Number of candidate moves.  When given, the temperature
+            follows the iteration count, so the same seed and iterations
+            give the same routine unless the time budget runs out first;
+            otherwise it follows the elapsed time.
+        seed: Seed for the move sampler.
+        start_temperature: Initial temperature, in weighted score units.
+        end_temperature: Temperature at the end of the budget.
+
+    Returns:
+        An OptimizeResult with the best routine found (ordered by section,
+        day, period) and its score before and after.  Rows outside the
+        day/period grid are passed through unchanged at the end.
+    """
+    rules = rules or RoutineRules()
+    weights = weights or SoftWeights()
+    state = _State(df, rules)
+    before = state.score(weights)
+    rng = random.Random(seed)
+    sections = [s for s in state.order if any(state.grid[s])]
+    cells = len(rules.days) * len(rules.periods)
+
+    started = time.perf_counter()
+    current = best = before.total
+    trail: List[Tuple[str, int, int]] = []  # accepted moves since the best routine
+    temperature = start_temperature
+    done = accepted = 0
+    while sections and cells > 1 and (iterations is None or done < iterations):
+        if done % 64 == 0:
+            elapsed = time.perf_counter() - started
+            if elapsed >= seconds:
+                break
+            progress = done / iterations if iterations else elapsed / seconds
+            temperature = start_temperature * (end_temperature / start_temperature) ** progress
+        done += 1
+        sec = rng.choice(sections)
+        i = rng.randrange(cells)
+        j = rng.randrange(cells - 1)
+        j += j >= i
+        if not state.feasible(sec, i, j):
+            continue
+        delta = state.swap(sec, i, j, weights)
+        if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+            accepted += 1
+            current += delta
+            trail.append((sec, i, j))
+            if current < best - 1e-9:
+                best = current
+                trail.clear()
+        else:
+            state.swap(sec, i, j, weights)
+
+    # a swap is its own inverse: undo the moves made after the best routine
+    for sec, i, j in reversed(trail):
+        state.swap(sec, i, j, weights)
+    return OptimizeResult(
+        state.to_dataframe(), before, state.score(weights), done, accepted, time.perf_counter() - started
+    )
+
+
+class _State:
+    """A routine as one grid of lessons per section, with teacher and room occupancy.
+
+    Cells are numbered day index × len(periods) + period index.
+    """
+
+    def __init__(self, df: pd.DataFrame, rules: RoutineRules) -> None:
+        self.rules = rules
+        self.n_days = len(rules.days)
+        self.n_periods = len(rules.periods)
+        day_index = {d: i for i, d in enumerate(rules.days)}
+        period_index = {p: i for i, p in enumerate(rules.periods)}
+        cells = self.n_days * self.n_periods
+
+        self.grid: Dict[str, List[Lesson | None]] = {}
+        self.order: List[str] = []
+        self.outside: List[dict] = []  # rows off the grid or repeating a cell
+        self.teacher_busy: Dict[Tuple[str, int], int] = {}
+        self.room_busy: Dict[Tuple[str, int], int] = {}
+        self.teacher_load: Dict[str, List[int]] = {}
+        self.teacher_mask: Dict[Tuple[str, int], int] = {}
+
+        columns = [df[c].tolist() for c in ROUTINE_COLUMNS] if not df.empty else [[]] * len(ROUTINE_COLUMNS)
+        for sec, day, period, subject, teacher, room, shift_log in zip(*columns):
+            sec = str(sec)
+            lesson = (norm_id(subject), norm_id(teacher), norm_id(room), norm_id(shift_log))
+            if sec not in self.grid:
+                self.grid[sec] = [None] * cells
+                self.order.append(sec)
+            d = day_index.get(day)
+            p = period_index.get(_period(period))
+            if d is None or p is None or self.grid[sec][d * self.n_periods + p] is not None:
+                self.outside.append(dict(zip(ROUTINE_COLUMNS, (sec, day, period, *lesson))))
+                if d is None or p is None:
+                    continue
+            else:
+                self.grid[sec][d * self.n_periods + p] = lesson
+            self._occupy(lesson, d * self.n_periods + p, 1)
+
+    # -- occupancy ----------------------------------------------------------
+
+    def _occupy(self, lesson: Lesson, cell: int, step: int) -> None:
+        _, teacher, room, _ = lesson
+        if room:
+            key = (room, cell)
+            self.room_busy[key] = self.room_busy.get(key, 0) + step
+        if teacher:
+            key = (teacher, cell)
+            count = self.teacher_busy.get(key, 0) + step
+            self.teacher_busy[key] = count
+            d, p = divmod(cell, self.n_periods)
+            load = self.teacher_load.setdefault(teacher, [0] * self.n_days)
+            load[d] += step
+            if count == 0 or (count == 1 and step > 0):
+                self.teacher_mask[(teacher, d)] = self.teacher_mask.get((teacher, d), 0) ^ (1 << p)
+
+    def feasible(self, sec: str, i: int, j: int) -> bool:
+        """Whether exchanging cells i and j of a section adds no teacher or room clash."""
+        grid = self.grid[sec]
+        a, b = grid[i], grid[j]
+        if a is None and b is None:
+            return False
+        return self._fits(a, j, b) and self._fits(b, i, a)
+
+    def _fits(self, lesson: Lesson | None, cell: int, leaving: Lesson | None) -> bool:
+        if lesson is None:
+            return True
+        _, teacher, room, _ = lesson
+        if teacher and self.teacher_busy.get((teacher, cell), 0) - (leaving is not None and leaving[1] == teacher):
+            return False
+        if room and self.room_busy.get((room, cell), 0) - (leaving is not None and leaving[2] == room):
+            return False
+        return True
+
+    # -- scoring ------------------------------------------------------------
+
+    def swap(self, sec: str, i: int, j: int, weights: SoftWeights) -> float:
+        """Exchange cells i and j of a section; returns the change of the weighted score."""
+        grid = self.grid[sec]
+        a, b = grid[i], grid[j]
+        days = {i // self.n_periods, j // self.n_periods}
+        teachers = {lesson[1] for lesson in (a, b) if lesson is not None and lesson[1]}
+        old = self._measure(sec, days, teachers)
+        for lesson, cell in ((a, i), (b, j)):
+            if lesson is not None:
+                self._occupy(lesson, cell, -1)
+        grid[i], grid[j] = b, a
+        for lesson, cell in ((b, i), (a, j)):
+            if lesson is not None:
+                self._occupy(lesson, cell, 1)
+        new = self._measure(sec, days, teachers)
+        return sum(w * (n - o) for w, n, o in zip(weights, new, old))
+
+    def _measure(self, sec: str, days, teachers) -> Tuple[int, int, int, int]:
+        """The score terms of one section's days and some teachers' days and spread."""
+        gaps = sum(_gaps(self.teacher_mask.get((t, d), 0)) for t in teachers for d in days)
+        spread = sum(max(self.teacher_load[t]) - min(self.teacher_load[t]) for t in teachers)
+        repeats = changes = 0
+        for d in days:
+            r, c = self._section_day(sec, d)
+            repeats += r
+            changes += c
+        return gaps, repeats, spread, changes
+
+    def _section_day(self, sec: str, d: int) -> Tuple[int, int]:
+        lessons = self.grid[sec][d * self.n_periods:(d + 1) * self.n_periods]
+        subjects = [lesson[0] for lesson in lessons if lesson is not None and lesson[0]]
+        changes = sum(
+            1 for x, y in zip(lessons, lessons[1:])
+            if x is not None and y is not None and x[2] and y[2] and x[2] != y[2]
+        )
+        return len(subjects) - len(set(subjects)), changes
+
+    def score(self, weights: SoftWeights) -> SoftScore:
+        gaps = sum(_gaps(mask) for mask in self.teacher_mask.values())
+        spread = sum(max(load) - min(load) for load in self.teacher_load.values())
+        repeats = changes = 0
+        for sec in self.order:
+            for d in range(self.n_days):
+                r, c = self._section_day(sec, d)
+                repeats += r
+                changes += c
+        terms = (gaps, repeats, spread, changes)
+        return SoftScore(*terms, float(sum(w * t for w, t in zip(weights, terms))))
+
+    def to_dataframe(self) -> pd.DataFrame:
+        rows = []
+        for sec in self.order:
+            for cell, lesson in enumerate(self.grid[sec]):
+                if lesson is not None:
+                    d, p = divmod(cell, self.n_periods)
+                    rows.append((sec, self.rules.days[d], self.rules.periods[p], *lesson))
+        rows.extend(tuple(row.values()) for row in self.outside)
+        return pd.DataFrame(rows, columns=ROUTINE_COLUMNS)
+
+
+def _period(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _gaps(mask: int) -> int:
+    """Free periods between the first and last busy bit of a day."""
+    if not mask:
+        return 0
+    first = (mask & -mask).bit_length() - 1
+    return mask.bit_length() - first - mask.bit_count()
@@ -0,0 +1,173 @@
+"""partition.py – generate independent parts of a routine in parallel worker processes.
+
+Sections that can never compete for a teacher or a room are scheduled
+separately: sections are joined when any teacher is eligible for both
+(EligibilityIndex) or they are given the same room, and each connected
+group becomes one partition.  Rooms are handed out once up front (one per
+section), so partitions share no resources.  Every partition is
+generated and rendered in its own process; the results are merged in
+section order and the merged routine is validated once.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple
+
+import pandas as pd
+
+from .config import RoutineRules
+from .eligibility import EligibilityIndex
+from .generator import generate_routine, section_rooms
+from .markdown_renderer import iter_markdown
+from .metrics import timed
+from .routine_store import ROUTINE_COLUMNS
+from .validator import validate_routine
+
+
+class PartitionResult(NamedTuple):
+    sections: List[str]
+    routine: pd.DataFrame
+    blocks: Dict[str, str]  # section code -> its Markdown timetable
+    seconds: float
+
+
+class PartitionedRoutine(NamedTuple):
+    routine: pd.DataFrame
+    errors: List[str]
+    partitions: List[PartitionResult]
+    markdown: str  # section view of the whole routine, as render_markdown writes it
+
+
+def partition_sections(
+    context: dict,
+    rules: RoutineRules | None = None,
+    section_codes: List[str] | None = None,
+) -> List[List[str]]:
+    """Groups of sections that share no eligible teacher and no fixed room.
+
+    Sections are joined through the teachers EligibilityIndex allows them:
+    a teacher without a shift is in the pool of every shift, so the pools
+    of different shifts can overlap.  Groups are ordered by their first
+    section, and sections keep the order of ``context["sections"]``.
+    """
+    sections = _selected_sections(context, section_codes)
+    codes = sections["code"].astype(str).tolist()
+    eligibility = EligibilityIndex(context, rules)
+
+    # Union-find over sections, pools, teachers and rooms
+    parent: Dict[tuple, tuple] = {}
+
+    def find(node: tuple) -> tuple:
+        parent.setdefault(node, node)
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(a: tuple, b: tuple) -> None:
+        parent[find(a)] = find(b)
+
+    rooms: Dict[str, object] = {}
+    if "room_id" in sections.columns:
+        rooms = dict(zip(sections["code"].astype(str), sections["room_id"]))
+
+    pools = set()
+    for code in codes:
+        node = ("section", code)
+        find(node)
+        for subject in eligibility.section_subjects.get(code, ()):
+            key = eligibility.pool(code, subject)
+            union(node, ("pool", key))
+            if key not in pools:
+                pools.add(key)
+                for teacher in eligibility.eligible(code, subject):
+                    union(("pool", key), ("teacher", teacher))
+        room = rooms.get(code)
+        if room is not None and not pd.isna(room) and str(room):
+            union(node, ("room", str(room)))
+
+    groups: Dict[tuple, List[str]] = {}
+    for code in codes:
+        groups.setdefault(find(("section", code)), []).append(code)
+    return list(groups.values())
+
+
+@timed("generate")
+def generate_partitioned(
+    context: dict,
+    rules: RoutineRules | None = None,
+    section_codes: List[str] | None = None,
+    seed: int = 0,
+    max_workers: int | None = None,
+) -> PartitionedRoutine:
+    """Generate and render each partition in a worker process.
+
+    Args:
+        context: Dict of DataFrames from load_context().
+        rules: Day/period grid; defaults to RoutineRules().
+        section_codes: Sections to schedule; defaults to every section.
+        seed: Seed passed to generate_routine for every partition.
+        max_workers: Worker processes (default: CPU count, so a single-CPU
+            machine runs inline); 1 runs inline.
+
+    Returns:
+        The merged routine and errors, the per-partition results and the
+        section-view Markdown of the merged routine.
+    """
+    if rules is None:
+        rules = RoutineRules()
+    sections = _selected_sections(context, section_codes)
+    rooms = section_rooms(context, sections)
+    parts = partition_sections(context, rules, section_codes)
+
+    jobs = []
+    for part in parts:
+        part_sections = sections[sections["code"].astype(str).isin(part)]
+        # The generator takes the pre-assigned rooms; rendering sees the original rows
+        pinned = part_sections.assign(room_id=part_sections["code"].astype(str).map(rooms))
+        jobs.append((dict(context, sections=pinned), dict(context, sections=part_sections), rules, seed))
+    workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        results = [_run_partition(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_partition, jobs))
+
+    order = sections["code"].astype(str).tolist()
+    position = {code: i for i, code in enumerate(order)}
+    frames = [r.routine for r in results if not r.routine.empty]
+    routine = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=ROUTINE_COLUMNS)
+    if not routine.empty:
+        rank = routine["section_code"].map(position)
+        routine = routine.iloc[rank.argsort(kind="stable")].reset_index(drop=True)
+
+    blocks = {code: text for r in results for code, text in r.blocks.items()}
+    markdown = "\n".join(blocks[code] for code in order if code in blocks)
+    # One check of the merged routine also catches clashes between partitions
+    errors = validate_routine(routine, rules)
+    return PartitionedRoutine(routine, errors, results, markdown)
+
+
+def _selected_sections(context: dict, section_codes: List[str] | None) -> pd.DataFrame:
+    sections = context["sections"]
+    if section_codes:
+        unknown = set(section_codes) - set(sections["code"].astype(str))
+        if unknown:
+            raise ValueError(f"Unknown section codes: {sorted(unknown)}.")
+        sections = sections[sections["code"].astype(str).isin(section_codes)]
+    return sections
+
+
+def _run_partition(job: tuple) -> PartitionResult:
+    """Worker: generate and render one partition."""
+    context, render_context, rules, seed = job
+    start = time.perf_counter()
+    codes = context["sections"]["code"].astype(str).tolist()
+    df = generate_routine(context, rules, seed=seed)
+    chunks = iter_markdown(df, rules, render_context)
+    # iter_markdown prefixes every block after the first with the joining newline
+    blocks = {
+        code: chunk[1:] if i else chunk
+        for i, (code, chunk) in enumerate(zip(dict.fromkeys(df["section_code"]), chunks))
+    }
+    return PartitionResult(codes, df, blocks, time.perf_counter() - start)
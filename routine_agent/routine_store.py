@@ -1,5 +1,12 @@
 """routine_store.py – load, save, upsert, move and swap routine slots."""
+import itertools
+import json
+import math
 import os
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Set, Tuple
+
 import pandas as pd
 
 ROUTINE_COLUMNS = [
@@ -18,21 +25,77 @@ _DEFAULT_PATH = os.path.join(
 
 
 def load_routine(path: str = _DEFAULT_PATH) -> pd.DataFrame:
-    """Load routine CSV, returning an empty DataFrame if the file does not exist."""
+    """Load routine CSV, returning an empty DataFrame if the file does not exist.
+
+    If a slot journal (see SlotJournal) sits next to the CSV, its records are
+    replayed on top so edits from an interrupted session are recovered.
+    Either way section codes and IDs come back as strings ('' for missing),
+    as RoutineStore.to_dataframe() returns them.
+    """
     if os.path.exists(path):
         df = pd.read_csv(path)
         # Ensure all expected columns present
         for col in ROUTINE_COLUMNS:
             if col not in df.columns:
                 df[col] = None
-        return df[ROUTINE_COLUMNS]
-    return pd.DataFrame(columns=ROUTINE_COLUMNS)
+        df = df[ROUTINE_COLUMNS]
+        df["section_code"] = df["section_code"].astype(str)
+        for col in _ID_COLUMNS:
+            df[col] = df[col].map(norm_id)
+    else:
+        df = pd.DataFrame(columns=ROUTINE_COLUMNS)
+
+    journal = journal_path(path)
+    if os.path.exists(journal) and os.path.getsize(journal):
+        store = RoutineStore(df)
+        replay_journal(store, journal)
+        df = store.to_dataframe()
+    return df
 
 
 def save_routine(df: pd.DataFrame, path: str = _DEFAULT_PATH) -> None:
-    """Persist the routine DataFrame to CSV."""
+    """Persist the routine DataFrame to CSV.
+
+    The CSV is written to a temp file and renamed into place, so a crash never
+    leaves a half-written routine.  A full save supersedes the slot journal,
+    which is removed afterwards.
+    """
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    df[ROUTINE_COLUMNS].to_csv(path, index=False)
+    tmp = path + ".tmp"
+    df[ROUTINE_COLUMNS].to_csv(tmp, index=False)
+    os.replace(tmp, path)
+    journal = journal_path(path)
+    if os.path.exists(journal):
+        os.remove(journal)
+
+
+BACKENDS = ("csv", "sqlite")
+
+
+def open_store(backend: str = "csv", path: str | None = None) -> "BaseRoutineStore":
+    """Open the routine with the given storage backend.
+
+    ``csv`` loads the CSV at path (plus journal) into an in-memory
+    RoutineStore; ``sqlite`` opens the database at path.  A database file
+    created by this call is seeded from the routine_table.csv in the same
+    directory (the default CSV for ``:memory:``) if it exists; an existing
+    database is never re-seeded, even when it is empty.
+    """
+    if backend == "csv":
+        return RoutineStore.from_dataframe(load_routine(path or _DEFAULT_PATH))
+    if backend == "sqlite":
+        from .sqlite_store import SQLITE_PATH, SqliteRoutineStore
+
+        path = path or SQLITE_PATH
+        created = path == ":memory:" or not os.path.exists(path)
+        store = SqliteRoutineStore(path)
+        if created:
+            seed = _DEFAULT_PATH if path == ":memory:" else os.path.join(
+                os.path.dirname(path), os.path.basename(_DEFAULT_PATH)
+            )
+            store.replace_all(load_routine(seed))
+        return store
+    raise ValueError(f"Unknown routine backend {backend!r}; expected one of {BACKENDS}.")
 
 
 def _match(df: pd.DataFrame, section_code: str, day: str, period: int) -> pd.Series:
@@ -117,3 +180,598 @@ def swap_slots(
     df.loc[mask_a, cols] = df.loc[mask_b, cols].values
     df.loc[mask_b, cols] = tmp.values
     return df
+
+
+# ---------------------------------------------------------------------------
+# Indexed in-memory store
+# ---------------------------------------------------------------------------
+
+SlotKey = Tuple[str, str, int]
+# listener(key, old_slot, new_slot); old_slot is None on insert, new_slot on delete
+SlotListener = Callable[[SlotKey, "dict | None", "dict | None"], None]
+# listener(event) with event in {"begin", "commit", "rollback"}
+TransactionListener = Callable[[str], None]
+_ID_COLUMNS = ("subject_id", "teacher_id", "room_id", "shift_log_id")
+
+
+def norm_id(value) -> str:
+    """Normalise an ID cell to a string ('' for missing, '6' for 6 or 6.0)."""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        if math.isnan(value):
+            return ""
+        if value.is_integer():
+            return str(int(value))
+    if pd.isna(value):
+        return ""
+    return str(value).strip()
+
+
+class BaseRoutineStore(ABC):
+    """Slot-store behaviour shared by the in-memory and SQLite backends.
+
+    Subclasses implement get(), __len__, __iter__, the index lookups,
+    to_dataframe() and the two primitives _put(key, slot) -> old slot and
+    _delete(key) -> old slot; listeners, transactions and the move/swap
+    operations are built on top of those.  A backend missing any of them
+    cannot be instantiated.
+    """
+
+    def __init__(self) -> None:
+        self._listeners: List[SlotListener] = []
+        self._tx_listeners: List[TransactionListener] = []
+        self._undo: List[Tuple[SlotKey, dict | None]] | None = None
+
+    def subscribe(self, listener: SlotListener) -> None:
+        """Call listener(key, old_slot, new_slot) after every slot change."""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: SlotListener) -> None:
+        self._listeners.remove(listener)
+
+    def subscribe_transactions(self, listener: TransactionListener) -> None:
+        """Call listener("begin" | "commit" | "rollback") around transactions.
+
+        "rollback" fires after the reverse changes have been applied.
+        """
+        self._tx_listeners.append(listener)
+
+    def unsubscribe_transactions(self, listener: TransactionListener) -> None:
+        self._tx_listeners.remove(listener)
+
+    # -- transactions -------------------------------------------------------
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._undo is not None
+
+    def begin(self) -> None:
+        """Start recording changes so rollback() can undo them."""
+        if self._undo is not None:
+            raise RuntimeError("A transaction is already open on this store.")
+        self._undo = []
+        self._notify_tx("begin")
+
+    def commit(self) -> None:
+        """Keep the changes made since begin()."""
+        self._undo = None
+        self._notify_tx("commit")
+
+    def rollback(self) -> None:
+        """Undo every change made since begin(); listeners see the reverse changes."""
+        undo, self._undo = self._undo or [], None
+        for key, old in reversed(undo):
+            if old is None:
+                self.remove_slot(*key)
+            else:
+                self.upsert_slot(*key, *(old[c] for c in _ID_COLUMNS))
+        self._notify_tx("rollback")
+
+    @contextmanager
+    def transaction(self) -> Iterator["BaseRoutineStore"]:
+        """Apply the block's changes atomically: roll back if it raises."""
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    # -- read access --------------------------------------------------------
+
+    def __contains__(self, key: SlotKey) -> bool:
+        return self.get(*key) is not None
+
+    @abstractmethod
+    def __len__(self) -> int: ...
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[dict]: ...
+
+    @abstractmethod
+    def get(self, section_code: str, day: str, period: int) -> dict | None: ...
+
+    @abstractmethod
+    def section_slots(self, section_code: str) -> List[dict]: ...
+
+    @abstractmethod
+    def teacher_slots(self, day: str, period: int, teacher_id) -> Set[SlotKey]: ...
+
+    @abstractmethod
+    def room_slots(self, day: str, period: int, room_id) -> Set[SlotKey]: ...
+
+    @abstractmethod
+    def sort_keys(self, keys: Iterable[SlotKey]) -> List[SlotKey]:
+        """Keys in the store's row order."""
+
+    @abstractmethod
+    def section_codes(self) -> List[str]: ...
+
+    @abstractmethod
+    def to_dataframe(self) -> pd.DataFrame: ...
+
+    # -- mutations ----------------------------------------------------------
+
+    def upsert_slot(
+        self,
+        section_code: str,
+        day: str,
+        period: int,
+        subject_id,
+        teacher_id,
+        room_id,
+        shift_log_id="",
+    ) -> None:
+        """Insert or update a single routine slot."""
+        key = (str(section_code), day, int(period))
+        slot = {
+            "section_code": key[0],
+            "day": day,
+            "period": key[2],
+            "subject_id": norm_id(subject_id),
+            "teacher_id": norm_id(teacher_id),
+            "room_id": norm_id(room_id),
+            "shift_log_id": norm_id(shift_log_id),
+        }
+        old = self._put(key, slot)
+        self._notify(key, old, slot)
+
+    def remove_slot(self, section_code: str, day: str, period: int) -> bool:
+        """Remove a slot; returns False if there was nothing to remove."""
+        key = (str(section_code), day, int(period))
+        slot = self._delete(key)
+        if slot is None:
+            return False
+        self._notify(key, slot, None)
+        return True
+
+    def move_slot(
+        self,
+        section_code: str,
+        from_day: str,
+        from_period: int,
+        to_day: str,
+        to_period: int,
+    ) -> bool:
+        """Move a slot to a new day/period; returns False if the source is empty.
+
+        Raises ValueError if the destination is already occupied.
+        """
+        src = (str(section_code), from_day, int(from_period))
+        dst = (str(section_code), to_day, int(to_period))
+        slot = self.get(*src)
+        if slot is None:
+            return False
+        if src == dst:
+            return True
+        if dst in self:
+            raise ValueError(
+                f"Destination {section_code} {to_day} P{to_period} is already occupied."
+            )
+        self.remove_slot(*src)
+        self.upsert_slot(
+            dst[0], dst[1], dst[2],
+            slot["subject_id"], slot["teacher_id"], slot["room_id"], slot["shift_log_id"],
+        )
+        return True
+
+    def swap_slots(
+        self,
+        section_code_a: str,
+        day_a: str,
+        period_a: int,
+        section_code_b: str,
+        day_b: str,
+        period_b: int,
+    ) -> bool:
+        """Exchange the lessons held at two positions; False if either is empty."""
+        a = self.get(section_code_a, day_a, period_a)
+        b = self.get(section_code_b, day_b, period_b)
+        if a is None or b is None:
+            return False
+        payload_a = [a[c] for c in _ID_COLUMNS]
+        payload_b = [b[c] for c in _ID_COLUMNS]
+        self.upsert_slot(a["section_code"], a["day"], a["period"], *payload_b)
+        self.upsert_slot(b["section_code"], b["day"], b["period"], *payload_a)
+        return True
+
+    def fork(self) -> "ForkedRoutineStore":
+        """A copy-on-write view: reads fall through to this store, writes stay in the fork."""
+        return ForkedRoutineStore(self)
+
+    # -- storage primitives -------------------------------------------------
+
+    @abstractmethod
+    def _put(self, key: SlotKey, slot: dict) -> dict | None:
+        """Store slot at key and return the slot it replaced."""
+
+    @abstractmethod
+    def _delete(self, key: SlotKey) -> dict | None:
+        """Delete the slot at key and return it (None if there was none)."""
+
+    def _notify(self, key: SlotKey, old: dict | None, new: dict | None) -> None:
+        if self._undo is not None:
+            self._undo.append((key, old))
+        for listener in self._listeners:
+            listener(key, old, new)
+
+    def _notify_tx(self, event: str) -> None:
+        for listener in self._tx_listeners:
+            listener(event)
+
+
+class RoutineStore(BaseRoutineStore):
+    """Routine slots held in dicts keyed by (section_code, day, period).
+
+    Secondary indexes by (day, period, teacher_id), (day, period, room_id) and
+    section_code keep every lookup and mutation O(1).  ID columns are stored
+    as strings; use to_dataframe() to hand the routine to save_routine,
+    validate_routine or render_markdown.
+    """
+
+    def __init__(self, df: pd.DataFrame | None = None) -> None:
+        super().__init__()
+        self._slots: Dict[SlotKey, dict] = {}
+        self._seq: Dict[SlotKey, int] = {}
+        self._counter = itertools.count()
+        self._by_section: Dict[str, Set[SlotKey]] = {}
+        self._by_teacher: Dict[Tuple[str, int, str], Set[SlotKey]] = {}
+        self._by_room: Dict[Tuple[str, int, str], Set[SlotKey]] = {}
+        if df is not None and not df.empty:
+            for row in df[ROUTINE_COLUMNS].itertuples(index=False):
+                self.upsert_slot(*row)
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "RoutineStore":
+        return cls(df)
+
+    # -- read access --------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: SlotKey) -> bool:
+        return key in self._slots
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self._slots.values())
+
+    def get(self, section_code: str, day: str, period: int) -> dict | None:
+        """Return the slot dict at a position, or None if it is empty."""
+        return self._slots.get((str(section_code), day, int(period)))
+
+    def section_slots(self, section_code: str) -> List[dict]:
+        """All slots of a section, in routine order."""
+        keys = self._by_section.get(str(section_code), ())
+        return [self._slots[k] for k in sorted(keys, key=self._order)]
+
+    def teacher_slots(self, day: str, period: int, teacher_id) -> Set[SlotKey]:
+        """Slot keys where teacher_id teaches at (day, period)."""
+        return set(self._by_teacher.get((day, int(period), norm_id(teacher_id)), ()))
+
+    def room_slots(self, day: str, period: int, room_id) -> Set[SlotKey]:
+        """Slot keys that occupy room_id at (day, period)."""
+        return set(self._by_room.get((day, int(period), norm_id(room_id)), ()))
+
+    def sort_keys(self, keys: Iterable[SlotKey]) -> List[SlotKey]:
+        """Order slot keys as they appear in to_dataframe()."""
+        return sorted(keys, key=self._order)
+
+    def section_codes(self) -> List[str]:
+        """Section codes present in the routine, in first-seen order."""
+        return list(dict.fromkeys(k[0] for k in self._slots))
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Export the routine as a DataFrame with ROUTINE_COLUMNS."""
+        df = pd.DataFrame.from_records(list(self._slots.values()), columns=ROUTINE_COLUMNS)
+        df["period"] = df["period"].astype("int64")
+        return df
+
+    # -- storage primitives -------------------------------------------------
+
+    def _put(self, key: SlotKey, slot: dict) -> dict | None:
+        old = self._slots.get(key)
+        if old is not None:
+            self._unindex(key, old)
+        else:
+            self._seq[key] = next(self._counter)
+        self._slots[key] = slot
+        self._index(key, slot)
+        return old
+
+    def _delete(self, key: SlotKey) -> dict | None:
+        slot = self._slots.pop(key, None)
+        if slot is not None:
+            del self._seq[key]
+            self._unindex(key, slot)
+        return slot
+
+    # -- index maintenance --------------------------------------------------
+
+    def _order(self, key: SlotKey) -> int:
+        """Insertion sequence of a key (matches to_dataframe row order)."""
+        return self._seq[key]
+
+    def _index(self, key: SlotKey, slot: dict) -> None:
+        self._by_section.setdefault(key[0], set()).add(key)
+        if slot["teacher_id"]:
+            self._by_teacher.setdefault((key[1], key[2], slot["teacher_id"]), set()).add(key)
+        if slot["room_id"]:
+            self._by_room.setdefault((key[1], key[2], slot["room_id"]), set()).add(key)
+
+    def _unindex(self, key: SlotKey, slot: dict) -> None:
+        _discard(self._by_section, key[0], key)
+        if slot["teacher_id"]:
+            _discard(self._by_teacher, (key[1], key[2], slot["teacher_id"]), key)
+        if slot["room_id"]:
+            _discard(self._by_room, (key[1], key[2], slot["room_id"]), key)
+
+
+def _discard(index: dict, bucket, key: SlotKey) -> None:
+    keys = index.get(bucket)
+    if keys is not None:
+        keys.discard(key)
+        if not keys:
+            del index[bucket]
+
+
+class ForkedRoutineStore(BaseRoutineStore):
+    """Copy-on-write overlay over another store.
+
+    Only the slots a fork changes are stored in it (a deleted slot as a
+    tombstone), so many sessions can fork one loaded routine without
+    duplicating it.  Reads merge the overlay with the base through the base's
+    public API, so any backend can be forked.  The base must not change while
+    forks of it are in use.
+
+    Row order follows the base, with updated slots kept in place and new or
+    re-inserted slots appended, as in RoutineStore.
+    """
+
+    def __init__(self, base: BaseRoutineStore) -> None:
+        super().__init__()
+        self.base = base
+        self._own: Dict[SlotKey, dict | None] = {}
+        self._appended: Dict[SlotKey, None] = {}  # own keys placed after the base rows
+        self._len = len(base)
+        self._by_section: Dict[str, Set[SlotKey]] = {}
+        self._by_teacher: Dict[Tuple[str, int, str], Set[SlotKey]] = {}
+        self._by_room: Dict[Tuple[str, int, str], Set[SlotKey]] = {}
+
+    @property
+    def changes(self) -> int:
+        """Number of positions the fork overrides."""
+        return len(self._own)
+
+    # -- read access --------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[dict]:
+        own = self._own
+        for slot in self.base:
+            key = (slot["section_code"], slot["day"], slot["period"])
+            if key not in own:
+                yield slot
+            elif own[key] is not None and key not in self._appended:
+                yield own[key]
+        for key in self._appended:
+            yield own[key]
+
+    def get(self, section_code: str, day: str, period: int) -> dict | None:
+        key = (str(section_code), day, int(period))
+        if key in self._own:
+            return self._own[key]
+        return self.base.get(*key)
+
+    def section_slots(self, section_code: str) -> List[dict]:
+        keys = [(s["section_code"], s["day"], s["period"]) for s in self.base.section_slots(section_code)]
+        keys = [k for k in keys if k not in self._own]
+        return [self.get(*k) for k in self.sort_keys([*keys, *self._by_section.get(str(section_code), ())])]
+
+    def teacher_slots(self, day: str, period: int, teacher_id) -> Set[SlotKey]:
+        bucket = (day, int(period), norm_id(teacher_id))
+        keys = {k for k in self.base.teacher_slots(day, period, teacher_id) if k not in self._own}
+        return keys | self._by_teacher.get(bucket, set())
+
+    def room_slots(self, day: str, period: int, room_id) -> Set[SlotKey]:
+        bucket = (day, int(period), norm_id(room_id))
+        keys = {k for k in self.base.room_slots(day, period, room_id) if k not in self._own}
+        return keys | self._by_room.get(bucket, set())
+
+    def sort_keys(self, keys: Iterable[SlotKey]) -> List[SlotKey]:
+        keys = set(keys)
+        in_base = self.base.sort_keys(k for k in keys if k not in self._appended)
+        return in_base + [k for k in self._appended if k in keys]
+
+    def section_codes(self) -> List[str]:
+        return list(dict.fromkeys(s["section_code"] for s in self))
+
+    def to_dataframe(self) -> pd.DataFrame:
+        df = pd.DataFrame.from_records(list(self), columns=ROUTINE_COLUMNS)
+        df["period"] = df["period"].astype("int64")
+        return df
+
+    # -- storage primitives -------------------------------------------------
+
+    def _put(self, key: SlotKey, slot: dict) -> dict | None:
+        old = self.get(*key)
+        if old is None:
+            self._len += 1
+            self._appended[key] = None
+        if key in self._own and old is not None:
+            self._unindex(key, old)
+        self._own[key] = slot
+        self._index(key, slot)
+        return old
+
+    def _delete(self, key: SlotKey) -> dict | None:
+        old = self.get(*key)
+        if old is None:
+            return None
+        self._len -= 1
+        if self._own.get(key) is not None:
+            self._unindex(key, old)
+        self._appended.pop(key, None)
+        self._own[key] = None
+        return old
+
+    def _index(self, key: SlotKey, slot: dict) -> None:
+        self._by_section.setdefault(key[0], set()).add(key)
+        if slot["teacher_id"]:
+            self._by_teacher.setdefault((key[1], key[2], slot["teacher_id"]), set()).add(key)
+        if slot["room_id"]:
+            self._by_room.setdefault((key[1], key[2], slot["room_id"]), set()).add(key)
+
+    def _unindex(self, key: SlotKey, slot: dict) -> None:
+        _discard(self._by_section, key[0], key)
+        if slot["teacher_id"]:
+            _discard(self._by_teacher, (key[1], key[2], slot["teacher_id"]), key)
+        if slot["room_id"]:
+            _discard(self._by_room, (key[1], key[2], slot["room_id"]), key)
+
+
+# ---------------------------------------------------------------------------
+# Write-ahead slot journal
+# ---------------------------------------------------------------------------
+
+JOURNAL_SUFFIX = ".journal"
+
+
+def journal_path(path: str = _DEFAULT_PATH) -> str:
+    """Journal file that belongs to a routine CSV."""
+    return path + JOURNAL_SUFFIX
+
+
+def _journal_record(key: SlotKey, new: dict | None) -> dict:
+    if new is None:
+        return {"del": list(key)}
+    return {"put": [new[c] for c in ROUTINE_COLUMNS]}
+
+
+def _apply_record(store: RoutineStore, record: dict) -> None:
+    if "put" in record:
+        store.upsert_slot(*record["put"])
+    elif "del" in record:
+        store.remove_slot(*record["del"])
+    else:
+        for sub in record.get("batch", ()):
+            _apply_record(store, sub)
+
+
+def replay_journal(store: RoutineStore, path: str) -> int:
+    """Apply journal records to store; returns the number of records applied.
+
+    A torn last line (crash mid-append) is ignored.
+    """
+    applied = 0
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            _apply_record(store, record)
+            applied += 1
+    return applied
+
+
+class SlotJournal:
+    """Append every RoutineStore change to ``<routine csv>.journal``.
+
+    Each mutation costs one JSON line (written with fsync by default);
+    changes made inside a store transaction are buffered and appended as a
+    single batch record on commit, or dropped on rollback.  After
+    ``compact_every`` records the store is saved as a new CSV snapshot via
+    save_routine, which also empties the journal.  load_routine replays the
+    journal on top of the snapshot.
+    """
+
+    def __init__(
+        self,
+        store: RoutineStore,
+        path: str = _DEFAULT_PATH,
+        compact_every: int = 1000,
+        fsync: bool = True,
+    ) -> None:
+        self._store = store
+        self._path = path
+        self._compact_every = compact_every
+        self._fsync = fsync
+        self._pending: List[dict] | None = [] if store.in_transaction else None
+        self._written = 0
+        self._fh = self._open()
+        store.subscribe(self._on_change)
+        store.subscribe_transactions(self._on_transaction)
+
+    def __enter__(self) -> "SlotJournal":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop journaling and close the file (the journal is kept on disk)."""
+        self._store.unsubscribe(self._on_change)
+        self._store.unsubscribe_transactions(self._on_transaction)
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def compact(self) -> None:
+        """Write the store to the CSV snapshot and start an empty journal."""
+        self._fh.close()
+        save_routine(self._store.to_dataframe(), self._path)
+        self._fh = self._open()
+        self._written = 0
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+        return open(journal_path(self._path), "a", encoding="utf-8")
+
+    def _on_change(self, key: SlotKey, old: dict | None, new: dict | None) -> None:
+        record = _journal_record(key, new)
+        if self._pending is not None:
+            self._pending.append(record)
+        else:
+            self._append(record)
+
+    def _on_transaction(self, event: str) -> None:
+        if event == "begin":
+            self._pending = []
+            return
+        pending, self._pending = self._pending or [], None
+        if event == "commit" and pending:
+            self._append(pending[0] if len(pending) == 1 else {"batch": pending})
+
+    def _append(self, record: dict) -> None:
+        self._fh.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._fh.flush()
+        if self._fsync:
+            os.fsync(self._fh.fileno())
+        self._written += 1
+        if self._compact_every and self._written >= self._compact_every:
+            self.compact()
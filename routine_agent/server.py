@@ -0,0 +1,80 @@
+"""server.py – batch prompt files and a JSON-lines request loop over one AgentSession."""
+import json
+import sys
+import time
+from typing import Callable, List, TextIO
+
+import pandas as pd
+
+from .agent import AgentSession
+
+
+def read_prompts(path: str) -> List[str]:
+    """Prompts from a text file: one per line, blank lines and '#' comments skipped."""
+    with open(path, encoding="utf-8") as fh:
+        lines = (line.strip() for line in fh)
+        return [line for line in lines if line and not line.startswith("#")]
+
+
+def _handle(session: AgentSession, request: dict, on_save) -> dict:
+    reply = {"id": request.get("id")}
+    command = request.get("command", "prompt")
+    if command == "prompt":
+        prompt = request.get("prompt")
+        if not isinstance(prompt, str) or not prompt.strip():
+            raise ValueError("A prompt request needs a non-empty 'prompt' string.")
+        start = time.perf_counter()
+        reply["response"], _ = session.run(prompt)
+        reply["seconds"] = round(time.perf_counter() - start, 3)
+        reply["slots"] = len(session.store)
+        reply["errors"] = session.errors()
+    elif command == "validate":
+        reply["slots"] = len(session.store)
+        reply["errors"] = session.errors()
+    elif command == "save":
+        if on_save is None:
+            raise ValueError("Saving is not available in this server.")
+        reply["errors"] = on_save(session.to_dataframe())
+        reply["saved"] = True
+    else:
+        raise ValueError(f"Unknown command {command!r}; expected prompt, validate, save or shutdown.")
+    return reply
+
+
+def serve(
+    session: AgentSession,
+    infile: TextIO | None = None,
+    outfile: TextIO | None = None,
+    on_save: Callable[[pd.DataFrame], List[str]] | None = None,
+) -> int:
+    """Answer JSON-lines requests until EOF or a shutdown command.
+
+    Requests are objects with an optional ``id`` and either ``prompt`` or
+    ``command`` (``validate``, ``save`` or ``shutdown``); each gets one JSON
+    line back with the same ``id``.  Returns the number of requests served.
+    """
+    infile = infile or sys.stdin
+    outfile = outfile or sys.stdout
+    served = 0
+    for line in infile:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Each request must be a JSON object.")
+        except ValueError as exc:
+            reply = {"id": None, "error": f"Invalid request: {exc}"}
+        else:
+            if request.get("command") == "shutdown":
+                outfile.write(json.dumps({"id": request.get("id"), "stopped": True}) + "\n")
+                outfile.flush()
+                break
+            try:
+                reply = _handle(session, request, on_save)
+            except Exception as exc:
+                reply = {"id": request.get("id"), "error": str(exc)}
+        outfile.write(json.dumps(reply, default=str) + "\n")
+        outfile.flush()
+        served += 1
+    return served
@@ -0,0 +1,299 @@
+"""sqlite_store.py – routine slots in a local SQLite file with indexed conflict queries."""
+import os
+import sqlite3
+from typing import Iterable, Iterator, List, Set
+
+import pandas as pd
+
+from .config import RoutineRules
+from .metrics import timed
+from .routine_store import ROUTINE_COLUMNS, BaseRoutineStore, SlotKey, norm_id
+from .validator import CONFLICT_COLUMNS
+
+SQLITE_PATH = os.path.join(os.path.dirname(__file__), "..", "output", "routine.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS slots (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    section_code TEXT NOT NULL,
+    day TEXT NOT NULL,
+    period INTEGER NOT NULL,
+    subject_id TEXT NOT NULL DEFAULT '',
+    teacher_id TEXT NOT NULL DEFAULT '',
+    room_id TEXT NOT NULL DEFAULT '',
+    shift_log_id TEXT NOT NULL DEFAULT ''
+);
+CREATE UNIQUE INDEX IF NOT EXISTS slots_cell ON slots (section_code, day, period);
+CREATE INDEX IF NOT EXISTS slots_teacher ON slots (day, period, teacher_id);
+CREATE INDEX IF NOT EXISTS slots_room ON slots (day, period, room_id);
+"""
+
+_COLUMNS = ", ".join(ROUTINE_COLUMNS)
+_KEY = "section_code = ? AND day = ? AND period = ?"
+# Three parameters per key; stays under SQLite's historic 999-variable limit
+_KEYS_PER_QUERY = 300
+_UPSERT = (
+    f"INSERT INTO slots ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (section_code, day, period) DO UPDATE SET "
+    "subject_id = excluded.subject_id, teacher_id = excluded.teacher_id, "
+    "room_id = excluded.room_id, shift_log_id = excluded.shift_log_id"
+)
+
+# Rows of every (day, period, resource) cell used by more than one slot.  The
+# inner GROUP BY walks the (day, period, <resource>) index in order.
+_CLASH_SQL = """
+SELECT s.day, s.period, s.{col}, s.section_code
+FROM slots AS s
+JOIN (
+    SELECT day, period, {col} FROM slots INDEXED BY {index}
+    WHERE {col} != ''
+    GROUP BY day, period, {col}
+    HAVING COUNT(*) > 1
+) AS c ON s.day = c.day AND s.period = c.period AND s.{col} = c.{col}
+ORDER BY s.day, s.period, s.{col}, s.seq
+"""
+
+
+class SqliteRoutineStore(BaseRoutineStore):
+    """RoutineStore backed by an SQLite table instead of in-memory dicts.
+
+    A unique index on (section_code, day, period) and indexes on
+    (day, period, teacher_id) and (day, period, room_id) serve lookups and
+    find_conflicts().  Each mutation is committed on its own; a store
+    transaction is one SQL transaction, so rollback() (or a crash) leaves
+    the database as it was at begin().  IDs are stored as
+    strings, exactly like RoutineStore.
+    """
+
+    def __init__(self, path: str = SQLITE_PATH) -> None:
+        super().__init__()
+        self.path = path
+        self._deferred = False
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # The async agent loop runs tools on executor threads; the session lock
+        # serialises writes and the sqlite3 module is built serialized
+        # (threadsafety 3), so the connection may be shared across threads.
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, path: str = SQLITE_PATH) -> "SqliteRoutineStore":
+        """Open path and replace its contents with df (listeners are not called)."""
+        store = cls(path)
+        store.replace_all(df)
+        return store
+
+    def replace_all(self, df: pd.DataFrame) -> None:
+        """Bulk-load df in one transaction, discarding the current slots."""
+        rows = df[ROUTINE_COLUMNS].itertuples(index=False) if not df.empty else ()
+        with self._conn:
+            self._conn.execute("DELETE FROM slots")
+            self._conn.executemany(
+                _UPSERT,
+                (
+                    (str(r[0]), r[1], int(r[2]), *(norm_id(v) for v in r[3:]))
+                    for r in rows
+                ),
+            )
+
+    def close(self) -> None:
+        self._conn.close()
+
+    # -- transactions -------------------------------------------------------
+
+    def begin(self) -> None:
+        super().begin()
+        self._deferred = True
+        self._conn.execute("BEGIN")
+
+    def commit(self) -> None:
+        super().commit()
+        self._deferred = False
+        self._conn.commit()
+
+    def rollback(self) -> None:
+        """Roll back the SQL transaction; listeners see the reverse changes."""
+        undo, self._undo = self._undo or [], None
+        self._deferred = False
+        current = {key: self.get(*key) for key, _ in undo}
+        self._conn.rollback()
+        for key, old in reversed(undo):
+            self._notify(key, current[key], old)
+            current[key] = old
+        self._notify_tx("rollback")
+
+    # -- read access --------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM slots").fetchone()[0]
+
+    def __iter__(self) -> Iterator[dict]:
+        cursor = self._conn.execute(f"SELECT {_COLUMNS} FROM slots ORDER BY seq")
+        return (dict(zip(ROUTINE_COLUMNS, row)) for row in cursor)
+
+    def get(self, section_code: str, day: str, period: int) -> dict | None:
+        """Return the slot dict at a position, or None if it is empty."""
+        row = self._conn.execute(
+            f"SELECT {_COLUMNS} FROM slots WHERE {_KEY}",
+            (str(section_code), day, int(period)),
+        ).fetchone()
+        return dict(zip(ROUTINE_COLUMNS, row)) if row else None
+
+    def section_slots(self, section_code: str) -> List[dict]:
+        """All slots of a section, in routine order."""
+        cursor = self._conn.execute(
+            f"SELECT {_COLUMNS} FROM slots WHERE section_code = ? ORDER BY seq",
+            (str(section_code),),
+        )
+        return [dict(zip(ROUTINE_COLUMNS, row)) for row in cursor]
+
+    def teacher_slots(self, day: str, period: int, teacher_id) -> Set[SlotKey]:
+        """Slot keys where teacher_id teaches at (day, period)."""
+        return self._cell_keys("teacher_id", day, period, teacher_id)
+
+    def room_slots(self, day: str, period: int, room_id) -> Set[SlotKey]:
+        """Slot keys that occupy room_id at (day, period)."""
+        return self._cell_keys("room_id", day, period, room_id)
+
+    def sort_keys(self, keys: Iterable[SlotKey]) -> List[SlotKey]:
+        """Order slot keys as they appear in to_dataframe() (missing keys first)."""
+        wanted = {(str(k[0]), k[1], int(k[2])): k for k in keys}
+        seq = dict.fromkeys(wanted.values(), -1)
+        cells = list(wanted)
+        # One query per _KEYS_PER_QUERY keys: row-value IN over a VALUES list
+        for start in range(0, len(cells), _KEYS_PER_QUERY):
+            chunk = cells[start:start + _KEYS_PER_QUERY]
+            values = ", ".join(["(?, ?, ?)"] * len(chunk))
+            cursor = self._conn.execute(
+                "SELECT section_code, day, period, seq FROM slots "
+                f"WHERE (section_code, day, period) IN (VALUES {values})",
+                [v for cell in chunk for v in cell],
+            )
+            for section_code, day, period, row_seq in cursor:
+                seq[wanted[(section_code, day, period)]] = row_seq
+        return sorted(seq, key=seq.__getitem__)
+
+    def section_codes(self) -> List[str]:
+        """Section codes present in the routine, in first-seen order."""
+        cursor = self._conn.execute(
+            "SELECT section_code FROM slots GROUP BY section_code ORDER BY MIN(seq)"
+        )
+        return [row[0] for row in cursor]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Export the routine as a DataFrame with ROUTINE_COLUMNS."""
+        df = pd.read_sql_query(f"SELECT {_COLUMNS} FROM slots ORDER BY seq", self._conn)
+        df["period"] = df["period"].astype("int64")
+        return df
+
+    # -- validation ---------------------------------------------------------
+
+    def find_conflicts(self, rules: RoutineRules | None = None) -> pd.DataFrame:
+        """Same result as validator.find_conflicts, computed with indexed SQL."""
+        if rules is None:
+            rules = RoutineRules()
+        records: List[dict] = []
+        records.extend(self._clashes("teacher_id", "slots_teacher", "teacher"))
+        records.extend(self._clashes("room_id", "slots_room", "room"))
+        records.extend(self._bounds(rules))
+        return pd.DataFrame.from_records(records, columns=CONFLICT_COLUMNS)
+
+    @timed("validate", "sqlite_validate")
+    def validate(self, rules: RoutineRules | None = None) -> List[str]:
+        """Validation messages, as validate_routine returns them."""
+        return self.find_conflicts(rules)["message"].tolist()
+
+    def _clashes(self, col: str, index: str, kind: str) -> List[dict]:
+        groups: dict = {}
+        for day, period, resource, section in self._conn.execute(
+            _CLASH_SQL.format(col=col, index=index)
+        ):
+            groups.setdefault((day, period, resource), []).append(section)
+
+        records: List[dict] = []
+        for (day, period, resource_id), sections in groups.items():
+            if kind == "teacher":
+                message = (
+                    f"Teacher conflict: teacher {resource_id} assigned to multiple sections "
+                    f"{sections} on {day} period {period}."
+                )
+            else:
+                message = (
+                    f"Room conflict: room {resource_id} used by multiple sections "
+                    f"{sections} on {day} period {period}."
+                )
+            records.append(
+                {
+                    "kind": kind,
+                    "day": day,
+                    "period": period,
+                    "resource_id": resource_id,
+                    "section_codes": sections,
+                    "message": message,
+                }
+            )
+        return records
+
+    def _bounds(self, rules: RoutineRules) -> List[dict]:
+        days = ", ".join("?" * len(rules.days))
+        periods = ", ".join("?" * len(rules.periods))
+        # scan the narrower (day, period, ...) index, then fetch only the hits
+        cursor = self._conn.execute(
+            f"SELECT day, period, section_code, day NOT IN ({days}), period NOT IN ({periods}) "
+            f"FROM slots WHERE seq IN (SELECT seq FROM slots INDEXED BY slots_teacher "
+            f"WHERE day NOT IN ({days}) OR period NOT IN ({periods})) ORDER BY seq",
+            (*rules.days, *rules.periods, *rules.days, *rules.periods),
+        )
+        records: List[dict] = []
+        for day, period, section, bad_day, bad_period in cursor:
+            base = {"day": day, "period": period, "resource_id": None, "section_codes": [section]}
+            if bad_day:
+                records.append(
+                    {
+                        **base,
+                        "kind": "day",
+                        "message": f"Invalid day '{day}' for section {section}. Allowed: {rules.days}.",
+                    }
+                )
+            if bad_period:
+                records.append(
+                    {
+                        **base,
+                        "kind": "period",
+                        "message": (
+                            f"Invalid period {period} for section {section}. "
+                            f"Allowed: {rules.periods}."
+                        ),
+                    }
+                )
+        return records
+
+    # -- storage primitives -------------------------------------------------
+
+    def _cell_keys(self, col: str, day: str, period: int, resource) -> Set[SlotKey]:
+        resource = norm_id(resource)
+        if not resource:
+            return set()
+        cursor = self._conn.execute(
+            f"SELECT section_code, day, period FROM slots WHERE day = ? AND period = ? AND {col} = ?",
+            (day, int(period), resource),
+        )
+        return {tuple(row) for row in cursor}
+
+    def _put(self, key: SlotKey, slot: dict) -> dict | None:
+        old = self.get(*key)
+        self._conn.execute(_UPSERT, [slot[c] for c in ROUTINE_COLUMNS])
+        if not self._deferred:
+            self._conn.commit()
+        return old
+
+    def _delete(self, key: SlotKey) -> dict | None:
+        old = self.get(*key)
+        if old is not None:
+            self._conn.execute(f"DELETE FROM slots WHERE {_KEY}", key)
+            if not self._deferred:
+                self._conn.commit()
+        return old
@@ -0,0 +1,244 @@
+"""term_calendar.py – expand the weekly routine into dated class sessions, streamed to CSV or JSON lines."""
+import csv
+import datetime as dt
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+import pandas as pd
+
+from .config import RoutineRules
+from .metrics import timed
+from .routine_store import norm_id
+from .timing import ShiftTimetable, clock_minutes, format_minutes
+
+_WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")  # date.weekday() order
+
+
+class ClassSession(NamedTuple):
+    date: str  # ISO date
+    day: str
+    section_code: str
+    period: int | None  # None for an added session outside the period grid
+    start: str  # 'HH:MM', '' when the section has no shift
+    end: str
+    subject_id: str
+    teacher_id: str
+    room_id: str
+    shift_log_id: str
+    source: str  # "routine" or "override"
+
+
+SESSION_COLUMNS = list(ClassSession._fields)
+
+
+class Override(NamedTuple):
+    """A dated time_tables.csv row for one section."""
+
+    start: float | None  # minutes after midnight; None covers the whole day
+    end: float | None
+    subject_id: str
+    teacher_id: str
+    room_id: str
+    cancel: bool
+
+
+# date -> section_code -> overrides of that section on that date
+Overrides = Dict[dt.date, Dict[str, List[Override]]]
+
+
+def load_overrides(
+    context: dict,
+    start: dt.date | None = None,
+    end: dt.date | None = None,
+) -> Overrides:
+    """Date-specific overrides from ``context["time_tables"]``, limited to start..end.
+
+    Rows need a ``date`` and a ``sections_id``.  A row replaces the
+    section's sessions on that date whose times overlap its start–end
+    (the whole day without times), taking its subject, teacher and room;
+    ``status`` 0 cancels them instead.  A row that overlaps no session is
+    added as an extra session.
+    """
+    table = context.get("time_tables")
+    if table is None or table.empty:
+        return {}
+    dates = pd.to_datetime(table["date"], errors="coerce")
+    keep = dates.notna() & table["sections_id"].notna()
+    if start is not None:
+        keep &= dates >= pd.Timestamp(start)
+    if end is not None:
+        keep &= dates <= pd.Timestamp(end)
+    rows = table[keep]
+    sections = context["sections"]
+    code_of = dict(zip(sections["id"].map(norm_id), sections["code"].astype(str)))
+    row_dates = dates[keep]
+    starts, ends = clock_minutes(rows["start"]), clock_minutes(rows["end"])
+
+    overrides: Overrides = {}
+    for i, row in enumerate(rows.itertuples(index=False)):
+        section = code_of.get(norm_id(row.sections_id))
+        if section is None:
+            continue
+        s, e = starts.iat[i], ends.iat[i]
+        override = Override(
+            None if pd.isna(s) else float(s),
+            None if pd.isna(e) else float(e),
+            norm_id(row.subjects_id),
+            norm_id(row.teachers_id),
+            norm_id(row.class_room_id),
+            norm_id(getattr(row, "status", None)) == "0",
+        )
+        day = row_dates.iat[i].date()
+        overrides.setdefault(day, {}).setdefault(section, []).append(override)
+    return overrides
+
+
+def _template(routine_df: pd.DataFrame) -> Dict[str, List[Tuple[str, int, str, str, str]]]:
+    """Weekly slots grouped by day name, in section (first-seen) and period order."""
+    by_day: Dict[str, List[Tuple[str, int, str, str, str]]] = {}
+    if routine_df.empty:
+        return by_day
+    order = {code: i for i, code in enumerate(dict.fromkeys(routine_df["section_code"].astype(str)))}
+    columns = [routine_df[c].to_numpy() for c in ("section_code", "day", "period", "subject_id", "teacher_id", "room_id")]
+    for sec, day, period, subject, teacher, room in zip(*columns):
+        by_day.setdefault(day, []).append(
+            (str(sec), int(period), norm_id(subject), norm_id(teacher), norm_id(room))
+        )
+    for slots in by_day.values():
+        slots.sort(key=lambda s: (order[s[0]], s[1]))
+    return by_day
+
+
+def _overlaps(override: Override, start: int | None, end: int | None) -> bool:
+    if override.start is None or override.end is None:
+        return True
+    if start is None:
+        return False
+    return override.start < end and start < override.end
+
+
+def expand_routine(
+    routine_df: pd.DataFrame,
+    context: dict,
+    start: dt.date,
+    end: dt.date,
+    rules: RoutineRules | None = None,
+    timetable: ShiftTimetable | None = None,
+    overrides: Overrides | None = None,
+) -> Iterator[ClassSession]:
+    """Yield the dated sessions of the weekly routine from start to end (inclusive).
+
+    Sessions are produced day by day, so memory stays at the size of the
+    weekly template plus the overrides, however long the range.  Each
+    section follows the shift log in effect on the date (ShiftTimetable):
+    its weekends are skipped, days outside every log's validity window are
+    skipped, and period times come from that log.  Sections without a shift,
+    or whose shift has no log at all, skip ``rules.weekends`` and get
+    sessions without times.  ``overrides`` defaults to
+    load_overrides(context, start, end).
+    """
+    rules = rules or RoutineRules()
+    timetable = timetable or ShiftTimetable.from_context(context, rules)
+    if overrides is None:
+        overrides = load_overrides(context, start, end)
+    template = _template(routine_df)
+    weekends = timetable.intervals["weekends"].tolist()
+    log_ids = timetable.intervals["log_id"].tolist()
+    times: Dict[int, Dict[int, Tuple[int, int, str, str]]] = {}
+    default_weekends = set(rules.weekends)
+
+    def period_times(row: int) -> Dict[int, Tuple[int, int, str, str]]:
+        # formatted once per shift log
+        if row not in times:
+            times[row] = {
+                p: (int(s), int(e), format_minutes(s), format_minutes(e))
+                for p, s, e in zip(rules.periods, timetable.period_start[row], timetable.period_end[row])
+            }
+        return times[row]
+
+    day = start
+    while day <= end:
+        name = _WEEKDAYS[day.weekday()]
+        iso = day.isoformat()
+        todays = overrides.get(day, {})
+        used: set = set()
+        resolved: Dict[str, int | None] = {}
+        for section, period, subject, teacher, room in template.get(name, ()):
+            shift = timetable.section_shift.get(section, "")
+            if shift not in resolved:
+                resolved[shift] = timetable.resolve(shift, day) if shift else None
+            row = resolved[shift]
+            if row is not None:
+                if name in weekends[row]:
+                    continue
+            elif shift and timetable.has_logs(shift):
+                continue  # the shift's logs do not cover this date
+            elif name in default_weekends:
+                continue
+            s = e = None
+            label = ("", "")
+            log_id = ""
+            if row is not None:
+                s, e, *label = period_times(row).get(period, (None, None, "", ""))
+                log_id = log_ids[row]
+            source = "routine"
+            for i, override in enumerate(todays.get(section, ())):
+                if _overlaps(override, s, e):
+                    used.add((section, i))
+                    if override.cancel:
+                        source = None
+                        break
+                    subject = override.subject_id or subject
+                    teacher = override.teacher_id or teacher
+                    room = override.room_id or room
+                    source = "override"
+            if source is not None:
+                yield ClassSession(iso, name, section, period, label[0], label[1],
+                                   subject, teacher, room, log_id, source)
+
+        # overrides that matched no routine session are extra sessions
+        for section, rows in todays.items():
+            for i, override in enumerate(rows):
+                if (section, i) in used or override.cancel or override.start is None:
+                    continue
+                period = None
+                row = timetable.resolve(timetable.section_shift.get(section, ""), day)
+                if row is not None:
+                    period = next(
+                        (p for p, (s, e, *_) in period_times(row).items() if s <= override.start < e), None
+                    )
+                end_label = format_minutes(override.end) if override.end is not None else ""
+                yield ClassSession(iso, name, section, period, format_minutes(override.start), end_label,
+                                   override.subject_id, override.teacher_id, override.room_id,
+                                   log_ids[row] if row is not None else "", "override")
+        day += dt.timedelta(days=1)
+
+
+@timed("export")
+def write_sessions(sessions: Iterable[ClassSession], path: str, fmt: str | None = None) -> int:
+    """Stream sessions to a CSV or JSON-lines file; returns the number written.
+
+    ``fmt`` is ``csv`` or ``jsonl`` (default: from the file extension).
+    Rows are written as they are produced and the file is renamed into
+    place at the end.
+    """
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError(f"Unknown session format {fmt!r}; expected csv or jsonl.")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    count = 0
+    with open(tmp, "w", encoding="utf-8", newline="") as fh:
+        if fmt == "csv":
+            writer = csv.writer(fh)
+            writer.writerow(SESSION_COLUMNS)
+            for session in sessions:
+                writer.writerow(session)
+                count += 1
+        else:
+            for session in sessions:
+                fh.write(json.dumps(dict(zip(SESSION_COLUMNS, session)), separators=(",", ":")) + "\n")
+                count += 1
+    os.replace(tmp, path)
+    return count
@@ -0,0 +1,210 @@
+"""timing.py – shift logs as sorted date ranges and the wall-clock time of every period."""
+import bisect
+import datetime as dt
+import json
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .config import RoutineRules
+from .routine_store import norm_id
+
+_OPEN_END = np.iinfo(np.int64).max
+_EPOCH_ORDINAL = dt.date(1970, 1, 1).toordinal()
+
+
+def clock_minutes(values: pd.Series) -> pd.Series:
+    """Minutes after midnight of 'HH:MM[:SS]' strings, parsed in one pass (NaN if missing)."""
+    return pd.to_timedelta(values, errors="coerce").dt.total_seconds() / 60
+
+
+def format_minutes(minutes: int) -> str:
+    return f"{int(minutes) // 60:02d}:{int(minutes) % 60:02d}"
+
+
+def _day_numbers(values) -> np.ndarray:
+    """Dates as int64 days since the epoch."""
+    return np.asarray(pd.to_datetime(values).to_numpy(dtype="datetime64[D]"), dtype=np.int64)
+
+
+def _weekends(value) -> Tuple[str, ...]:
+    """Weekend day names from a parsed list or the raw JSON text."""
+    if isinstance(value, str):
+        value = json.loads(value) if value.strip() else []
+    return tuple(value) if isinstance(value, (list, tuple)) else ()
+
+
+class ShiftWindow(NamedTuple):
+    log_id: str
+    shift_id: str
+    start: int  # minutes after midnight
+    end: int
+    weekends: Tuple[str, ...]
+
+
+class ShiftTimetable:
+    """Shift management logs parsed once into an interval table.
+
+    ``intervals`` has one row per log with a start and end time, sorted by
+    shift and ``applicable_from``.  The log in effect for a (shift, date) is
+    the one with the latest ``applicable_from`` on or before the date, found
+    by bisecting that shift's sorted start days; a missing
+    ``applicable_to`` means the log is open-ended.
+
+    Every log's periods are precomputed: the shift window minus the break
+    (``break_duration_min`` after ``break_after_period``) is split evenly
+    over ``rules.periods``, giving ``period_start``/``period_end`` arrays of
+    shape (logs, periods) in minutes after midnight.
+    """
+
+    def __init__(
+        self,
+        shift_logs: pd.DataFrame,
+        rules: RoutineRules | None = None,
+        sections: pd.DataFrame | None = None,
+    ) -> None:
+        self.rules = rules or RoutineRules()
+        logs = pd.DataFrame({
+            "log_id": shift_logs["id"].map(norm_id),
+            "shift_id": shift_logs["shifts_id"].map(norm_id),
+            "start": clock_minutes(shift_logs["start"]),
+            "end": clock_minutes(shift_logs["end"]),
+            "from_day": pd.to_datetime(shift_logs["applicable_from"], errors="coerce"),
+            "to_day": pd.to_datetime(shift_logs["applicable_to"], errors="coerce"),
+            "weekends": shift_logs["weekends"] if "weekends" in shift_logs.columns else None,
+        })
+        logs = logs[logs["start"].notna() & logs["end"].notna() & logs["from_day"].notna()]
+        logs = logs.sort_values(["shift_id", "from_day"], kind="stable").reset_index(drop=True)
+        logs["start"] = logs["start"].astype("int64")
+        logs["end"] = logs["end"].astype("int64")
+        logs["weekends"] = [_weekends(w) for w in logs["weekends"]]
+        self.intervals = logs
+
+        self._from_days = _day_numbers(logs["from_day"])
+        self._from_list = self._from_days.tolist()  # bisect is fastest on a list
+        to_days = logs["to_day"]
+        self._to_days = np.where(to_days.isna(), _OPEN_END, _day_numbers(to_days.fillna(logs["from_day"])))
+        self._rows: Dict[str, Tuple[int, int]] = {}
+        for shift, rows in logs.groupby("shift_id", sort=False).indices.items():
+            self._rows[shift] = (int(rows[0]), int(rows[-1]) + 1)
+
+        self.period_start, self.period_end = self._period_grid(logs)
+        self.section_shift: Dict[str, str] = {}
+        if sections is not None and "shifts_id" in sections.columns:
+            self.section_shift = {
+                str(code): norm_id(shift) for code, shift in zip(sections["code"], sections["shifts_id"])
+            }
+
+    @classmethod
+    def from_context(cls, context: dict, rules: RoutineRules | None = None) -> "ShiftTimetable":
+        return cls(context["shift_logs"], rules, context.get("sections"))
+
+    def _period_grid(self, logs: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        periods = np.asarray(self.rules.periods)
+        after_break = periods > self.rules.break_after_period
+        pause = self.rules.break_duration_min if after_break.any() else 0
+        start = logs["start"].to_numpy()
+        length = (logs["end"].to_numpy() - start - pause) // max(len(periods), 1)
+        offsets = np.arange(len(periods))
+        begin = start[:, None] + offsets[None, :] * length[:, None] + after_break[None, :] * pause
+        return begin, begin + length[:, None]
+
+    # -- lookups ------------------------------------------------------------
+
+    def has_logs(self, shift_id) -> bool:
+        """Whether any shift log exists for the shift."""
+        return norm_id(shift_id) in self._rows
+
+    def resolve(self, shift_id, on: dt.date) -> int | None:
+        """Row of ``intervals`` in effect for the shift on a date (None if none)."""
+        span = self._rows.get(norm_id(shift_id))
+        if span is None:
+            return None
+        lo, hi = span
+        day = on.toordinal() - _EPOCH_ORDINAL
+        row = bisect.bisect_right(self._from_list, day, lo, hi) - 1
+        if row < lo or self._to_days[row] < day:
+            return None
+        return row
+
+    def resolve_dates(self, shift_id, dates) -> np.ndarray:
+        """resolve() for many dates at once; -1 where no log applies."""
+        days = _day_numbers(dates)
+        span = self._rows.get(norm_id(shift_id))
+        if span is None:
+            return np.full(len(days), -1, dtype=np.int64)
+        lo, hi = span
+        rows = np.searchsorted(self._from_days[lo:hi], days, side="right") - 1 + lo
+        ok = rows >= lo
+        ok[ok] &= self._to_days[rows[ok]] >= days[ok]
+        return np.where(ok, rows, -1)
+
+    def window(self, shift_id, on: dt.date) -> ShiftWindow | None:
+        """The shift's start/end and weekends on a date."""
+        row = self.resolve(shift_id, on)
+        if row is None:
+            return None
+        r = self.intervals.iloc[row]
+        return ShiftWindow(r["log_id"], r["shift_id"], int(r["start"]), int(r["end"]), r["weekends"])
+
+    def period_times(self, shift_id, on: dt.date) -> Dict[int, Tuple[int, int]]:
+        """Period → (start, end) minutes after midnight for the shift on a date."""
+        row = self.resolve(shift_id, on)
+        if row is None:
+            return {}
+        return {
+            p: (int(s), int(e))
+            for p, s, e in zip(self.rules.periods, self.period_start[row], self.period_end[row])
+        }
+
+    def clock(self, on: dt.date | None = None) -> "PeriodClock":
+        """Period times of every known section on a date (default: today)."""
+        on = on or dt.date.today()
+        frames = []
+        by_shift: Dict[str, List[str]] = {}
+        for section, shift in self.section_shift.items():
+            by_shift.setdefault(shift, []).append(section)
+        n = len(self.rules.periods)
+        for shift, sections in by_shift.items():
+            row = self.resolve(shift, on)
+            if row is None:
+                continue
+            frames.append(pd.DataFrame({
+                "section_code": np.repeat(sections, n),
+                "period": np.tile(self.rules.periods, len(sections)),
+                "start": np.tile(self.period_start[row], len(sections)),
+                "end": np.tile(self.period_end[row], len(sections)),
+            }))
+        table = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+            columns=["section_code", "period", "start", "end"]
+        )
+        return PeriodClock(on, table)
+
+
+class PeriodClock:
+    """Wall-clock start and end of every section's periods on one date.
+
+    ``table`` has columns section_code, period, start and end (minutes after
+    midnight); labels such as ``08:00–08:45`` are formatted once.
+    """
+
+    def __init__(self, on: dt.date, table: pd.DataFrame) -> None:
+        self.date = on
+        self.table = table
+        self._times: Dict[Tuple[str, int], Tuple[int, int]] = {
+            (str(sec), int(p)): (int(s), int(e))
+            for sec, p, s, e in zip(table["section_code"], table["period"], table["start"], table["end"])
+        }
+        self._labels = {key: f"{format_minutes(s)}–{format_minutes(e)}" for key, (s, e) in self._times.items()}
+
+    def interval(self, section_code, period) -> Tuple[int, int] | None:
+        return self._times.get((str(section_code), int(period)))
+
+    def label(self, section_code, period) -> str:
+        """'HH:MM–HH:MM' for a section's period ('' if its shift has no log on the date)."""
+        return self._labels.get((str(section_code), int(period)), "")
+
+    def fingerprint(self) -> list:
+        """Sorted labels, for caches of rendered output."""
+        return sorted(self._labels.items())
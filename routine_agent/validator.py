@@ -1,64 +1,274 @@
 """validator.py – check teacher conflicts, room conflicts and slot bounds."""
-from typing import List, Tuple
+from typing import List
+
+import numpy as np
 import pandas as pd
+
 from .config import RoutineRules
+from .eligibility import EligibilityIndex
+from .metrics import timed
+from .routine_store import norm_id
+from .timing import PeriodClock
 
+CONFLICT_COLUMNS = ["kind", "day", "period", "resource_id", "section_codes", "message"]
 
+
+@timed("validate")
 def validate_routine(
-    df: pd.DataFrame, rules: RoutineRules | None = None
+    df: pd.DataFrame,
+    rules: RoutineRules | None = None,
+    eligibility: EligibilityIndex | None = None,
+    clock: PeriodClock | None = None,
 ) -> List[str]:
     """Return a list of validation error strings (empty means valid)."""
+    return find_conflicts(df, rules, eligibility, clock)["message"].tolist()
+
+
+def find_conflicts(
+    df: pd.DataFrame,
+    rules: RoutineRules | None = None,
+    eligibility: EligibilityIndex | None = None,
+    clock: PeriodClock | None = None,
+) -> pd.DataFrame:
+    """Return one row per validation error with CONFLICT_COLUMNS.
+
+    ``kind`` is one of ``teacher``, ``room``, ``day`` or ``period``; with an
+    EligibilityIndex also ``eligibility`` (teacher outside the subject's
+    department, or subject outside the section's group) and ``workload``
+    (teacher over max_periods); with a PeriodClock also ``time`` (a teacher
+    or room in two periods whose wall-clock times overlap, e.g. across
+    shifts).  ``section_codes`` lists the sections involved and
+    ``message`` is the text returned by validate_routine.
+
+    A teacher or room ID that is NaN or '' means the slot has none, so such
+    slots never clash with each other.
+    """
     if rules is None:
         rules = RoutineRules()
-    errors: List[str] = []
-
-    errors.extend(_teacher_conflicts(df))
-    errors.extend(_room_conflicts(df))
-    errors.extend(_bounds_check(df, rules))
-    return errors
-
-
-def _teacher_conflicts(df: pd.DataFrame) -> List[str]:
-    errors: List[str] = []
-    if df.empty or "teacher_id" not in df.columns:
-        return errors
-    grp = df.groupby(["day", "period", "teacher_id"])
-    for (day, period, teacher_id), group in grp:
-        if len(group) > 1:
-            sections = group["section_code"].tolist()
-            errors.append(
-                f"Teacher conflict: teacher {teacher_id} assigned to multiple sections "
+    records: List[dict] = []
+    records.extend(_resource_conflicts(df, "teacher_id", "teacher"))
+    records.extend(_resource_conflicts(df, "room_id", "room"))
+    records.extend(_bounds_check(df, rules))
+    if eligibility is not None:
+        records.extend(_eligibility_check(df, eligibility))
+        records.extend(_workload_check(df, eligibility))
+    if clock is not None:
+        records.extend(_time_overlaps(df, clock, "teacher_id", "teacher"))
+        records.extend(_time_overlaps(df, clock, "room_id", "room"))
+    return pd.DataFrame.from_records(records, columns=CONFLICT_COLUMNS)
+
+
+def check_eligibility(df: pd.DataFrame, eligibility: EligibilityIndex) -> List[str]:
+    """Only the eligibility and workload messages of find_conflicts."""
+    records = _eligibility_check(df, eligibility) + _workload_check(df, eligibility)
+    return [r["message"] for r in records]
+
+
+def check_times(df: pd.DataFrame, clock: PeriodClock) -> List[str]:
+    """Only the wall-clock overlap messages of find_conflicts."""
+    records = _time_overlaps(df, clock, "teacher_id", "teacher") + _time_overlaps(df, clock, "room_id", "room")
+    return [r["message"] for r in records]
+
+
+def _present(ids: pd.Series) -> np.ndarray:
+    """Mask of non-missing IDs (RoutineStore exports missing IDs as '')."""
+    mask = ids.notna()
+    if not pd.api.types.is_numeric_dtype(ids):
+        mask &= ids.astype(str) != ""
+    return mask.to_numpy()
+
+
+def _resource_conflicts(df: pd.DataFrame, column: str, kind: str) -> List[dict]:
+    if df.empty or column not in df.columns:
+        return []
+    keys = ["day", "period", column]
+    sub = df.loc[_present(df[column]), keys + ["section_code"]]
+    if sub.empty:
+        return []
+
+    # Collapse (day, period, resource) into one int64 code and look for repeats
+    code = np.zeros(len(sub), dtype=np.int64)
+    for col in keys:
+        codes, uniques = pd.factorize(sub[col])
+        code = code * (len(uniques) + 1) + (codes + 1)
+    clashing = pd.Series(code).duplicated(keep=False).to_numpy()
+    if not clashing.any():
+        return []
+
+    records: List[dict] = []
+    groups = sub[clashing].groupby(keys, sort=True)["section_code"].agg(list)
+    for (day, period, resource_id), sections in groups.items():
+        if kind == "teacher":
+            message = (
+                f"Teacher conflict: teacher {resource_id} assigned to multiple sections "
                 f"{sections} on {day} period {period}."
             )
-    return errors
-
-
-def _room_conflicts(df: pd.DataFrame) -> List[str]:
-    errors: List[str] = []
-    if df.empty or "room_id" not in df.columns:
-        return errors
-    grp = df.groupby(["day", "period", "room_id"])
-    for (day, period, room_id), group in grp:
-        if len(group) > 1:
-            sections = group["section_code"].tolist()
-            errors.append(
-                f"Room conflict: room {room_id} used by multiple sections "
+        else:
+            message = (
+                f"Room conflict: room {resource_id} used by multiple sections "
                 f"{sections} on {day} period {period}."
             )
-    return errors
+        records.append(
+            {
+                "kind": kind,
+                "day": day,
+                "period": period,
+                "resource_id": resource_id,
+                "section_codes": sections,
+                "message": message,
+            }
+        )
+    return records
+
+
+def _time_overlaps(df: pd.DataFrame, clock: PeriodClock, column: str, kind: str) -> List[dict]:
+    """Slots of one resource on one day whose period times overlap.
+
+    Pairs in the same period are left to _resource_conflicts.
+    """
+    if df.empty or clock.table.empty or column not in df.columns:
+        return []
+    sub = df.loc[_present(df[column]), ["section_code", "day", "period", column]]
+    sub = pd.DataFrame({
+        "section_code": sub["section_code"].astype(str),
+        "day": sub["day"],
+        "period": pd.to_numeric(sub["period"], errors="coerce"),
+        "resource": sub[column].map(norm_id),
+    })
+    times = clock.table.astype({"section_code": str, "period": "int64"})
+    sub = sub.merge(times, on=["section_code", "period"], how="inner")
+    if len(sub) < 2:
+        return []
+
+    # Sorted by start, a slot overlaps an earlier one iff it starts before
+    # the latest end seen so far in its (day, resource) group
+    sub = sub.sort_values(["day", "resource", "start", "end"], kind="stable").reset_index(drop=True)
+    groups = sub.groupby(["day", "resource"], sort=False)
+    latest_end = groups["end"].cummax().groupby([sub["day"], sub["resource"]]).shift()
+    overlapping = (sub["start"] < latest_end).to_numpy()
+    if not overlapping.any():
+        return []
+
+    records: List[dict] = []
+    starts, ends, periods = sub["start"].to_numpy(), sub["end"].to_numpy(), sub["period"].to_numpy()
+    first = groups.cumcount().to_numpy()
+    for i in np.flatnonzero(overlapping):
+        for j in range(i - first[i], i):
+            if ends[j] <= starts[i] or periods[j] == periods[i]:
+                continue
+            a, b = sub.iloc[j], sub.iloc[i]
+            pa, pb = int(a["period"]), int(b["period"])
+            records.append(
+                {"kind": "time", "day": b["day"], "period": pb, "resource_id": b["resource"],
+                 "section_codes": [a["section_code"], b["section_code"]],
+                 "message": (
+                     f"Time overlap: {kind} {b['resource']} has section {a['section_code']} period {pa} "
+                     f"({clock.label(a['section_code'], pa)}) and section {b['section_code']} period {pb} "
+                     f"({clock.label(b['section_code'], pb)}) on {b['day']}."
+                 )}
+            )
+    return records
+
+
+def _bounds_check(df: pd.DataFrame, rules: RoutineRules) -> List[dict]:
+    if df.empty:
+        return []
+    bad_day = ~df["day"].isin(rules.days).to_numpy()
+    period = np.trunc(pd.to_numeric(df["period"], errors="coerce"))
+    bad_period = ~period.isin(rules.periods).to_numpy()
+
+    records: List[dict] = []
+    days, periods, sections = df["day"].to_numpy(), df["period"].to_numpy(), df["section_code"].to_numpy()
+    for i in np.flatnonzero(bad_day | bad_period):
+        base = {"day": days[i], "period": periods[i], "resource_id": None, "section_codes": [sections[i]]}
+        if bad_day[i]:
+            records.append(
+                {
+                    **base,
+                    "kind": "day",
+                    "message": f"Invalid day '{days[i]}' for section {sections[i]}. Allowed: {rules.days}.",
+                }
+            )
+        if bad_period[i]:
+            records.append(
+                {
+                    **base,
+                    "kind": "period",
+                    "message": (
+                        f"Invalid period {periods[i]} for section {sections[i]}. "
+                        f"Allowed: {rules.periods}."
+                    ),
+                }
+            )
+    return records
 
 
-def _bounds_check(df: pd.DataFrame, rules: RoutineRules) -> List[str]:
-    errors: List[str] = []
-    for _, row in df.iterrows():
-        if row["day"] not in rules.days:
-            errors.append(
-                f"Invalid day '{row['day']}' for section {row['section_code']}. "
-                f"Allowed: {rules.days}."
+def _eligibility_check(df: pd.DataFrame, index: EligibilityIndex) -> List[dict]:
+    if df.empty:
+        return []
+    sections = df["section_code"].astype(str)
+    subjects = df["subject_id"].map(norm_id)
+    teachers = df["teacher_id"].map(norm_id)
+    subject_dept = subjects.map(index.subject_department)
+    teacher_dept = teachers.map(index.teacher_department)
+
+    pairs = pd.MultiIndex.from_arrays([sections, subjects])
+    known = [(sec, subj) for sec, subjs in index.section_subjects.items() for subj in subjs]
+    outside_group = (
+        sections.isin(index.section_subjects).to_numpy()
+        & (subjects != "").to_numpy()
+        & ~pairs.isin(known)
+    )
+    wrong_dept = (
+        subject_dept.notna() & teacher_dept.notna() & (subject_dept != teacher_dept)
+    ).to_numpy()
+    teacher_shift = teachers.map(index.teacher_shift).fillna("")
+    section_shift = sections.map(index.section_shift).fillna("")
+    wrong_shift = (
+        (teacher_shift != "") & (section_shift != "") & (teacher_shift != section_shift)
+    ).to_numpy()
+
+    records: List[dict] = []
+    days, periods = df["day"].to_numpy(), df["period"].to_numpy()
+    for i in np.flatnonzero(outside_group | wrong_dept | wrong_shift):
+        sec, subj, teacher = sections.iat[i], subjects.iat[i], teachers.iat[i]
+        where = f"section {sec} on {days[i]} period {periods[i]}"
+        if outside_group[i]:
+            message = f"Eligibility: subject {subj} is not in the subject group of {where}."
+        elif not wrong_dept[i]:
+            message = (
+                f"Eligibility: teacher {teacher} works shift {teacher_shift.iat[i]}, not shift "
+                f"{section_shift.iat[i]} of {where}."
             )
-        if int(row["period"]) not in rules.periods:
-            errors.append(
-                f"Invalid period {row['period']} for section {row['section_code']}. "
-                f"Allowed: {rules.periods}."
+        else:
+            message = (
+                f"Eligibility: teacher {teacher} ({teacher_dept.iat[i]}) cannot teach subject "
+                f"{subj} ({subject_dept.iat[i]}) in {where}."
             )
-    return errors
+        records.append(
+            {"kind": "eligibility", "day": days[i], "period": periods[i],
+             "resource_id": teacher or None, "section_codes": [sec], "message": message}
+        )
+    return records
+
+
+def _workload_check(df: pd.DataFrame, index: EligibilityIndex) -> List[dict]:
+    if df.empty:
+        return []
+    load = index.workload(df)
+    over = load[load["remaining"] < 0]
+    if over.empty:
+        return []
+    teachers = df["teacher_id"].map(norm_id)
+    records: List[dict] = []
+    for row in over.itertuples(index=False):
+        sections = list(dict.fromkeys(df.loc[teachers == row.teacher_id, "section_code"]))
+        records.append(
+            {"kind": "workload", "day": None, "period": None, "resource_id": row.teacher_id,
+             "section_codes": sections,
+             "message": (
+                 f"Workload: teacher {row.teacher_id} has {row.periods} periods a week, "
+                 f"over the capacity of {row.capacity}."
+             )}
+        )
+    return records
@@ -1,54 +1,602 @@
 #!/usr/bin/env python3
-"""run_agent.py – CLI entrypoint for the agentic class routine management system."""
+"""run_agent.py – CLI entrypoint for the agentic class routine management system.
+
+Subcommands: agent, generate, validate, render, optimize, expand.  Heavy dependencies
+(pandas, langchain, langchain_groq) are imported inside the subcommand that
+needs them, so ``--help`` and the validate/render paths start quickly.
+"""
 import argparse
+import datetime as dt
+import functools
+import os
+import re
+import subprocess
 import sys
+import time
+from typing import List
+
+# Mirrors markdown_renderer.VIEWS / routine_store.BACKENDS; repeated here so
+# that building the parser does not import pandas.
+_VIEWS = ("section", "teacher", "room")
+_BACKENDS = ("csv", "sqlite")
+_LEGACY_MODES = ("--prompt", "--batch", "--serve")
+
+
+# ---------------------------------------------------------------------------
+# Subcommands
+# ---------------------------------------------------------------------------
+
+
+def cmd_agent(args: argparse.Namespace) -> int:
+    from routine_agent.agent import AgentSession
+    from routine_agent.data_context import context_size_report, load_context
+    from routine_agent.history import HISTORY_TOKEN_BUDGET, HistoryManager
+    from routine_agent.llm_cache import ReplayChatModel, ResponseCache, SessionRecorder
+    from routine_agent.server import read_prompts, serve
+
+    # In --serve mode stdout carries the JSON responses; progress goes to stderr
+    log = functools.partial(print, file=sys.stderr if args.serve else sys.stdout)
+
+    log("Loading reference data from csv_files/ …")
+    context = load_context(snapshot=args.context_snapshot)
+    size = context_size_report(context)
+    log(
+        f"Reference data in prompt: {size['compact_chars']} chars (~{size['compact_tokens']} tokens), "
+        f"full dump would be {size['full_chars']} chars (~{size['full_tokens']} tokens)."
+    )
+    cache = ResponseCache() if args.llm_cache else None
+    session = AgentSession(
+        context=context,
+        backend=args.backend,
+        llm=ReplayChatModel.from_file(args.replay) if args.replay else None,
+        history=HistoryManager(args.history_budget or HISTORY_TOKEN_BUDGET),
+        cache=cache,
+        recorder=SessionRecorder(args.record) if args.record else None,
+    )
+
+    def ask(prompt: str) -> str:
+        if args.stream:
+            import asyncio
+
+            text, _ = asyncio.run(
+                session.arun(prompt, on_text=lambda chunk: print(chunk, end="", flush=True))
+            )
+            print()
+        else:
+            text, _ = session.run(prompt)
+        return text
+
+    try:
+        if args.serve:
+            log("Serving JSON-lines requests on stdin …")
+            serve(session, on_save=lambda frame: _persist(frame, args, context, log))
+            response = "Server stopped."
+        elif args.batch:
+            prompts = read_prompts(args.batch)
+            responses = []
+            for i, prompt in enumerate(prompts, 1):
+                log(f"Running prompt {i}/{len(prompts)}: {prompt}")
+                responses.append(ask(prompt))
+            response = "\n\n".join(f"[{i}] {text}" for i, text in enumerate(responses, 1))
+        else:
+            log("Running agent …")
+            response = ask(args.prompt)
+        df = session.to_dataframe()
+    finally:
+        session.close()
+    log(session.history.report())
+    if cache is not None:
+        log(f"LLM cache: {cache.hits} hits, {cache.misses} misses.")
+
+    if not df.empty:
+        _persist(df, args, context, log)
+    else:
+        log("No routine changes made.")
+
+    log("\nAgent response:")
+    log(response)
+    return 0
+
+
+def cmd_generate(args: argparse.Namespace) -> int:
+    from routine_agent.data_context import load_context
+    from routine_agent.generator import generate_routine
+
+    print("Loading reference data from csv_files/ …")
+    context = load_context(snapshot=args.context_snapshot)
+    codes = [c.strip() for c in args.sections.split(",") if c.strip()] or None
+    if args.workers is None:
+        print("Generating routine with the constraint solver …")
+        df = generate_routine(context, section_codes=codes, seed=args.seed)
+        errors = markdown = None
+    else:
+        from routine_agent.partition import generate_partitioned
+
+        workers = args.workers or os.cpu_count() or 1
+        print(f"Generating independent partitions in {workers} worker process(es) …")
+        result = generate_partitioned(context, section_codes=codes, seed=args.seed, max_workers=workers)
+        for i, part in enumerate(result.partitions, 1):
+            print(f"  partition {i}: {len(part.sections)} sections, {part.seconds:.2f} s")
+        df, errors, markdown = result.routine, result.errors, result.markdown
+    if df.empty:
+        print("No routine changes made.")
+        return 0
+    _persist(df, args, context, print, errors, markdown)
+    print(f"\nGenerated {len(df)} slots for {df['section_code'].nunique()} sections.")
+    return 0
+
+
+def cmd_validate(args: argparse.Namespace) -> int:
+    """Validate the saved routine; exit status 1 if there are errors."""
+    eligibility = clock = None
+    if args.eligibility or args.times:
+        from routine_agent.data_context import load_context
+
+        context = load_context()
+        clock = _clock(args, context)
+    if args.eligibility:
+        from routine_agent.eligibility import EligibilityIndex
+
+        eligibility = EligibilityIndex(context, max_periods=args.max_periods)
+
+    from routine_agent.routine_store import open_store
+
+    store = open_store(args.backend)
+    if args.backend == "sqlite":
+        from routine_agent.validator import check_eligibility
+
+        count, errors = len(store), store.validate()
+        if eligibility is not None:
+            errors += check_eligibility(store.to_dataframe(), eligibility)
+        if clock is not None:
+            from routine_agent.validator import check_times
+
+            errors += check_times(store.to_dataframe(), clock)
+        store.close()
+    else:
+        from routine_agent.validator import validate_routine
+
+        df = store.to_dataframe()
+        count, errors = len(df), validate_routine(df, eligibility=eligibility, clock=clock)
+    _report_errors(errors, print)
+    print(f"{count} slots checked.")
+    return 1 if errors else 0
+
+
+def cmd_render(args: argparse.Namespace) -> int:
+    from routine_agent.data_context import load_context
+    from routine_agent.markdown_renderer import render_views
+
+    df = _load_saved(args.backend)
+    if df.empty:
+        print("Routine is empty; nothing to render.")
+        return 0
+    context = load_context(snapshot=args.context_snapshot)
+    views = _parse_views(args.views)
+    print(f"Rendering Markdown views ({', '.join(views)}) …")
+    render_views(
+        df, views, context=context, split=args.split, incremental=not args.full_render,
+        clock=_clock(args, context),
+    )
+    print("Done. See output/ directory for results.")
+    return 0
+
+
+def cmd_optimize(args: argparse.Namespace) -> int:
+    """Improve the saved routine on soft constraints and save it if the score drops."""
+    from routine_agent.data_context import load_context
+    from routine_agent.optimizer import optimize_routine
+
+    df = _load_saved(args.backend)
+    if df.empty:
+        print("Routine is empty; nothing to optimise.")
+        return 0
+    context = load_context(snapshot=args.context_snapshot)
+    print(f"Optimising for up to {args.seconds:g} s (seed {args.seed}) …")
+    result = optimize_routine(df, seconds=args.seconds, iterations=args.iterations, seed=args.seed)
+    print(f"\n{'soft constraint':<18} {'before':>8} {'after':>8}")
+    for field in result.before._fields:
+        print(f"{field.replace('_', ' '):<18} {getattr(result.before, field):>8g} {getattr(result.after, field):>8g}")
+    print(f"{result.iterations} moves tried, {result.accepted} accepted in {result.seconds:.2f} s.\n")
+    if result.after.total >= result.before.total:
+        print("No improvement found; routine left unchanged.")
+        return 0
+    _persist(result.routine, args, context, print)
+    return 0
+
+
+def cmd_expand(args: argparse.Namespace) -> int:
+    """Stream the dated sessions of a date range to CSV or JSON lines."""
+    from routine_agent.data_context import load_context
+    from routine_agent.term_calendar import expand_routine, write_sessions
+
+    if args.end < args.start:
+        print("--to must not be before --from.", file=sys.stderr)
+        return 2
+    df = _load_saved(args.backend)
+    context = load_context(snapshot=args.context_snapshot)
+    print(f"Expanding the routine from {args.start} to {args.end} …")
+    count = write_sessions(expand_routine(df, context, args.start, args.end), args.out, args.format)
+    print(f"Wrote {count} sessions to {args.out}.")
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+def _load_saved(backend: str):
+    from routine_agent.routine_store import open_store
+
+    store = open_store(backend)
+    df = store.to_dataframe()
+    if backend == "sqlite":
+        store.close()
+    return df
+
+
+def _parse_views(text: str) -> tuple:
+    return tuple(v.strip() for v in text.split(",") if v.strip())
+
+
+def _clock(args: argparse.Namespace, context: dict):
+    """PeriodClock for --times (on --date, default today), or None."""
+    if not args.times:
+        return None
+    from routine_agent.timing import ShiftTimetable
+
+    return ShiftTimetable.from_context(context).clock(args.date)
+
+
+def _report_errors(errors: List[str], log) -> None:
+    if errors:
+        log("Validation warnings:")
+        for err in errors:
+            log(f"  ⚠  {err}")
+    else:
+        log("Routine is valid (no conflicts).")
+
+
+def _persist(
+    df,
+    args: argparse.Namespace,
+    context: dict,
+    log,
+    errors: List[str] | None = None,
+    section_markdown: str | None = None,
+) -> List[str]:
+    """Validate, save and render the routine; returns the validation errors.
+
+    ``errors`` and ``section_markdown`` come from partitioned generation,
+    whose workers already rendered their sections.
+    """
+    from routine_agent.markdown_renderer import render_views, write_markdown
+
+    clock = _clock(args, context)
+    if args.backend == "sqlite":
+        from routine_agent.routine_store import open_store
+
+        store = open_store("sqlite")
+        if args.command in ("generate", "optimize"):
+            log("Saving output/routine.db …")
+            store.replace_all(df)
+        if errors is None:
+            log("Validating routine …")
+            errors = store.validate()
+        store.close()
+    elif errors is None:
+        from routine_agent.validator import validate_routine
+
+        log("Validating routine …")
+        errors = validate_routine(df)
+    if clock is not None:
+        from routine_agent.validator import check_times
+
+        errors = errors + check_times(df, clock)
+    _report_errors(errors, log)
 
-from routine_agent.agent import run_agent
-from routine_agent.data_context import load_context
-from routine_agent.markdown_renderer import render_markdown
-from routine_agent.routine_store import save_routine
-from routine_agent.validator import validate_routine
+    if args.backend == "csv":
+        from routine_agent.routine_store import save_routine
 
+        log("Saving output/routine_table.csv …")
+        save_routine(df)
+
+    views = _parse_views(args.views)
+    log(f"Rendering Markdown views ({', '.join(views)}) …")
+    if section_markdown is not None and clock is None and "section" in views and not args.split:
+        write_markdown(section_markdown)
+        views = tuple(v for v in views if v != "section")
+    if views:
+        render_views(
+            df, views, context=context, split=args.split, incremental=not args.full_render, clock=clock
+        )
+    log("Done. See output/ directory for results.")
+    return errors
+
+
+def profile_startup(argv: List[str], top: int = 15) -> int:
+    """Re-run the command under ``python -X importtime`` and report the slowest imports."""
+    cmd = [sys.executable, "-X", "importtime", os.path.abspath(__file__), *argv]
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, stderr=subprocess.PIPE, text=True)
+    wall = time.perf_counter() - start
+
+    pattern = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+    roots, other = [], []
+    for line in proc.stderr.splitlines():
+        match = pattern.match(line)
+        if match is None:
+            if not line.startswith("import time:"):
+                other.append(line)
+        elif not match.group(3):
+            # top-level import: its cumulative time includes everything below it
+            roots.append((int(match.group(2)), match.group(4)))
+    for line in other:
+        print(line, file=sys.stderr)
+
+    total = sum(us for us, _ in roots)
+    print(f"\nStartup profile ({' '.join(argv) or '(no arguments)'}):")
+    print(f"  wall time {wall:.3f} s, imports {total / 1e6:.3f} s")
+    print(f"  {'cumulative (ms)':>15}  top-level import")
+    for us, name in sorted(roots, reverse=True)[:top]:
+        print(f"  {us / 1000:15.1f}  {name}")
+    return proc.returncode
+
+
+# ---------------------------------------------------------------------------
+# Argument parsing
+# ---------------------------------------------------------------------------
+
+
+def _add_output_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--views",
+        default="section",
+        help=f"Comma-separated timetable views to render: {', '.join(_VIEWS)} (default: section).",
+    )
+    parser.add_argument(
+        "--split",
+        action="store_true",
+        help="Write one Markdown file per section/teacher/room (in parallel) instead of one file per view.",
+    )
+    parser.add_argument(
+        "--full-render",
+        action="store_true",
+        help="Re-render every section instead of only those whose slots changed.",
+    )
+
+
+def _add_timing_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--times",
+        action="store_true",
+        help="Use shift_management_logs.csv for period times: show them in the timetables and "
+        "report teachers/rooms whose periods overlap in wall-clock time.",
+    )
+    parser.add_argument(
+        "--date",
+        type=dt.date.fromisoformat,
+        default=None,
+        metavar="YYYY-MM-DD",
+        help="With --times: the date whose shift logs apply (default: today).",
+    )
+
+
+def _add_storage_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--backend",
+        choices=_BACKENDS,
+        default="csv",
+        help="Routine storage: output/routine_table.csv (csv) or output/routine.db (sqlite).",
+    )
+
+
+def _add_context_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--context-snapshot",
+        action="store_true",
+        help="Keep a pickle snapshot of the parsed csv_files/ tables for faster cold starts.",
+    )
+
+
+def _add_metrics_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Time model calls, tools, validation, rendering and loading; print a summary at the end.",
+    )
+    parser.add_argument(
+        "--metrics-jsonl",
+        metavar="PATH",
+        help="Also append every timing event to PATH as JSON lines (implies --metrics).",
+    )
 
-def main() -> None:
+
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="AI-powered class routine management agent (LangChain + Groq)."
     )
     parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Run the command under 'python -X importtime' and print the slowest imports.",
+    )
+    sub = parser.add_subparsers(dest="command", required=True, metavar="COMMAND")
+
+    agent = sub.add_parser("agent", help="Run the LLM agent on one prompt, a batch file or as a server.")
+    mode = agent.add_mutually_exclusive_group(required=True)
+    mode.add_argument(
         "--prompt",
-        required=True,
         help="Natural-language instruction for the routine agent.",
     )
-    args = parser.parse_args()
+    mode.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="Apply the prompts in FILE (one per line, '#' comments) in order against one loaded routine.",
+    )
+    mode.add_argument(
+        "--serve",
+        action="store_true",
+        help="Keep the agent warm and answer JSON-lines requests from stdin (see README).",
+    )
+    agent.add_argument(
+        "--stream",
+        action="store_true",
+        help="With --prompt/--batch: stream the reply as it is generated and run read-only tools concurrently.",
+    )
+    agent.add_argument(
+        "--history-budget",
+        type=int,
+        default=None,
+        help="Token budget for the message history per model call (default: 8000).",
+    )
+    agent.add_argument(
+        "--llm-cache",
+        action="store_true",
+        help="Reuse model responses for identical requests (output/.llm_cache/).",
+    )
+    agent.add_argument(
+        "--record",
+        metavar="PATH",
+        help="Save every model response to a JSON-lines session file.",
+    )
+    agent.add_argument(
+        "--replay",
+        metavar="PATH",
+        help="Answer from a recorded session file instead of calling Groq.",
+    )
+    _add_storage_options(agent)
+    _add_output_options(agent)
+    _add_timing_options(agent)
+    _add_context_options(agent)
+    _add_metrics_options(agent)
+    agent.set_defaults(handler=cmd_agent)
 
-    print("Loading reference data from csv_files/ …")
-    context = load_context()
+    generate = sub.add_parser("generate", help="Build the full weekly routine with the local constraint solver (no LLM).")
+    generate.add_argument(
+        "--sections",
+        default="",
+        help="Comma-separated section codes (default: all sections).",
+    )
+    generate.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Seed for the search order.",
+    )
+    generate.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Split the sections into independent partitions (by shift and shared teachers/rooms) "
+        "and generate them in N worker processes (0: one per CPU; 1, or a single CPU, runs inline).",
+    )
+    _add_storage_options(generate)
+    _add_output_options(generate)
+    _add_timing_options(generate)
+    _add_context_options(generate)
+    _add_metrics_options(generate)
+    generate.set_defaults(handler=cmd_generate)
 
-    print("Running agent …")
-    response, df = run_agent(args.prompt, context=context)
+    validate = sub.add_parser("validate", help="Check the saved routine for conflicts (exit status 1 on errors).")
+    _add_storage_options(validate)
+    validate.add_argument(
+        "--eligibility",
+        action="store_true",
+        help="Also check that each teacher belongs to the subject's department and stays within capacity.",
+    )
+    validate.add_argument(
+        "--max-periods",
+        type=int,
+        default=None,
+        help="With --eligibility: weekly period capacity per teacher (default: every cell of the grid).",
+    )
+    _add_timing_options(validate)
+    _add_metrics_options(validate)
+    validate.set_defaults(handler=cmd_validate)
 
-    if df is not None and not df.empty:
-        print("Validating routine …")
-        errors = validate_routine(df)
-        if errors:
-            print("Validation warnings:")
-            for err in errors:
-                print(f"  ⚠  {err}")
-        else:
-            print("Routine is valid (no conflicts).")
+    render = sub.add_parser("render", help="Render Markdown timetables from the saved routine.")
+    _add_storage_options(render)
+    _add_output_options(render)
+    _add_timing_options(render)
+    _add_context_options(render)
+    _add_metrics_options(render)
+    render.set_defaults(handler=cmd_render)
 
-        print("Saving output/routine_table.csv …")
-        save_routine(df)
+    optimize = sub.add_parser(
+        "optimize",
+        help="Improve the saved routine on soft constraints (idle gaps, repeated subjects, "
+        "daily load spread, room changes) by simulated annealing.",
+    )
+    optimize.add_argument("--seconds", type=float, default=5.0, help="Time budget (default: 5).")
+    optimize.add_argument(
+        "--iterations",
+        type=int,
+        default=None,
+        help="Number of candidate moves; with a fixed count the same --seed gives the same routine.",
+    )
+    optimize.add_argument("--seed", type=int, default=0, help="Seed for the move sampler.")
+    _add_storage_options(optimize)
+    _add_output_options(optimize)
+    _add_timing_options(optimize)
+    _add_context_options(optimize)
+    _add_metrics_options(optimize)
+    optimize.set_defaults(handler=cmd_optimize)
 
-        print("Generating output/class_routine_generated.md …")
-        render_markdown(df)
-        print("Done. See output/ directory for results.")
-    else:
-        print("No routine changes made.")
+    expand = sub.add_parser(
+        "expand",
+        help="Write the dated class sessions of a date range (weekends, shift logs and "
+        "time_tables.csv overrides applied).",
+    )
+    expand.add_argument("--from", dest="start", type=dt.date.fromisoformat, required=True, metavar="YYYY-MM-DD")
+    expand.add_argument("--to", dest="end", type=dt.date.fromisoformat, required=True, metavar="YYYY-MM-DD")
+    expand.add_argument(
+        "--out",
+        default=os.path.join("output", "sessions.csv"),
+        help="Output file (default: output/sessions.csv); a .jsonl name writes JSON lines.",
+    )
+    expand.add_argument("--format", choices=("csv", "jsonl"), default=None, help="Override the format implied by --out.")
+    _add_storage_options(expand)
+    _add_context_options(expand)
+    _add_metrics_options(expand)
+    expand.set_defaults(handler=cmd_expand)
+    return parser
+
+
+def _legacy_argv(argv: List[str]) -> List[str]:
+    """Map the pre-subcommand flags (--prompt/--batch/--serve, --generate) onto subcommands."""
+    if "--generate" in argv:
+        rest = [a for a in argv if a != "--generate"]
+        return ["generate", *rest]
+    if any(a.split("=", 1)[0] in _LEGACY_MODES for a in argv) and not any(
+        a in ("agent", "generate", "validate", "render", "optimize", "expand") for a in argv
+    ):
+        return ["agent", *argv]
+    return argv
+
+
+def main(argv: List[str] | None = None) -> int:
+    argv = _legacy_argv(list(sys.argv[1:] if argv is None else argv))
+    args = build_parser().parse_args(argv)
+    if args.profile_startup:
+        return profile_startup([a for a in argv if a != "--profile-startup"])
+    if not (args.metrics or args.metrics_jsonl):
+        return args.handler(args)
+
+    from routine_agent.metrics import METRICS
 
-    print("\nAgent response:")
-    print(response)
+    METRICS.enable(args.metrics_jsonl)
+    try:
+        return args.handler(args)
+    finally:
+        METRICS.disable()
+        # stdout carries the JSON responses in --serve mode
+        out = sys.stderr if getattr(args, "serve", False) else sys.stdout
+        print("\nTimings:", file=out)
+        print(METRICS.report(), file=out)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,20 @@
+"""Shared fixtures: a small synthetic routine and its reference data."""
+import pytest
+
+from benchmarks.synthetic import make_context, make_routine
+from routine_agent.config import RoutineRules
+
+
+@pytest.fixture
+def rules() -> RoutineRules:
+    return RoutineRules()
+
+
+@pytest.fixture
+def context(rules):
+    return make_context(8, rules)
+
+
+@pytest.fixture
+def routine(rules):
+    return make_routine(8, rules, conflict_rate=0.0, invalid_rate=0.0)
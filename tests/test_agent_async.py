@@ -0,0 +1,87 @@
+"""The async agent loop must work on both storage backends."""
+import asyncio
+from typing import List
+
+import pytest
+from langchain_core.messages import AIMessage, ToolMessage
+
+from benchmarks.fake_llm import ScriptedChatModel
+from routine_agent import agent, sqlite_store
+from routine_agent.routine_store import RoutineStore, save_routine
+
+
+class RecordingChatModel(ScriptedChatModel):
+    """ScriptedChatModel that keeps the tool results of the latest request."""
+
+    tool_results: List[str] = []
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.tool_results[:] = (m.content for m in messages if isinstance(m, ToolMessage))
+        async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+            yield chunk
+
+
+def _script() -> list:
+    edits = [
+        {"name": "remove_slot_tool", "id": "rm", "args": {"section_code": "S0", "day": "Sun", "period": 1}},
+        {"name": "add_slot", "id": "add",
+         "args": {"section_code": "S0", "day": "Sun", "period": 1, "subject_id": "1",
+                  "teacher_id": "900", "room_id": "900"}},
+        {"name": "remove_slot_tool", "id": "rm1", "args": {"section_code": "S1", "day": "Sun", "period": 1}},
+        {"name": "move_slot_tool", "id": "mv",
+         "args": {"section_code": "S1", "from_day": "Sun", "from_period": 2, "to_day": "Sun", "to_period": 1}},
+    ]
+    reads = [
+        {"name": "list_slots", "id": "ls", "args": {"section_code": "S0"}},
+        {"name": "lookup_section", "id": "lk", "args": {"section_code": "S0"}},
+        {"name": "validate_routine_tool", "id": "val", "args": {}},
+    ]
+    return [
+        AIMessage(content="", tool_calls=edits),
+        AIMessage(content="", tool_calls=reads),
+        AIMessage(content="Done."),
+    ]
+
+
+@pytest.mark.parametrize("backend", ["csv", "sqlite"])
+def test_arun_tools_run_on_backend(backend, tmp_path, monkeypatch, routine, context):
+    csv_path = str(tmp_path / "routine_table.csv")
+    save_routine(routine, csv_path)
+    monkeypatch.setattr(agent, "_ROUTINE_PATH", csv_path)
+    monkeypatch.setattr(sqlite_store, "SQLITE_PATH", str(tmp_path / "routine.db"))
+
+    llm = RecordingChatModel(responses=_script(), tool_results=[])
+    session = agent.AgentSession(context, backend=backend, llm=llm)
+    try:
+        text, df = asyncio.run(session.arun("Edit."))
+    finally:
+        session.close()
+        if backend == "sqlite":
+            session.store.close()
+
+    assert text == "Done."
+    assert len(llm.tool_results) == 7
+    assert not [r for r in llm.tool_results if r.startswith("Tool error")], llm.tool_results
+    slots = {(r.section_code, r.day, int(r.period)): r for r in df.itertuples(index=False)}
+    assert slots[("S0", "Sun", 1)].teacher_id == "900"
+    assert slots[("S1", "Sun", 1)].subject_id == routine.query("section_code == 'S1' and period == 2").iloc[0].subject_id
+    assert ("S1", "Sun", 2) not in slots
+
+
+def test_context_lock_works_across_event_loops(routine, context):
+    ctx = agent.RoutineContext(RoutineStore(routine), context)
+
+    async def contend():
+        lock = ctx.lock
+        assert ctx.lock is lock
+        async with lock:
+            waiter = asyncio.ensure_future(lock.acquire())
+            await asyncio.sleep(0)
+        await waiter
+        lock.release()
+        return lock
+
+    first = asyncio.run(contend())
+    second = asyncio.run(contend())  # a lock bound to the first loop would raise here
+    assert first is not second
+    ctx.close()
@@ -0,0 +1,50 @@
+"""apply_slot_batch must leave no transaction open, whatever fails."""
+from routine_agent.agent import RoutineContext, apply_slot_batch
+from routine_agent.routine_store import RoutineStore
+
+
+def _rows(store):
+    return set(store.to_dataframe().itertuples(index=False, name=None))
+
+
+def _move(period: int, to_period: int) -> dict:
+    return {"op": "move", "section_code": "S0", "day": "Sun", "period": period,
+            "to_day": "Sun", "to_period": to_period}
+
+
+def test_listener_error_rolls_back_and_next_batch_applies(routine, context, rules):
+    store = RoutineStore(routine)
+    ctx = RoutineContext(store, context, rules)
+    before = _rows(store)
+    store.remove_slot("S0", "Sun", 6)
+
+    def broken(key, old, new):
+        if key == ("S0", "Sun", 6) and new is not None:
+            raise KeyError("listener failed")
+
+    store.subscribe(broken)
+    with ctx.bound():
+        result = apply_slot_batch.invoke({"operations": [_move(5, 6)]})
+        assert result.startswith("Batch rolled back: operation 1 (move) failed")
+        assert not store.in_transaction
+        assert _rows(store) == before - {next(r for r in before if r[:3] == ("S0", "Sun", 6))}
+
+        store.unsubscribe(broken)
+        result = apply_slot_batch.invoke({"operations": [_move(5, 6)]})
+        assert result.startswith("Batch applied: 1 operations"), result
+    assert not store.in_transaction
+    ctx.close()
+
+
+def test_failed_operation_rolls_back_earlier_ones(routine, context, rules):
+    store = RoutineStore(routine)
+    ctx = RoutineContext(store, context, rules)
+    before = _rows(store)
+    store.remove_slot("S0", "Sun", 6)
+    after_remove = _rows(store)
+    with ctx.bound():
+        result = apply_slot_batch.invoke({"operations": [_move(5, 6), _move(1, 2)]})
+    assert "operation 2 (move) failed" in result
+    assert _rows(store) == after_remove != before
+    assert not store.in_transaction
+    ctx.close()
@@ -0,0 +1,79 @@
+"""generate_routine on the synthetic reference data."""
+import pandas as pd
+import pytest
+
+from routine_agent.agent import RoutineContext, generate_routine_tool
+from routine_agent.eligibility import EligibilityIndex
+from routine_agent.generator import generate_routine
+from routine_agent.routine_store import RoutineStore
+from routine_agent.validator import validate_routine
+
+
+def _rows(store):
+    return set(store.to_dataframe().itertuples(index=False, name=None))
+
+
+def test_routine_is_complete_and_valid(context, rules):
+    df = generate_routine(context, rules)
+    assert validate_routine(df, rules) == []
+    cells = len(rules.days) * len(rules.periods)
+    assert df.groupby("section_code").size().to_dict() == {code: cells for code in context["sections"]["code"]}
+
+
+def test_every_teacher_is_eligible(context, rules):
+    df = generate_routine(context, rules)
+    eligibility = EligibilityIndex(context, rules)
+    for row in df.itertuples(index=False):
+        assert eligibility.is_eligible(row.section_code, row.subject_id, row.teacher_id), row
+
+
+def test_same_seed_same_routine(context, rules):
+    first = generate_routine(context, rules, seed=3)
+    pd.testing.assert_frame_equal(first, generate_routine(context, rules, seed=3))
+
+
+def test_fixed_slots_of_other_sections_are_respected(context, rules):
+    codes = context["sections"]["code"].tolist()
+    kept, regenerated = codes[:4], codes[4:]
+    full = generate_routine(context, rules)
+    fixed = RoutineStore(full[full["section_code"].isin(kept)])
+
+    df = generate_routine(context, rules, regenerated, fixed=fixed, seed=1)
+    assert set(df["section_code"]) == set(regenerated)
+    assert validate_routine(pd.concat([fixed.to_dataframe(), df], ignore_index=True), rules) == []
+
+
+def test_missing_department_teachers_raise(context, rules):
+    teachers = context["teachers"]
+    context = {**context, "teachers": teachers[teachers["department"] != "English"]}
+    with pytest.raises(ValueError, match="No teacher in department 'English'"):
+        generate_routine(context, rules)
+
+
+def test_unknown_section_raises(context, rules):
+    with pytest.raises(ValueError, match="Unknown section codes"):
+        generate_routine(context, rules, ["nope"])
+
+
+def test_tool_rolls_back_when_an_edit_fails(routine, context, rules):
+    store = RoutineStore(routine)
+    ctx = RoutineContext(store, context, rules)
+    before = _rows(store)
+
+    failures = [KeyError("listener failed")]
+
+    def broken(key, old, new):
+        if new is not None and key == ("S0", rules.days[-1], rules.periods[-1]) and failures:
+            raise failures.pop()
+
+    store.subscribe(broken)
+    with ctx.bound(), pytest.raises(KeyError):
+        generate_routine_tool.invoke({"section_codes": "S0", "seed": 0})
+    assert not store.in_transaction
+    assert _rows(store) == before
+
+    store.unsubscribe(broken)
+    with ctx.bound():
+        result = generate_routine_tool.invoke({"section_codes": "S0", "seed": 0})
+    assert result.startswith("Generated 30 slots for sections: S0.")
+    ctx.close()
@@ -0,0 +1,87 @@
+"""HistoryManager shrinks old turns step by step and never splits a turn."""
+import random
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from routine_agent.history import HistoryManager, message_tokens
+
+
+def _turn(i: int, name: str, content: str) -> list:
+    call_id = f"call{i}"
+    return [
+        AIMessage(content="", tool_calls=[{"name": name, "args": {"n": i}, "id": call_id}]),
+        ToolMessage(content=content, tool_call_id=call_id, name=name),
+    ]
+
+
+def _messages(turns: int = 3) -> list:
+    messages = [SystemMessage(content="system " * 20), HumanMessage(content="Fix the routine.")]
+    for i in range(turns):
+        messages += _turn(2 * i, "list_slots", "\n".join(f"S{i} Sun {p} 1 2 3 1" for p in range(60)))
+        messages += _turn(2 * i + 1, "lookup_section", "header line\n" + "x" * 3000)
+    return messages + _turn(99, "validate_routine_tool", "Routine is valid.\nNo conflicts.")
+
+
+def _tokens(messages) -> int:
+    return sum(message_tokens(m) for m in messages)
+
+
+def _contents(messages, name):
+    return [str(m.content) for m in messages if isinstance(m, ToolMessage) and m.name == name]
+
+
+def test_trim_fits_budget():
+    messages = _messages()
+    budget = _tokens(messages) - 1
+    sent = HistoryManager(token_budget=budget).compact(messages)
+    assert _tokens(sent) <= budget
+    assert all(c.startswith("[Earlier list_slots output") for c in _contents(sent, "list_slots"))
+    assert all(c.endswith("characters truncated]") for c in _contents(sent, "lookup_section"))
+    assert _contents(sent, "validate_routine_tool") == ["Routine is valid.\nNo conflicts."]
+
+
+def test_first_line_fits_budget():
+    messages = _messages()
+    trimmed = HistoryManager(token_budget=_tokens(messages) - 1).compact(messages)
+    budget = _tokens(trimmed) - 1
+    sent = HistoryManager(token_budget=budget).compact(messages)
+    assert _tokens(sent) <= budget
+    assert _contents(sent, "lookup_section") == ["header line [rest omitted]"] * 3
+    assert not any("omitted to fit" in str(m.content) for m in sent)
+    assert _contents(sent, "validate_routine_tool") == ["Routine is valid.\nNo conflicts."]
+
+
+def test_drop_fits_budget_and_keeps_latest_turn():
+    messages = _messages()
+    trimmed = HistoryManager(token_budget=_tokens(messages) - 1).compact(messages)
+    first_lines = HistoryManager(token_budget=_tokens(trimmed) - 1).compact(messages)
+    budget = _tokens(first_lines) - 1
+    sent = HistoryManager(token_budget=budget).compact(messages)
+    assert _tokens(sent) <= budget
+    assert sent[:2] == messages[:2]
+    assert "earlier tool round(s) omitted" in str(sent[2].content)
+    assert sent[-2:] == messages[-2:]
+
+
+def test_full_history_is_not_modified():
+    messages = _messages()
+    before = [m.model_copy() for m in messages]
+    HistoryManager(token_budget=10).compact(messages)
+    assert messages == before
+
+
+def test_tool_results_stay_with_their_call():
+    messages = _messages(turns=5)
+    rng = random.Random(0)
+    for _ in range(50):
+        history = HistoryManager(token_budget=rng.randrange(50, _tokens(messages)), keep_turns=rng.randrange(1, 3))
+        sent = history.compact(messages)
+        open_calls: set = set()
+        for m in sent:
+            if isinstance(m, AIMessage):
+                assert not open_calls, "a tool call lost its result"
+                open_calls = {tc["id"] for tc in m.tool_calls}
+            elif isinstance(m, ToolMessage):
+                assert m.tool_call_id in open_calls, "a tool result lost its call"
+                open_calls.discard(m.tool_call_id)
+        assert not open_calls
@@ -0,0 +1,101 @@
+"""IncrementalValidator must agree with validate_routine after any edit sequence."""
+import random
+
+import pytest
+
+from routine_agent.incremental_validator import IncrementalValidator
+from routine_agent.routine_store import RoutineStore
+from routine_agent.sqlite_store import SqliteRoutineStore
+from routine_agent.validator import validate_routine
+
+SECTIONS = [f"S{i}" for i in range(8)]
+
+
+def _random_edit(store, rng: random.Random, rules) -> None:
+    days = rules.days + ["Fri"]  # Fri is outside the default grid
+    periods = rules.periods + [len(rules.periods) + 1]
+    sec, day, period = rng.choice(SECTIONS), rng.choice(days), rng.choice(periods)
+    op = rng.random()
+    if op < 0.4:
+        # few teachers and rooms, so clashes are frequent
+        store.upsert_slot(sec, day, period, str(rng.randint(1, 6)),
+                          str(rng.randint(1, 12)), str(rng.randint(1, 8)), "1")
+    elif op < 0.6:
+        store.remove_slot(sec, day, period)
+    elif op < 0.8:
+        try:
+            store.move_slot(sec, day, period, rng.choice(days), rng.choice(periods))
+        except ValueError:
+            pass  # destination occupied
+    else:
+        store.swap_slots(sec, day, period, rng.choice(SECTIONS), rng.choice(days), rng.choice(periods))
+
+
+def _assert_matches(validator, store, rules) -> None:
+    assert sorted(validator.errors()) == sorted(validate_routine(store.to_dataframe(), rules))
+
+
+@pytest.fixture(params=["memory", "fork", "sqlite"])
+def store(request, routine):
+    if request.param == "memory":
+        yield RoutineStore(routine)
+    elif request.param == "fork":
+        yield RoutineStore(routine).fork()
+    else:
+        store = SqliteRoutineStore.from_dataframe(routine, ":memory:")
+        yield store
+        store.close()
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_random_edits_match_full_validation(store, rules, seed):
+    rng = random.Random(seed)
+    validator = IncrementalValidator(store, rules)
+    _assert_matches(validator, store, rules)
+    for _ in range(120):
+        _random_edit(store, rng, rules)
+        _assert_matches(validator, store, rules)
+    assert validator.verify()
+    validator.close()
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_rollback_restores_routine_and_conflicts(store, rules, seed):
+    rng = random.Random(seed)
+    validator = IncrementalValidator(store, rules)
+    for _ in range(100):
+        _random_edit(store, rng, rules)
+    before_rows = store.to_dataframe().sort_values(["section_code", "day", "period"]).reset_index(drop=True)
+    before_conflicts = validator.conflicts
+    validator.drain()
+
+    for _ in range(20):
+        store.begin()
+        for _ in range(rng.randint(1, 15)):
+            _random_edit(store, rng, rules)
+        _assert_matches(validator, store, rules)
+        store.rollback()
+        _assert_matches(validator, store, rules)
+        assert validator.conflicts == before_conflicts
+        after_rows = store.to_dataframe().sort_values(["section_code", "day", "period"]).reset_index(drop=True)
+        assert after_rows.equals(before_rows)
+
+    # conflicts opened and closed inside the rolled-back batches cancel out
+    new, resolved = validator.drain()
+    assert not set(new) - set(validator.errors())
+    validator.close()
+
+
+def test_drain_reports_new_and_resolved(rules, routine):
+    store = RoutineStore(routine)
+    validator = IncrementalValidator(store, rules)
+    slot = store.get("S0", "Sun", 1)
+    store.upsert_slot("S1", "Sun", 1, "1", slot["teacher_id"], "99", "1")
+    new, resolved = validator.drain()
+    assert len(new) == 1 and new[0].startswith(f"Teacher conflict: teacher {slot['teacher_id']}")
+    assert resolved == []
+    store.remove_slot("S1", "Sun", 1)
+    new, resolved = validator.drain()
+    assert new == [] and len(resolved) == 1
+    assert validator.is_valid()
+    validator.close()
@@ -0,0 +1,99 @@
+"""SlotJournal: unsaved edits survive a restart, torn records are skipped, compaction is atomic."""
+import os
+
+import pandas as pd
+import pytest
+
+from routine_agent.routine_store import (
+    RoutineStore,
+    SlotJournal,
+    journal_path,
+    load_routine,
+    replay_journal,
+    save_routine,
+)
+
+
+def _rows(df):
+    return set(df.itertuples(index=False, name=None))
+
+
+@pytest.fixture
+def saved(tmp_path, routine):
+    path = str(tmp_path / "routine_table.csv")
+    save_routine(routine, path)
+    return path
+
+
+def _edit(store):
+    store.remove_slot("S0", "Sun", 1)
+    store.remove_slot("S1", "Sun", 1)
+    store.move_slot("S1", "Mon", 2, "Sun", 1)
+    store.upsert_slot("S2", "Tue", 3, "8", "99", "42", "1")
+
+
+def test_unsaved_edits_are_recovered(saved):
+    store = RoutineStore(load_routine(saved))
+    with SlotJournal(store, saved, fsync=False):
+        _edit(store)
+    reloaded = load_routine(saved)
+    assert _rows(reloaded) == _rows(store.to_dataframe())
+    assert reloaded.loc[reloaded["section_code"] == "S2", "teacher_id"].isin(["99"]).any()
+
+
+def test_csv_and_journal_paths_give_the_same_dtypes(saved):
+    plain = load_routine(saved)
+    store = RoutineStore(plain)
+    with SlotJournal(store, saved, fsync=False):
+        store.upsert_slot("S0", "Sun", 1, "1", "1", "1", "1")
+    replayed = load_routine(saved)
+    assert plain.dtypes.to_dict() == replayed.dtypes.to_dict()
+    for df in (plain, replayed):
+        assert df["teacher_id"].map(type).eq(str).all()
+        assert df["period"].dtype == "int64"
+
+
+def test_torn_last_record_is_skipped(saved):
+    store = RoutineStore(load_routine(saved))
+    with SlotJournal(store, saved, fsync=False):
+        store.remove_slot("S0", "Sun", 1)
+        store.remove_slot("S0", "Sun", 2)
+    journal = journal_path(saved)
+    with open(journal, "rb") as fh:
+        data = fh.read()
+    with open(journal, "wb") as fh:
+        fh.write(data[:-5])  # crash in the middle of the second append
+
+    recovered = RoutineStore(pd.read_csv(saved))
+    assert replay_journal(recovered, journal) == 1
+    reloaded = load_routine(saved)
+    assert ("S0", "Sun", 1) not in RoutineStore(reloaded)
+    assert ("S0", "Sun", 2) in RoutineStore(reloaded)
+
+
+def test_compaction_replaces_snapshot_and_empties_journal(saved):
+    store = RoutineStore(load_routine(saved))
+    with SlotJournal(store, saved, compact_every=5, fsync=False):
+        _edit(store)
+        assert os.path.getsize(journal_path(saved)) == 0
+    assert not os.path.exists(saved + ".tmp")
+    assert _rows(load_routine(saved)) == _rows(store.to_dataframe())
+
+
+def test_failed_compaction_keeps_snapshot_and_journal(saved, monkeypatch):
+    before = load_routine(saved)
+    store = RoutineStore(before)
+    journal = SlotJournal(store, saved, compact_every=5, fsync=False)
+
+    def crash(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", crash)
+    with pytest.raises(OSError):
+        _edit(store)
+    monkeypatch.undo()
+    journal.close()
+
+    # the old snapshot is untouched and the journal still holds every edit
+    assert _rows(RoutineStore(pd.read_csv(saved)).to_dataframe()) == _rows(before)
+    assert _rows(load_routine(saved)) == _rows(store.to_dataframe())
@@ -0,0 +1,36 @@
+"""Offline paths must not import the Groq client."""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(code: str) -> subprocess.CompletedProcess:
+    # langchain_groq set to None in sys.modules makes any import of it fail
+    prelude = "import sys; sys.modules['langchain_groq'] = None\n"
+    return subprocess.run([sys.executable, "-c", prelude + code], capture_output=True, text=True, cwd=ROOT)
+
+
+def test_agent_imports_without_groq(tmp_path):
+    result = _run(
+        "from routine_agent import agent\n"
+        f"agent._ROUTINE_PATH = {str(tmp_path / 'routine_table.csv')!r}\n"
+        "from langchain_core.messages import AIMessage\n"
+        "from benchmarks.fake_llm import ScriptedChatModel\n"
+        "from benchmarks.synthetic import make_context\n"
+        "from routine_agent.agent import AgentSession\n"
+        "session = AgentSession(make_context(2), llm=ScriptedChatModel(responses=[AIMessage(content='ok')]))\n"
+        "print(session.run('hi')[0])\n"
+        "session.close()\n"
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "ok"
+
+
+def test_cli_help_without_groq():
+    result = _run(
+        "sys.argv = ['run_agent.py', '--help']\n"
+        "import runpy; runpy.run_path('run_agent.py', run_name='__main__')\n"
+    )
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,109 @@
+"""Response cache and session record/replay, run offline through run_agent."""
+import os
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import tool
+
+from benchmarks.fake_llm import ScriptedChatModel
+from routine_agent import agent
+from routine_agent.llm_cache import ReplayChatModel, ResponseCache, SessionRecorder, cache_key, load_session
+from routine_agent.routine_store import save_routine
+
+
+def _script() -> list:
+    return [
+        AIMessage(content="", tool_calls=[
+            {"name": "remove_slot_tool", "id": "rm", "args": {"section_code": "S0", "day": "Sun", "period": 1}},
+            {"name": "list_slots", "id": "ls", "args": {"section_code": "S0"}},
+        ]),
+        AIMessage(content="", tool_calls=[
+            {"name": "move_slot_tool", "id": "mv",
+             "args": {"section_code": "S0", "from_day": "Sun", "from_period": 2, "to_day": "Sun", "to_period": 1}},
+        ]),
+        AIMessage(content="Moved S0 Sunday period 2 to period 1."),
+    ]
+
+
+def _run(tmp_path, monkeypatch, routine, context, **kwargs):
+    """One run_agent call against a fresh copy of the routine."""
+    csv_path = str(tmp_path / "routine_table.csv")
+    save_routine(routine, csv_path)
+    monkeypatch.setattr(agent, "_ROUTINE_PATH", csv_path)
+    return agent.run_agent("Tidy up S0 on Sunday.", context, **kwargs)
+
+
+def _rows(df):
+    return set(df.itertuples(index=False, name=None))
+
+
+def test_recorded_session_replays_the_same_edits(tmp_path, monkeypatch, routine, context):
+    session_path = str(tmp_path / "session.jsonl")
+    llm = ScriptedChatModel(responses=_script())
+    text, df = _run(tmp_path, monkeypatch, routine, context, llm=llm, recorder=SessionRecorder(session_path))
+
+    recorded = load_session(session_path)
+    assert [m.tool_calls for m in recorded] == [m.tool_calls for m in _script()]
+
+    replay = ReplayChatModel.from_file(session_path)
+    replay_text, replay_df = _run(tmp_path, monkeypatch, routine, context, llm=replay)
+    assert replay.calls == 3
+    assert replay_text == text == "Moved S0 Sunday period 2 to period 1."
+    assert _rows(replay_df) == _rows(df) != _rows(routine)
+
+
+def test_cache_hit_returns_the_same_tool_calls(tmp_path, monkeypatch, routine, context):
+    cache_dir = str(tmp_path / "cache")
+    first = ScriptedChatModel(responses=_script())
+    text, df = _run(tmp_path, monkeypatch, routine, context, llm=first, cache=ResponseCache(cache_dir))
+    assert first.calls == 3
+
+    # a model that would answer differently: every request must be served from the cache
+    second = ScriptedChatModel(responses=[AIMessage(content="not cached")])
+    cache = ResponseCache(cache_dir)
+    session_path = str(tmp_path / "session.jsonl")
+    cached_text, cached_df = _run(
+        tmp_path, monkeypatch, routine, context, llm=second, cache=cache, recorder=SessionRecorder(session_path)
+    )
+    assert second.calls == 0
+    assert (cache.hits, cache.misses) == (3, 0)
+    assert cached_text == text
+    assert _rows(cached_df) == _rows(df)
+    assert [m.tool_calls for m in load_session(session_path)] == [m.tool_calls for m in _script()]
+
+
+def test_lru_eviction_keeps_max_entries(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_entries=2)
+    for key in "abc":
+        cache.put(key, AIMessage(content=key))
+    assert len(cache) == 2
+    assert cache.get("a") is None
+    assert not os.path.exists(tmp_path / "a.json")
+
+    assert cache.get("b").content == "b"  # b is now the most recently used
+    cache.put("d", AIMessage(content="d"))
+    assert sorted(os.listdir(tmp_path)) == ["b.json", "d.json"]
+
+    reopened = ResponseCache(str(tmp_path), max_entries=2)
+    reopened.put("e", AIMessage(content="e"))
+    assert reopened.get("b") is None and reopened.get("d").content == "d"
+
+
+@tool
+def _first_tool(section_code: str) -> str:
+    """First tool."""
+    return section_code
+
+
+@tool
+def _second_tool(section_code: str, day: str = "") -> str:
+    """Second tool."""
+    return section_code + day
+
+
+def test_key_changes_with_bound_tools():
+    messages = [HumanMessage(content="hi")]
+    key = cache_key("model", messages, [_first_tool])
+    assert key == cache_key("model", messages, [_first_tool])
+    assert key != cache_key("model", messages, [_first_tool, _second_tool])
+    assert key != cache_key("model", messages, [_second_tool])
+    assert key != cache_key("other-model", messages, [_first_tool])
@@ -0,0 +1,66 @@
+"""render_markdown_incremental re-renders only what changed, and its output matches a full render."""
+import pytest
+
+from benchmarks.synthetic import make_context, make_routine
+from routine_agent.markdown_renderer import render_markdown, render_markdown_incremental
+
+
+@pytest.fixture
+def small(rules):
+    return make_routine(4, rules, seed=4), make_context(4, rules)
+
+
+def _render(tmp_path, df, rules, ctx, split):
+    path = tmp_path / "routine.md"
+    stats = render_markdown_incremental(df, str(path), rules, ctx, split=split)
+    if not split:
+        assert path.read_text(encoding="utf-8") == render_markdown(df, str(tmp_path / "full.md"), rules, ctx)
+    return stats
+
+
+def _change_one_slot(df):
+    df = df.copy()
+    row = df.index[(df["section_code"] == "S2") & (df["day"] == "Tue") & (df["period"] == 4)]
+    df.loc[row, "subject_id"] = "1"
+    return df
+
+
+@pytest.mark.parametrize("split", [False, True])
+def test_unchanged_routine_renders_nothing(tmp_path, rules, small, split):
+    df, ctx = small
+    assert _render(tmp_path, df, rules, ctx, split) == {"rendered": 4, "reused": 0, "removed": 0}
+    assert _render(tmp_path, df, rules, ctx, split) == {"rendered": 0, "reused": 4, "removed": 0}
+
+
+@pytest.mark.parametrize("split", [False, True])
+def test_one_changed_slot_renders_its_section(tmp_path, rules, small, split):
+    df, ctx = small
+    _render(tmp_path, df, rules, ctx, split)
+    changed = _change_one_slot(df)
+    assert _render(tmp_path, changed, rules, ctx, split) == {"rendered": 1, "reused": 3, "removed": 0}
+    if split:
+        assert (tmp_path / "sections" / "S2.md").read_text(encoding="utf-8") in render_markdown(
+            changed, str(tmp_path / "full.md"), rules, ctx
+        )
+
+
+@pytest.mark.parametrize("split", [False, True])
+def test_context_change_forces_full_render(tmp_path, rules, small, split):
+    df, ctx = small
+    _render(tmp_path, df, rules, ctx, split)
+    subjects = ctx["subjects"].copy()
+    subjects.loc[0, "name"] = "Renamed"
+    ctx = {**ctx, "subjects": subjects}
+    assert _render(tmp_path, df, rules, ctx, split) == {"rendered": 4, "reused": 0, "removed": 0}
+
+
+@pytest.mark.parametrize("split", [False, True])
+def test_deleted_section_is_removed(tmp_path, rules, small, split):
+    df, ctx = small
+    _render(tmp_path, df, rules, ctx, split)
+    fewer = df[df["section_code"] != "S1"]
+    assert _render(tmp_path, fewer, rules, ctx, split) == {"rendered": 0, "reused": 3, "removed": 1}
+    if split:
+        assert not (tmp_path / "sections" / "S1.md").exists()
+    else:
+        assert "# Class S1" not in (tmp_path / "routine.md").read_text(encoding="utf-8")
@@ -0,0 +1,65 @@
+"""render_markdown output must stay byte-identical to the original renderer's."""
+import os
+
+import pytest
+
+from benchmarks.synthetic import make_context, make_routine
+from routine_agent.markdown_renderer import VIEWS, render_markdown, render_views, write_markdown_file
+
+# Written once by benchmarks.bench_renderer.legacy_render_markdown from the ``small`` fixture
+GOLDEN = os.path.join(os.path.dirname(__file__), "data", "class_routine_golden.md")
+
+
+@pytest.fixture
+def small(rules):
+    df = make_routine(4, rules, seed=4)
+    # one empty cell, so the blank-cell rendering is covered too
+    df = df.drop(index=df.index[(df["section_code"] == "S1") & (df["day"] == "Mon") & (df["period"] == 2)])
+    return df, make_context(4, rules)
+
+
+def _golden() -> bytes:
+    with open(GOLDEN, "rb") as fh:
+        return fh.read()
+
+
+def test_render_markdown_matches_golden(tmp_path, rules, small):
+    df, ctx = small
+    path = tmp_path / "routine.md"
+    content = render_markdown(df, str(path), rules, ctx)
+    assert path.read_bytes() == _golden()
+    assert content.encode("utf-8") == _golden()
+
+
+def test_write_markdown_file_matches_golden(tmp_path, rules, small):
+    df, ctx = small
+    path = tmp_path / "out" / "routine.md"
+    assert write_markdown_file(df, str(path), rules, ctx) == str(path)
+    assert path.read_bytes() == _golden()
+
+
+def test_split_files_keep_teachers_sharing_a_code_apart(tmp_path, rules, small):
+    df, ctx = small
+    teachers = ctx["teachers"].copy()
+    teachers["code"] = "T-SAME"
+    ctx = {**ctx, "teachers": teachers}
+    written = render_views(df, ("teacher",), str(tmp_path), rules, ctx, split=True)
+    names = sorted(os.path.basename(p) for p in written["teacher"])
+    known = set(teachers["id"].astype(str))
+    expected = [f"T-SAME-{tid}.md" if tid in known else f"{tid}.md" for tid in set(df["teacher_id"].astype(str))]
+    assert len(known & set(df["teacher_id"].astype(str))) > 1
+    assert names == sorted(expected)
+    assert sorted(os.listdir(tmp_path / "teachers")) == names
+
+
+def test_split_render_removes_stale_files(tmp_path, rules, small):
+    df, ctx = small
+    render_views(df, VIEWS, str(tmp_path), rules, ctx, split=True)
+    assert (tmp_path / "sections" / "S3.md").exists()
+
+    fewer = df[df["section_code"] != "S3"]
+    written = render_views(fewer, VIEWS, str(tmp_path), rules, ctx, split=True)
+    for view, folder in (("section", "sections"), ("teacher", "teachers"), ("room", "rooms")):
+        on_disk = {p.name for p in (tmp_path / folder).glob("*.md")}
+        assert on_disk == {os.path.basename(p) for p in written[view]}, view
+    assert not (tmp_path / "sections" / "S3.md").exists()
@@ -0,0 +1,99 @@
+"""OccupancyIndex follows store changes exactly; find_free_options lists eligible teachers only."""
+import random
+
+import pytest
+
+from benchmarks.synthetic import make_context, make_routine
+from routine_agent.agent import RoutineContext, find_free_options
+from routine_agent.config import RoutineRules
+from routine_agent.eligibility import EligibilityIndex
+from routine_agent.occupancy import KINDS, OccupancyIndex
+from routine_agent.routine_store import RoutineStore
+
+_COLUMNS = {"teacher": "teacher_id", "room": "room_id", "section": "section_code"}
+
+
+def _brute_masks(store, occ) -> dict:
+    masks = {kind: {} for kind in KINDS}
+    for slot in store:
+        bit = occ.bit(slot["day"], slot["period"])
+        for kind, column in _COLUMNS.items():
+            if slot[column]:
+                masks[kind][slot[column]] = masks[kind].get(slot[column], 0) | bit
+    return masks
+
+
+def _check(store, occ, rules, rng):
+    masks = _brute_masks(store, occ)
+    for kind in KINDS:
+        assert set(masks[kind]) <= set(occ.ids(kind))
+        assert {i: occ.mask(kind, i) for i in occ.ids(kind)} == {i: masks[kind].get(i, 0) for i in occ.ids(kind)}
+        day, period = rng.choice(rules.days), rng.choice(rules.periods)
+        bit = occ.bit(day, period)
+        assert occ.free(kind, day, period) == [i for i in occ.ids(kind) if not masks[kind].get(i, 0) & bit]
+    teacher, room, section = (rng.choice(occ.ids(kind)) for kind in KINDS)
+    busy = masks["teacher"].get(teacher, 0) | masks["room"].get(room, 0) | masks["section"].get(section, 0)
+    assert occ.free_cells(teacher, room, section) == [
+        (d, p) for d in rules.days for p in rules.periods if not busy & occ.bit(d, p)
+    ]
+
+
+def test_index_matches_brute_force_after_random_edits(rules, context):
+    store = RoutineStore(make_routine(8, rules, conflict_rate=0.1, invalid_rate=0.0, seed=2))
+    occ = OccupancyIndex.from_store(store, rules, context)
+    rng = random.Random(0)
+    sections = [f"S{i}" for i in range(8)]
+
+    def cell():
+        return rng.choice(sections), rng.choice(rules.days), rng.choice(rules.periods)
+
+    def edit():
+        op = rng.choice(["upsert", "remove", "move", "swap"])
+        if op == "upsert":
+            store.upsert_slot(*cell(), "1", str(rng.randrange(1, 20)), str(rng.randrange(1, 10)), "1")
+        elif op == "remove":
+            store.remove_slot(*cell())
+        elif op == "move":
+            sec, day, period = cell()
+            try:
+                store.move_slot(sec, day, period, rng.choice(rules.days), rng.choice(rules.periods))
+            except ValueError:
+                pass
+        else:
+            store.swap_slots(*cell(), *cell())
+
+    for step in range(150):
+        if step % 10 == 0:
+            store.begin()
+            for _ in range(rng.randrange(1, 6)):
+                edit()
+            store.rollback() if rng.random() < 0.6 else store.commit()
+        else:
+            edit()
+        _check(store, occ, rules, rng)
+    occ.close()
+
+
+def test_grid_over_64_cells_is_refused():
+    rules = RoutineRules(days=["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"], periods=list(range(1, 11)))
+    with pytest.raises(ValueError, match="70 cells"):
+        OccupancyIndex(rules)
+    OccupancyIndex(RoutineRules(days=["Sun", "Mon", "Tue", "Wed"], periods=list(range(1, 17))))  # exactly 64
+
+
+def test_free_options_lists_only_eligible_teachers(rules):
+    context = make_context(8, rules, campuses=2)
+    eligibility = EligibilityIndex(context, rules)
+    ctx = RoutineContext(RoutineStore(), context, rules)
+    with ctx.bound():
+        text = find_free_options.invoke({"section_code": "S0", "day": "Sun", "period": 1, "subject_id": "1"})
+        teachers = text.splitlines()[1].split(": ")[1].rstrip(".").split(", ")
+        assert sorted(teachers) == sorted(eligibility.eligible("S0", "1"))
+        # the same department on the other campus (shift) is not offered
+        other = [t for t in eligibility.eligible("S7", "1") if t not in teachers]
+        assert other
+
+        text = find_free_options.invoke({"section_code": "S0", "day": "Sun", "period": 1})
+        teachers = text.splitlines()[1].split(": ")[1].rstrip(".").split(", ")
+        assert sorted(teachers) == sorted(eligibility.section_teachers("S0"))
+    ctx.close()
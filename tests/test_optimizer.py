@@ -0,0 +1,93 @@
+"""optimize_routine: properties of the annealer on a scrambled synthetic routine."""
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_routine
+from routine_agent import optimizer
+from routine_agent.optimizer import SoftWeights, optimize_routine, score_routine
+from routine_agent.validator import find_conflicts
+
+
+@pytest.fixture
+def scrambled(rules):
+    """A routine with gaps, repeats and room changes: lessons shuffled within each
+    section, a fifth of the cells emptied, two rooms per section and a few
+    teacher clashes."""
+    df = make_routine(6, rules, conflict_rate=0.0, invalid_rate=0.0, seed=1)
+    rng = np.random.default_rng(1)
+    lessons = ["subject_id", "teacher_id", "room_id"]
+    parts = []
+    for _, group in df.groupby("section_code", sort=False):
+        group = group.copy()
+        group[lessons] = group[lessons].to_numpy()[rng.permutation(len(group))]
+        parts.append(group)
+    df = pd.concat(parts, ignore_index=True)
+    df["room_id"] = df["room_id"] + np.where(df["subject_id"].astype(int) % 2, "a", "b")
+    df = df[rng.random(len(df)) >= 0.2].reset_index(drop=True)
+    shared = [g.index for _, g in df.groupby(["day", "period"]) if len(g) > 1][:3]
+    for first, second in (index[:2] for index in shared):
+        df.loc[second, "teacher_id"] = df.loc[first, "teacher_id"]
+    return df
+
+
+def _slots(df):
+    return {sec: Counter(zip(g["subject_id"], g["teacher_id"])) for sec, g in df.groupby("section_code")}
+
+
+def _hard(df, rules):
+    return Counter(find_conflicts(df, rules)["kind"])
+
+
+def test_lowers_score_and_keeps_each_sections_lessons(rules, scrambled):
+    result = optimize_routine(scrambled, rules, seconds=60, iterations=3000, seed=3)
+    assert result.before == score_routine(scrambled, rules)
+    assert result.after == score_routine(result.routine, rules)
+    assert result.after.total < result.before.total
+    assert _slots(result.routine) == _slots(scrambled)
+    assert len(result.routine) == len(scrambled)
+    before, after = _hard(scrambled, rules), _hard(result.routine, rules)
+    assert before["teacher"] > 0
+    assert all(after[kind] <= before[kind] for kind in ("teacher", "room"))
+    assert not result.routine.duplicated(["section_code", "day", "period"]).any()
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_never_returns_a_worse_routine(rules, scrambled, seed):
+    # a hot schedule accepts many uphill moves
+    result = optimize_routine(scrambled, rules, seconds=60, iterations=500, seed=seed,
+                              start_temperature=50.0, end_temperature=20.0)
+    assert result.accepted > 0
+    assert result.after.total <= result.before.total
+
+
+def test_same_seed_and_iterations_give_the_same_routine(rules, scrambled):
+    runs = [optimize_routine(scrambled, rules, seconds=60, iterations=1000, seed=7) for _ in range(2)]
+    pd.testing.assert_frame_equal(runs[0].routine, runs[1].routine)
+    assert runs[0].after == runs[1].after
+    assert runs[0].accepted == runs[1].accepted
+    other = optimize_routine(scrambled, rules, seconds=60, iterations=1000, seed=8)
+    assert not other.routine.equals(runs[0].routine)
+
+
+def test_undo_trail_restores_the_best_routine(rules, scrambled, monkeypatch):
+    weights = SoftWeights()
+    totals = []
+    swap = optimizer._State.swap
+
+    def recording_swap(self, sec, i, j, w):
+        delta = swap(self, sec, i, j, w)
+        totals.append((totals[-1] if totals else 0.0) + delta)
+        return delta
+
+    monkeypatch.setattr(optimizer._State, "swap", recording_swap)
+    result = optimize_routine(scrambled, rules, weights, seconds=60, iterations=400, seed=2,
+                              start_temperature=50.0, end_temperature=20.0)
+    best = result.before.total + min(0.0, min(totals))
+    # the walk ended above its best routine before the trail was undone
+    first_best = totals.index(min(totals))
+    assert max(totals[first_best:]) > min(totals)
+    assert result.after.total == pytest.approx(best)
+    assert score_routine(result.routine, rules, weights).total == pytest.approx(best)
@@ -0,0 +1,50 @@
+"""Partitions must never share a teacher or a room."""
+import pandas as pd
+
+from benchmarks.synthetic import make_context
+from routine_agent.eligibility import EligibilityIndex
+from routine_agent.partition import generate_partitioned, partition_sections
+from routine_agent.validator import validate_routine
+
+
+def _shared_teacher_context(rules):
+    """Two shifts whose teachers have no shift, so every teacher serves both."""
+    context = make_context(6, rules, utilisation=0.5, campuses=2)
+    teachers = context["teachers"]
+    context["teachers"] = teachers.assign(shifts_id=pd.NA)
+    return context
+
+
+def test_teachers_without_shift_join_the_shifts(rules):
+    context = _shared_teacher_context(rules)
+    assert partition_sections(context, rules) == [context["sections"]["code"].tolist()]
+
+
+def test_partitions_share_no_eligible_teacher(rules):
+    context = make_context(12, rules, campuses=3)
+    parts = partition_sections(context, rules)
+    assert len(parts) == 3
+    index = EligibilityIndex(context, rules)
+    teachers = [
+        {t for code in part for subj in index.section_subjects[code] for t in index.eligible(code, subj)}
+        for part in parts
+    ]
+    for i in range(len(teachers)):
+        for j in range(i + 1, len(teachers)):
+            assert not teachers[i] & teachers[j]
+
+
+def test_merged_routine_is_valid_and_revalidated(rules):
+    context = _shared_teacher_context(rules)
+    result = generate_partitioned(context, rules, max_workers=1)
+    assert result.errors == validate_routine(result.routine, rules) == []
+    assert set(result.routine["section_code"]) == set(context["sections"]["code"])
+
+
+def test_clashes_between_partitions_are_reported(rules, monkeypatch):
+    context = _shared_teacher_context(rules)
+    by_shift = context["sections"].groupby("shifts_id")["code"].agg(list).tolist()
+    monkeypatch.setattr("routine_agent.partition.partition_sections", lambda *a, **k: by_shift)
+    result = generate_partitioned(context, rules, max_workers=1)
+    assert result.errors == validate_routine(result.routine, rules)
+    assert any(e.startswith("Teacher conflict") for e in result.errors)
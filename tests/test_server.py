@@ -0,0 +1,70 @@
+"""The JSON-lines server answers every request and survives bad ones."""
+import io
+import json
+
+from langchain_core.messages import AIMessage
+
+from benchmarks.fake_llm import ScriptedChatModel
+from routine_agent import agent
+from routine_agent.routine_store import save_routine
+from routine_agent.server import serve
+
+
+def _serve(tmp_path, monkeypatch, routine, context, lines, on_save=None):
+    csv_path = str(tmp_path / "routine_table.csv")
+    save_routine(routine, csv_path)
+    monkeypatch.setattr(agent, "_ROUTINE_PATH", csv_path)
+    edit = {"name": "remove_slot_tool", "id": "rm", "args": {"section_code": "S0", "day": "Sun", "period": 1}}
+    llm = ScriptedChatModel(responses=[AIMessage(content="", tool_calls=[edit]), AIMessage(content="Removed.")])
+    session = agent.AgentSession(context, llm=llm)
+    out = io.StringIO()
+    try:
+        served = serve(session, io.StringIO("".join(line + "\n" for line in lines)), out, on_save)
+    finally:
+        session.close()
+    return served, [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_prompt_validate_save_shutdown(tmp_path, monkeypatch, routine, context):
+    saved = []
+
+    def on_save(df):
+        saved.append(df)
+        return []
+
+    served, replies = _serve(tmp_path, monkeypatch, routine, context, [
+        json.dumps({"id": 1, "prompt": "Free S0 Sunday period 1."}),
+        json.dumps({"id": 2, "command": "validate"}),
+        "",
+        json.dumps({"id": 3, "command": "save"}),
+        json.dumps({"id": 4, "command": "shutdown"}),
+        json.dumps({"id": 5, "command": "validate"}),
+    ], on_save)
+
+    assert served == 3
+    assert [r["id"] for r in replies] == [1, 2, 3, 4]
+    assert replies[0]["response"] == "Removed."
+    assert replies[0]["slots"] == replies[1]["slots"] == len(routine) - 1
+    assert replies[1]["errors"] == []
+    assert replies[2] == {"id": 3, "errors": [], "saved": True}
+    assert replies[3] == {"id": 4, "stopped": True}
+    assert len(saved) == 1 and len(saved[0]) == len(routine) - 1
+
+
+def test_bad_requests_get_errors_and_the_loop_continues(tmp_path, monkeypatch, routine, context):
+    served, replies = _serve(tmp_path, monkeypatch, routine, context, [
+        "{not json",
+        json.dumps([1, 2]),
+        json.dumps({"id": "a", "command": "dance"}),
+        json.dumps({"id": "b", "prompt": "  "}),
+        json.dumps({"id": "c", "command": "save"}),
+        json.dumps({"id": "d", "command": "validate"}),
+    ])
+
+    assert served == 6
+    assert replies[0]["id"] is None and replies[0]["error"].startswith("Invalid request:")
+    assert replies[1] == {"id": None, "error": "Invalid request: Each request must be a JSON object."}
+    assert replies[2]["id"] == "a" and "Unknown command 'dance'" in replies[2]["error"]
+    assert replies[3]["id"] == "b" and "non-empty 'prompt'" in replies[3]["error"]
+    assert replies[4] == {"id": "c", "error": "Saving is not available in this server."}
+    assert replies[5] == {"id": "d", "slots": len(routine), "errors": []}
@@ -0,0 +1,100 @@
+"""Concurrent agent sessions over copy-on-write forks stay isolated from each other and the base."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from benchmarks.fake_llm import ScriptedChatModel
+from routine_agent.agent import AgentSession
+from routine_agent.routine_store import RoutineStore
+
+SESSIONS = 6
+
+
+def _script(i: int, slot: dict) -> ScriptedChatModel:
+    """Session i removes one base slot and adds a slot for a new section."""
+    edits = [
+        {"name": "remove_slot_tool", "id": f"rm-{i}",
+         "args": {"section_code": slot["section_code"], "day": slot["day"], "period": slot["period"]}},
+        {"name": "add_slot", "id": f"add-{i}",
+         "args": {"section_code": f"N{i}", "day": "Sun", "period": 1, "subject_id": "1",
+                  "teacher_id": f"T{i}", "room_id": f"R{i}"}},
+    ]
+    reads = [
+        {"name": "list_slots", "id": f"ls-{i}", "args": {"section_code": f"N{i}"}},
+        {"name": "validate_routine_tool", "id": f"val-{i}", "args": {}},
+    ]
+    return ScriptedChatModel(responses=[
+        AIMessage(content="", tool_calls=edits),
+        AIMessage(content="", tool_calls=reads),
+        AIMessage(content=f"Session {i} done."),
+    ])
+
+
+def _rows(df) -> set:
+    return set(df.itertuples(index=False, name=None))
+
+
+@pytest.fixture
+def base(routine):
+    return RoutineStore(routine)
+
+
+@pytest.fixture
+def slots(base):
+    rows = base.to_dataframe()
+    picked = [rows.iloc[i * 7].to_dict() for i in range(SESSIONS)]
+    for slot in picked:
+        slot["period"] = int(slot["period"])
+    return picked
+
+
+def _sessions(context, base, slots) -> list:
+    return [AgentSession(context, llm=_script(i, slots[i]), base=base) for i in range(SESSIONS)]
+
+
+def _check(results: list, base: RoutineStore, base_rows: set, slots: list) -> None:
+    for i, (text, df) in enumerate(results):
+        assert text == f"Session {i} done."
+        removed = tuple(slots[i].values())
+        expected = (base_rows - {removed}) | {(f"N{i}", "Sun", 1, "1", f"T{i}", f"R{i}", "")}
+        assert _rows(df) == expected, f"session {i} saw another session's edits"
+    assert _rows(base.to_dataframe()) == base_rows, "the shared base was modified"
+
+
+def test_threaded_sessions_are_isolated(context, base, slots):
+    base_rows = _rows(base.to_dataframe())
+    sessions = _sessions(context, base, slots)
+    with ThreadPoolExecutor(max_workers=SESSIONS) as pool:
+        results = list(pool.map(lambda s: s.run("Edit."), sessions))
+    _check(results, base, base_rows, slots)
+    for s in sessions:
+        s.close()
+
+
+def test_async_sessions_are_isolated(context, base, slots):
+    base_rows = _rows(base.to_dataframe())
+    sessions = _sessions(context, base, slots)
+
+    async def run_all() -> list:
+        return await asyncio.gather(*(s.arun("Edit.") for s in sessions))
+
+    _check(asyncio.run(run_all()), base, base_rows, slots)
+    for s in sessions:
+        s.close()
+
+
+def test_fork_writes_stay_in_the_fork(base):
+    base_rows = _rows(base.to_dataframe())
+    a, b = base.fork(), base.fork()
+    a.remove_slot("S0", "Sun", 1)
+    b.upsert_slot("S0", "Sun", 1, "9", "99", "9", "1")
+    a.move_slot("S1", "Sun", 2, "Fri", 2)
+
+    assert _rows(base.to_dataframe()) == base_rows
+    assert a.get("S0", "Sun", 1) is None and b.get("S0", "Sun", 1)["teacher_id"] == "99"
+    assert b.get("S1", "Sun", 2) is not None and a.get("S1", "Fri", 2) is not None
+    assert len(a) == len(base) - 1 and len(b) == len(base)
+    assert not a.teacher_slots("Sun", 1, "99")
+    assert b.teacher_slots("Sun", 1, "99") == {("S0", "Sun", 1)}
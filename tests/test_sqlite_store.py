@@ -0,0 +1,106 @@
+"""SqliteRoutineStore: seeding through open_store and SQL-level transactions."""
+import os
+import sqlite3
+
+import pytest
+
+from routine_agent.routine_store import RoutineStore, open_store, save_routine
+from routine_agent.sqlite_store import SqliteRoutineStore
+
+
+def _rows(store):
+    return set(store.to_dataframe().itertuples(index=False, name=None))
+
+
+def _db_rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return set(conn.execute("SELECT section_code, day, period, teacher_id FROM slots"))
+    finally:
+        conn.close()
+
+
+def test_open_store_seeds_from_csv_next_to_database(tmp_path, routine):
+    save_routine(routine.head(10), str(tmp_path / "routine_table.csv"))
+    store = open_store("sqlite", str(tmp_path / "routine.db"))
+    assert _rows(store) == _rows(RoutineStore(routine.head(10)))
+    store.close()
+
+
+def test_open_store_leaves_new_database_empty_without_csv(tmp_path):
+    store = open_store("sqlite", str(tmp_path / "routine.db"))
+    assert len(store) == 0
+    store.close()
+
+
+@pytest.fixture
+def db(tmp_path, routine):
+    path = str(tmp_path / "routine.db")
+    store = SqliteRoutineStore.from_dataframe(routine, path)
+    yield path, store
+    store.close()
+
+
+def test_rollback_discards_sql_transaction(db):
+    path, store = db
+    before, on_disk = _rows(store), _db_rows(path)
+    events = []
+    store.subscribe(lambda key, old, new: events.append((key, old, new)))
+
+    store.begin()
+    store.move_slot("S0", "Sun", 1, "Fri", 1)
+    store.remove_slot("S1", "Mon", 2)
+    store.upsert_slot("S2", "Tue", 3, "9", "99", "9", "1")
+    assert _db_rows(path) == on_disk  # nothing visible before commit
+    changes = len(events)
+    store.rollback()
+
+    assert not store.in_transaction
+    assert _rows(store) == before
+    assert _db_rows(path) == on_disk
+    # listeners get the reverse of every change, newest first
+    reverse = events[changes:]
+    assert [k for k, _, _ in reverse] == [k for k, _, _ in reversed(events[:changes])]
+    assert all(new == old2 and old == new2
+               for (_, old, new), (_, old2, new2) in zip(reverse, reversed(events[:changes])))
+
+
+def test_interrupted_transaction_leaves_database_unchanged(db):
+    path, store = db
+    on_disk = _db_rows(path)
+    store.begin()
+    store.remove_slot("S0", "Sun", 1)
+    store.upsert_slot("S3", "Wed", 4, "9", "99", "9", "1")
+    store._conn.close()  # the process dies before commit()
+
+    reopened = SqliteRoutineStore(path)
+    assert _db_rows(path) == on_disk
+    assert len(reopened) == len(on_disk)
+    reopened.close()
+
+
+def test_commit_writes_batch(db):
+    path, store = db
+    with store.transaction():
+        store.remove_slot("S0", "Sun", 1)
+    assert ("S0", "Sun", 1) not in {r[:3] for r in _db_rows(path)}
+    assert os.path.exists(path)
+
+
+def test_open_store_does_not_reseed_an_existing_empty_database(tmp_path, routine):
+    save_routine(routine.head(10), str(tmp_path / "routine_table.csv"))
+    store = open_store("sqlite", str(tmp_path / "routine.db"))
+    store.replace_all(routine.head(0))
+    store.close()
+
+    store = open_store("sqlite", str(tmp_path / "routine.db"))
+    assert len(store) == 0
+    store.close()
+
+
+def test_sort_keys_matches_row_order(db, routine):
+    _, store = db
+    keys = [tuple(k) for k in routine[["section_code", "day", "period"]].itertuples(index=False)]
+    shuffled = keys[::7][::-1] + [("S0", "Fri", 1)] + keys[1::2]
+    ordered = store.sort_keys(shuffled)
+    assert ordered == [("S0", "Fri", 1)] + [k for k in keys if k in set(shuffled)]
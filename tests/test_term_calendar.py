@@ -0,0 +1,73 @@
+"""expand_routine: shift weekends, the RoutineRules fallback and dated overrides."""
+import datetime as dt
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_context, make_routine
+from routine_agent.config import RoutineRules
+from routine_agent.term_calendar import expand_routine
+
+SUN, SAT = dt.date(2026, 3, 1), dt.date(2026, 3, 7)
+
+
+@pytest.fixture
+def setup(rules):
+    context = make_context(4, rules)
+    # S2 has no shift, S3's shift has no management log
+    context["sections"] = context["sections"].assign(shifts_id=[1, 1, None, 99])
+    routine = make_routine(4, rules, conflict_rate=0.0, invalid_rate=0.0)
+    friday = pd.DataFrame({
+        "section_code": ["S0", "S2", "S3"], "day": "Fri", "period": 1,
+        "subject_id": "1", "teacher_id": "1", "room_id": "1", "shift_log_id": "1",
+    })
+    return pd.concat([routine, friday], ignore_index=True), context
+
+
+def _by_section_day(sessions):
+    out: dict = {}
+    for s in sessions:
+        out.setdefault((s.section_code, s.day), []).append(s)
+    return out
+
+
+def test_sections_without_a_shift_log_use_the_default_weekend(rules, setup):
+    routine, context = setup
+    sessions = list(expand_routine(routine, context, SUN, SAT, rules))
+    days = _by_section_day(sessions)
+    for section in ("S0", "S1", "S2", "S3"):
+        assert {d for s, d in days if s == section} == {"Sun", "Mon", "Tue", "Wed", "Thu"}
+    assert days[("S0", "Sun")][0].start == "08:00"
+    assert all(s.start == "" and s.shift_log_id == "" for sec in ("S2", "S3") for s in days[(sec, "Mon")])
+
+    only_saturday = RoutineRules(weekends=["Sat"])
+    days = _by_section_day(expand_routine(routine, context, SUN, SAT, only_saturday))
+    assert ("S2", "Fri") in days and ("S3", "Fri") in days
+    assert ("S0", "Fri") not in days  # the shift log's weekends still apply
+
+
+def test_overrides_cancel_substitute_and_add(rules, setup):
+    routine, context = setup
+    context["time_tables"] = pd.DataFrame({
+        "date": ["2026-03-01", "2026-03-01", "2026-03-02", "2026-04-01"],
+        "sections_id": [1, 2, 1, 1],
+        "start": ["08:00:00", "08:45:00", "14:00:00", None],
+        "end": ["08:45:00", "09:30:00", "14:45:00", None],
+        "subjects_id": [None, None, 3, None],
+        "teachers_id": [None, 77, 5, None],
+        "class_room_id": [None, None, 9, None],
+        "status": [0, 1, 1, 0],
+    })
+    days = _by_section_day(expand_routine(routine, context, SUN, SAT, rules))
+
+    assert [s.period for s in days[("S0", "Sun")]] == [2, 3, 4, 5, 6]  # period 1 cancelled
+    s1 = {s.period: s for s in days[("S1", "Sun")]}
+    assert (s1[2].teacher_id, s1[2].source) == ("77", "override")
+    expected = routine.query("section_code == 'S1' and day == 'Sun' and period == 2").iloc[0]
+    assert (s1[2].subject_id, s1[2].room_id) == (expected.subject_id, expected.room_id)
+    assert {s.source for p, s in s1.items() if p != 2} == {"routine"}
+
+    extra = [s for s in days[("S0", "Mon")] if s.source == "override"]
+    assert len(extra) == 1
+    assert extra[0][3:9] == (None, "14:00", "14:45", "3", "5", "9")
+    assert len(days[("S0", "Mon")]) == 7
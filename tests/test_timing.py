@@ -0,0 +1,70 @@
+"""ShiftTimetable: which log applies on a date, and how a shift window is cut into periods."""
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from routine_agent.timing import ShiftTimetable
+
+D = dt.date
+
+
+@pytest.fixture
+def timetable(rules):
+    logs = pd.DataFrame({
+        "id": [1, 2, 3],
+        "shifts_id": [1, 1, 2],
+        "weekends": ['["Fri","Sat"]'] * 3,
+        "start": ["08:00:00", "07:30:00", "12:00:00"],
+        "end": ["13:07:00", "12:30:00", "17:00:00"],
+        "applicable_from": ["2026-01-01", "2026-04-01", "2026-02-01"],
+        "applicable_to": ["2026-03-31", None, "2026-02-28"],
+    })
+    return ShiftTimetable(logs, rules)
+
+
+@pytest.mark.parametrize("on, shift, log", [
+    (D(2026, 1, 1), 1, "1"),    # first day of the first log
+    (D(2026, 3, 31), 1, "1"),   # last day of a closed log
+    (D(2026, 4, 1), 1, "2"),    # the next log starts
+    (D(2030, 1, 1), 1, "2"),    # open-ended
+    (D(2026, 2, 1), 2, "3"),
+    (D(2026, 2, 28), 2, "3"),
+])
+def test_resolve_on_boundaries(timetable, on, shift, log):
+    assert timetable.window(shift, on).log_id == log
+
+
+@pytest.mark.parametrize("on, shift", [
+    (D(2025, 12, 31), 1),  # before the first log
+    (D(2026, 1, 31), 2),
+    (D(2026, 3, 1), 2),    # after applicable_to, no later log
+    (D(2026, 1, 1), 9),    # unknown shift
+])
+def test_resolve_outside_any_log(timetable, on, shift):
+    assert timetable.resolve(shift, on) is None
+    assert timetable.period_times(shift, on) == {}
+
+
+def test_resolve_dates_agrees_with_resolve(timetable):
+    dates = pd.date_range("2025-12-25", "2026-04-10", freq="D")
+    for shift in (1, 2, 9):
+        expected = [timetable.resolve(shift, d.date()) for d in dates]
+        rows = timetable.resolve_dates(shift, dates)
+        assert rows.dtype == np.int64
+        assert rows.tolist() == [-1 if r is None else r for r in expected]
+
+
+def test_period_grid_with_remainder(timetable, rules):
+    # 08:00–13:07 minus the break is 277 minutes: 46 per period, 1 left over
+    times = timetable.period_times(1, D(2026, 1, 5))
+    start, end, pause = 8 * 60, 13 * 60 + 7, rules.break_duration_min
+    length = (end - start - pause) // len(rules.periods)
+    assert (length, (end - start - pause) % len(rules.periods)) == (46, 1)
+    assert times[1] == (start, start + length)
+    for p in rules.periods[1:]:
+        prev_end = times[p - 1][1]
+        gap = pause if p == rules.break_after_period + 1 else 0
+        assert times[p] == (prev_end + gap, prev_end + gap + length)
+    assert end - times[rules.periods[-1]][1] == 1  # the remainder is left at the end of the day
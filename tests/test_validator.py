@@ -0,0 +1,70 @@
+"""The vectorised validator must report what the original groupby/iterrows version did."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_validator import legacy_validate_routine
+from benchmarks.synthetic import make_routine
+from routine_agent.routine_store import ROUTINE_COLUMNS
+from routine_agent.validator import CONFLICT_COLUMNS, find_conflicts, validate_routine
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_matches_legacy_on_synthetic_routine(rules, seed):
+    df = make_routine(40, rules, conflict_rate=0.05, invalid_rate=0.01, seed=seed)
+    errors = validate_routine(df, rules)
+    assert errors == legacy_validate_routine(df, rules)
+    kinds = set(find_conflicts(df, rules)["kind"])
+    assert {"teacher", "room", "day", "period"} <= kinds
+
+
+def test_invalid_day_and_period_rows(rules):
+    df = make_routine(2, rules, conflict_rate=0.0, invalid_rate=0.0)
+    df.loc[0, "day"] = "Fri"
+    df.loc[1, "period"] = 0
+    df.loc[2, "period"] = len(rules.periods) + 1
+    df.loc[3, ["day", "period"]] = ["Sat", 9]
+    errors = validate_routine(df, rules)
+    assert errors == legacy_validate_routine(df, rules)
+    assert len(errors) == 5
+    assert errors[0] == f"Invalid day 'Fri' for section S0. Allowed: {rules.days}."
+
+
+@pytest.mark.parametrize("df", [
+    pd.DataFrame(columns=ROUTINE_COLUMNS),
+    pd.DataFrame({c: pd.Series(dtype=object) for c in ROUTINE_COLUMNS}),
+])
+def test_empty_routine(rules, df):
+    assert validate_routine(df, rules) == legacy_validate_routine(df, rules) == []
+    assert list(find_conflicts(df, rules).columns) == CONFLICT_COLUMNS
+
+
+def test_missing_ids_are_not_conflicts(rules):
+    """'' (how the stores export a missing ID) and NaN both mean "unassigned".
+
+    The original validator dropped NaN keys in groupby but grouped '' like a
+    real ID, reporting every pair of unassigned slots in a period as a
+    clash; the vectorised validator skips both on purpose.
+    """
+    df = make_routine(3, rules, conflict_rate=0.0, invalid_rate=0.0).astype({"teacher_id": object, "room_id": object})
+    first = (df["day"] == "Sun") & (df["period"] == 1)
+    df.loc[first, "teacher_id"] = ["", "", np.nan]
+    df.loc[first, "room_id"] = [np.nan, "", ""]
+
+    assert validate_routine(df, rules) == []
+    legacy = legacy_validate_routine(df, rules)
+    assert legacy == [
+        "Teacher conflict: teacher  assigned to multiple sections ['S0', 'S1'] on Sun period 1.",
+        "Room conflict: room  used by multiple sections ['S1', 'S2'] on Sun period 1.",
+    ]
+
+    # real IDs next to missing ones are still checked
+    df.loc[first & (df["section_code"] == "S2"), "teacher_id"] = df.loc[
+        (df["section_code"] == "S2") & (df["day"] == "Mon") & (df["period"] == 1), "teacher_id"
+    ].iloc[0]
+    df.loc[(df["section_code"] == "S0") & (df["day"] == "Mon") & (df["period"] == 1), "teacher_id"] = df.loc[
+        (df["section_code"] == "S2") & (df["day"] == "Mon") & (df["period"] == 1), "teacher_id"
+    ].iloc[0]
+    conflicts = find_conflicts(df, rules)
+    assert conflicts["kind"].tolist() == ["teacher"]
+    assert conflicts["section_codes"].iloc[0] == ["S0", "S2"]